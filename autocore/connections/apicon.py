@@ -1,16 +1,40 @@
 # Document descryption:
 __author__ = 'Robert Tadeusz Kucharski'
-__version__ = '2.0'
+__version__ = '2.1'
 
 # Python Import:
+from xml.parsers.expat import ExpatError
 import requests
-import xmltodict
-import json
+import copy
 import time
 
 # Connection Import:
 from .connection import Connection
 
+# HTTPS session pool Import:
+from .http_session_pool import http_session_pool
+from .http_session_pool import credential_key
+from .http_session_pool import collect_connect_time
+from .http_session_pool import reset_connect_time
+
+# Response cache Import:
+from .response_cache import response_cache
+
+# Token manager Import:
+from .token_manager import token_manager, LoginError
+
+# Rate limiter Import:
+from .rate_limiter import rate_limiter
+from .rate_limiter import collect_retry_after
+from .rate_limiter import MAX_RETRIES
+
+# Response decoder Import:
+from .response_decoder import collect_data_type
+from .response_decoder import decode_response
+from .response_decoder import iter_xml_items
+from .response_decoder import JSON
+from .response_decoder import XML
+
 # Logger import:
 from logger.logger import Logger
 
@@ -21,20 +45,32 @@ logger = Logger('HTTPS connection')
 class ApiCon(Connection):
     """
     The API connection class uses requests library, to connect with network device using HTTPS protocol.
+    HTTPS sessions are kept alive and shared by all ApiCon objects of the worker, that use the same credential.
+
+    Attributes:
+    -----------------
+    execution_time:
+        Total request time.
+    connect_time:
+        TCP and TLS handshake time, 0 if open connection was reused.
+    first_byte_time:
+        Time from sent request to first response byte, without handshake time.
+    queue_wait_time:
+        Time spent waiting for device request limits (rate, in-flight requests and Retry-After).
     
     Methods:
     --------
     get:
-        Xxx.
+        Send HTTPS GET request.
     post:
-        Xxx.
+        Send HTTPS POST request.
     put:
-        Xxx.
+        Send HTTPS PUT request.
     delete:
-        Xxx.
+        Send HTTPS DELETE request.
     """
 
-    def get(self, url: str, payload: str = None, headers: dict = None) -> dict:
+    def get(self, url: str, payload: str = None, headers: dict = None, raw: bool = False, item_depth: int = None, cache: bool = False, cache_ttl: int = None, item_name: str = None) -> dict:
         """
         Send HTTPS GET request, using HTTPS protocol.
             
@@ -46,6 +82,21 @@ class ApiCon(Connection):
             Additional data used to construct the HTTPS request (Optional).
         headers: dict
             Additional header information (Optional).
+        raw: bool
+            If True, undecoded response bytes are returned.
+        item_depth: int
+            If provided, XML response is streamed and returned as generator of
+            elements from provided depth, e.g. single interfaces of large YANG tree (Optional).
+        cache: bool
+            If True, response is stored in worker response cache and next requests are sent
+            with If-None-Match / If-Modified-Since headers, 304 responses are served from cache.
+            Cached data is returned as a copy, so it can be modified.
+        cache_ttl: int
+            Number of seconds, that cached response is served without any request (Optional).
+            Used also for devices, that do not return ETag or Last-Modified headers.
+        item_name: str
+            If provided, XML response is streamed and returned as generator of elements
+            with provided name, found at any depth (or only at item depth, if provided) (Optional).
         
         Return:
         -------
@@ -56,8 +107,120 @@ class ApiCon(Connection):
         # Verify provided variables:
         self._verify(url, payload, headers)
 
+        # Return the date retrieved from the network device using HTTPS, or from response cache:
+        if cache and not raw and item_depth is None and item_name is None:
+            return self._cached_get(url, payload, cache_ttl)
+
+        # Return the date retrieved from the network device using HTTPS.:
+        return self._connection('GET', url, payload, raw, item_depth, item_name=item_name)
+
+    def credential_key(self) -> tuple:
+        """ Return credential identity of connection (username and password or token hash). """
+
+        return credential_key(
+            self.device_username, self.device_password if self.device_token is None else self.device_token)
+
+    def _cached_get(self, url, payload, cache_ttl) -> dict:
+        """ Send conditional HTTPS GET request, or serve fresh response from response cache. """
+
+        # Cached responses are separated per credential, as device can return different data to each user:
+        cache_key = response_cache.key(
+            self.device_hostname, self.device_https_port, url, payload, self.headers, self.credential_key())
+        # Entry is kept by reference, so it can be served after 304 response also if it was evicted meanwhile:
+        entry = response_cache.get(cache_key)
+
+        # Serve response within TTL without request:
+        if entry is not None and cache_ttl is not None and time.monotonic() - entry['stored'] < cache_ttl:
+            response_cache.record(hit=True)
+            self.status = True
+            self.execution_time = 0
+            logger.debug('HTTPS response was served from cache.', self.task_id, self.device_name)
+            return copy.deepcopy(entry['data'])
+
+        # Add validators of cached response:
+        conditional_headers = {}
+        if entry is not None and entry['etag']:
+            conditional_headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry['last_modified']:
+            conditional_headers['If-Modified-Since'] = entry['last_modified']
+
+        return self._connection(
+            'GET', url, payload, conditional_headers=conditional_headers, cache_key=cache_key, cache_entry=entry)
+
+    def post(self, url: str, payload: str = None, headers: dict = None) -> dict:
+        """
+        Send HTTPS POST request, using HTTPS protocol.
+
+        Parameters:
+        -----------
+        url: string
+            URL string used to construct the HTTPS request.
+        payload: string
+            Data used to construct the HTTPS request (Optional).
+        headers: dict
+            Additional header information (Optional).
+
+        Return:
+        -------
+        jsonResponse: dict
+            Return the date retrieved from the network device using HTTPS.
+        """
+
+        # Verify provided variables:
+        self._verify(url, payload, headers)
+
+        # Return the date retrieved from the network device using HTTPS.:
+        return self._connection('POST', url, payload)
+
+    def put(self, url: str, payload: str = None, headers: dict = None) -> dict:
+        """
+        Send HTTPS PUT request, using HTTPS protocol.
+
+        Parameters:
+        -----------
+        url: string
+            URL string used to construct the HTTPS request.
+        payload: string
+            Data used to construct the HTTPS request (Optional).
+        headers: dict
+            Additional header information (Optional).
+
+        Return:
+        -------
+        jsonResponse: dict
+            Return the date retrieved from the network device using HTTPS.
+        """
+
+        # Verify provided variables:
+        self._verify(url, payload, headers)
+
+        # Return the date retrieved from the network device using HTTPS.:
+        return self._connection('PUT', url, payload)
+
+    def delete(self, url: str, payload: str = None, headers: dict = None) -> dict:
+        """
+        Send HTTPS DELETE request, using HTTPS protocol.
+
+        Parameters:
+        -----------
+        url: string
+            URL string used to construct the HTTPS request.
+        payload: string
+            Additional data used to construct the HTTPS request (Optional).
+        headers: dict
+            Additional header information (Optional).
+
+        Return:
+        -------
+        jsonResponse: dict
+            Return the date retrieved from the network device using HTTPS.
+        """
+
+        # Verify provided variables:
+        self._verify(url, payload, headers)
+
         # Return the date retrieved from the network device using HTTPS.:
-        return self._connection('GET', url, payload)
+        return self._connection('DELETE', url, payload)
 
     def _verify(self, url, payload, headers) -> None:
         """ Verify provided variables. """
@@ -87,79 +250,131 @@ class ApiCon(Connection):
                 # Raise exception:
                 raise TypeError('The provided headers variable must be a dictionary.')
 
-    def _connection(self, request_method, url, payload) -> dict:
-        """ Connect to server using HTTPS protocol. """
+    def _connection(self, request_method, url, payload, raw: bool = False, item_depth: int = None, conditional_headers: dict = None, cache_key: tuple = None, cache_entry: dict = None, item_name: str = None) -> dict:
+        """
+        Connect to server using HTTPS protocol.
+        Keep-alive session of device is collected from worker HTTPS session pool.
+        """
 
         # Create URL Address from tamplate:
         request_url = f'https://{self.device_hostname}:{self.device_https_port}/{url}'
 
         # Create a default Cisco header if not specified:
         if self.headers is None:
-            self.headers = {
+            headers = {
                 'Accept': 'application/yang-data+json',
                 'Content-Type': 'application/yang-data+json',
             }
+        else:
+            headers = dict(self.headers)
 
         # Add the token to the header, if provided:
         if self.device_token is not None:
-            self.headers['x-token'] = self.device_token
+            headers['x-token'] = self.device_token
+
+        # Add conditional request headers, if provided:
+        if conditional_headers:
+            headers.update(conditional_headers)
+
+        # Cached responses of device are not valid after write request:
+        if request_method != 'GET':
+            response_cache.invalidate(self.device_hostname, self.device_https_port)
 
         # Log the beginning of a new connection to the https server:
-        logger.info('Starting a new Https connection.', self.task_id, self.device)
+        logger.info('Starting a new Https connection.', self.task_id, self.device_name)
 
         # Start clock count:
         start_time = time.perf_counter()
+        reset_connect_time()
 
         try: # Try to establish a connection to a network device:
 
-            session = requests.Session()
+            # Collect keep-alive session of device:
+            session = http_session_pool.acquire(
+                self.device_hostname, self.device_https_port, self.credential_key())
+
+            # Device types with login API use token shared by token manager:
+            token_header = None
+            if self.device_token is None and token_manager.config(self.device_type):
+                token_header = token_manager.token(self)
+
+            # Requests above device limits wait in queue, 429/503 responses are repeated after Retry-After:
+            self.queue_wait_time = 0.0
+            retries = 0
+            reauthenticated = False
+            while True:
+                with rate_limiter.slot(self) as wait_time:
+                    self.queue_wait_time += wait_time
+                    send_time = time.perf_counter()
+                    response = self._send(session, request_method, request_url, headers, payload, token_header)
+                    first_byte_time = time.perf_counter()
+
+                    # Rejected request is repeated in a new request slot, so it takes another token of device:
+                    rejected = response.status_code == 401 and token_header is not None and not reauthenticated
+                    if rejected:
+                        response.close()
+                    # Streamed XML response is read by decoder, after request slot is released:
+                    elif item_depth is None and item_name is None:
+                        response.content
+
+                # Token was rejected, log in again once and repeat request:
+                if rejected:
+                    reauthenticated = True
+                    logger.debug('API token was rejected, logging in again.', self.task_id, self.device_name)
+                    token_manager.invalidate(self, token_header)
+                    token_header = token_manager.token(self)
+                    continue
+
+                # Check if device asked to repeat request later:
+                retry_after = collect_retry_after(response)
+                if retry_after is None or retries == MAX_RETRIES:
+                    break
+                retries += 1
+                response.close()
+                logger.warning(
+                    f'HTTPS response returned {response.status_code} code, request will be repeated after {retry_after} second/s.',
+                    self.task_id, self.device_name)
+                rate_limiter.defer(self, retry_after)
 
-            # Connect to the network device with password and username or by using token:
-            if self.device_token is None:
-                request = requests.Request(
-                    request_method,
-                    request_url,
-                    headers=self.headers,
-                    auth=(self.device_username, self.device_password),
-                    data=payload,
-                )
-            else:
-                request = requests.Request(
-                    request_method,
-                    request_url,
-                    headers=self.headers,
-                    data=payload,
-                )
+        except requests.exceptions.HTTPError as error:
+            # API login failed:
+            logger.error(str(error), self.task_id, self.device_name)
+            # Change connection status to False:
+            self.status = False
+            # Return connection starus:
+            return self.status
 
-            prepare_request = session.prepare_request(request)
-            response = session.send(
-                prepare_request,
-                verify=self.certificate,
-            )
+        except LoginError as error:
+            # API login response was not valid:
+            logger.error(str(error), self.task_id, self.device_name)
+            # Change connection status to False:
+            self.status = False
+            # Return connection starus:
+            return self.status
 
         except requests.exceptions.SSLError as error:
-            logger.error(error, self.task_id, self.device)
+            logger.error(str(error), self.task_id, self.device_name)
             # Change connection status to False:
             self.status = False
             # Return connection starus:
             return self.status
 
         except requests.exceptions.Timeout as error:
-            logger.error(error, self.task_id, self.device)
+            logger.error(str(error), self.task_id, self.device_name)
             # Change connection status to False:
             self.status = False
             # Return connection starus:
             return self.status
 
         except requests.exceptions.InvalidURL as error:
-            logger.error(error, self.task_id, self.device)
+            logger.error(str(error), self.task_id, self.device_name)
             # Change connection status to False:
             self.status = False
             # Return connection starus:
             return self.status
 
         except requests.exceptions.ConnectionError as error:
-            logger.error(error, self.task_id, self.device)
+            logger.error(str(error), self.task_id, self.device_name)
             # Change connection status to False:
             self.status = False
             # Return connection starus:
@@ -168,109 +383,203 @@ class ApiCon(Connection):
         else:
 
             # Log when https connection was established:
-            logger.debug('Https connection was established.', self.task_id, self.device)
+            logger.debug('Https connection was established.', self.task_id, self.device_name)
 
             # Finish clock count & method execution time:
             finish_time = time.perf_counter()
             self.execution_time = round(finish_time - start_time, 5)
+            # Split execution time into handshake time (0 for reused connection) and time to first byte:
+            self.connect_time = round(collect_connect_time(), 5)
+            self.first_byte_time = round(first_byte_time - send_time - self.connect_time, 5)
+            self.queue_wait_time = round(self.queue_wait_time, 5)
 
             # Log time of command execution:
             if self.execution_time > 2:
                 logger.debug(
                     f'HTTPS connection taken {self.execution_time} seconds.',
-                    self.task_id, self.device, execution_time=self.execution_time
+                    self.task_id, self.device_name, execution_time=self.execution_time,
+                    connect_time=self.connect_time, first_byte_time=self.first_byte_time,
+                    queue_wait_time=self.queue_wait_time
                 )
             else:
                 logger.debug(
                     f'HTTPS connection taken {self.execution_time} second.',
-                    self.task_id, self.device, execution_time=self.execution_time
+                    self.task_id, self.device_name, execution_time=self.execution_time,
+                    connect_time=self.connect_time, first_byte_time=self.first_byte_time,
+                    queue_wait_time=self.queue_wait_time
                 )
 
             # Convert HTTPS response to dictionary:
-            return self._check_response(response)
+            if cache_key is not None:
+                return self._check_cached_response(response, cache_key, cache_entry)
+            return self._check_response(response, raw, item_depth, item_name)
+
+    def _send(self, session, request_method, request_url, headers, payload, token_header=None):
+        """ Send HTTPS request over keep-alive session, response body is not read. """
+
+        # Connect to the network device with password and username or by using token:
+        if token_header is not None:
+            request = requests.Request(
+                request_method,
+                request_url,
+                headers={**headers, **token_header},
+                data=payload,
+            )
+        elif self.device_token is None:
+            request = requests.Request(
+                request_method,
+                request_url,
+                headers=headers,
+                auth=(self.device_username, self.device_password),
+                data=payload,
+            )
+        else:
+            request = requests.Request(
+                request_method,
+                request_url,
+                headers=headers,
+                data=payload,
+            )
+
+        prepare_request = session.prepare_request(request)
+        # Response body is read separately, to measure time to first byte:
+        return session.send(
+            prepare_request,
+            verify=self.device_certificate,
+            stream=True,
+        )
+
+    def _check_cached_response(self, response, cache_key, cache_entry) -> dict:
+        """ Serve 304 response from response cache, or store decoded response in cache. """
+
+        # Response was not modified, cached data is returned without decoding:
+        if response.status_code == 304 and cache_entry is not None:
+            self.response_code = response.status_code
+            self.status = True
+            response_cache.refresh(cache_key)
+            logger.debug('HTTPS response was not modified, it was served from cache.', self.task_id, self.device_name)
+            return copy.deepcopy(cache_entry['data'])
+
+        # Every request is counted once, as revalidated or as miss:
+        response_cache.record(hit=False)
+
+        # Request without validators can not be answered with 304 response:
+        if response.status_code == 304:
+            self.response_code = response.status_code
+            logger.error(
+                'HTTPS response returned 304 code, to request without cached response.',
+                self.task_id, self.device_name)
+            # Change connection status to False:
+            self.status = False
+            return self.status
 
-    def _check_response(self, response) -> dict:
+        # Decode and store response:
+        data = self._check_response(response)
+        if self.status and response.status_code == 200 and data is not False:
+            response_cache.store(
+                cache_key, data, len(response.content),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'))
+            # Cached data is not shared with caller:
+            return copy.deepcopy(data)
+        return data
+
+    def _check_response(self, response, raw: bool = False, item_depth: int = None, item_name: str = None) -> dict:
         """ 
             Check type of HTTPS request response.
             If the response is correct, the response data will be converted to dictionary format.
         """
 
+        # Classify response status code:
+        self._classify_response(response.status_code)
+
+        # Return undecoded response:
+        if raw:
+            return response.content
+
+        # Stream XML response element by element:
+        content_type = response.headers.get('Content-Type')
+        if (item_depth is not None or item_name is not None) and collect_data_type(content_type, b'<') == XML:
+            response.raw.decode_content = True
+            return iter_xml_items(response.raw, item_depth, item_name)
+
+        # Convert HTTPS response to Python dictionary:
+        return self._decode_response(response.content, content_type)
+
+    def _classify_response(self, status_code: int) -> None:
+        """ Log HTTPS response status code and change connection status. """
+
         # Collect response code:
-        self.response_code = response.status_code
+        self.response_code = status_code
 
         # Check response status:
         if self.response_code < 200: # All respons from 0 to 199.
             logger.warning(
-                f'Connection to {self.device_hostname}, was a informational HTTPS request. HTTPS response returned {response.status_code} code.',
-                self.task_id, self.device
+                f'Connection to {self.device_hostname}, was a informational HTTPS request. HTTPS response returned {status_code} code.',
+                self.task_id, self.device_name
             )
             # Change connection status to True:
             self.status = True
 
         elif self.response_code < 300: # All respons from 200 to 299.
             logger.debug(
-                f'Connection to {self.device_hostname}, was a success HTTPS request. HTTPS response returned {response.status_code} code.',
-                self.task_id, self.device
+                f'Connection to {self.device_hostname}, was a success HTTPS request. HTTPS response returned {status_code} code.',
+                self.task_id, self.device_name
             )
             # Change connection status to True:
             self.status = True
 
         elif self.response_code < 400: # All respons from 300 to 399.
             logger.warning(
-                f'Connection to {self.device_hostname}, returned redirection HTTPS error. HTTPS response returned {response.status_code} code.',
-                self.task_id, self.device
+                f'Connection to {self.device_hostname}, returned redirection HTTPS error. HTTPS response returned {status_code} code.',
+                self.task_id, self.device_name
             )
             # Change connection status to False:
             self.status = False
 
         elif self.response_code < 500: # All respons from 400 to 499.
             logger.error(
-                f'Connection to {self.device_hostname}, returned client HTTPS error. HTTPS response returned {response.status_code} code.',
-                self.task_id, self.device
+                f'Connection to {self.device_hostname}, returned client HTTPS error. HTTPS response returned {status_code} code.',
+                self.task_id, self.device_name
             )
             # Change connection status to False:
             self.status = False
 
         elif self.response_code < 600: # All respons from 500 to 599.
             logger.error(
-                f'Connection to {self.device_hostname}, returned server HTTPS error. HTTPS response returned {response.status_code} code.',
-                self.task_id, self.device
+                f'Connection to {self.device_hostname}, returned server HTTPS error. HTTPS response returned {status_code} code.',
+                self.task_id, self.device_name
             )
             # Change connection status to False:
             self.status = False
 
-        # Convert HTTPS response to Python dictionary:
-
-        try: # Try to convert JSON response into a Python dictionary:
-
-            # Convert JSON response into a Python dictionary:
-            convertResponse = json.loads(response.text)
-            # Change the status value of the JSON conversion process to True:
-            self.json_status = True
+    def _decode_response(self, content: bytes, content_type: str = None) -> dict:
+        """
+        Convert JSON or XML response data to Python dictionary.
+        Decoder is selected by Content-Type, or by the first character of content.
+        """
 
-        except:
+        # Response conversion status declaration:
+        self.json_status = False
+        self.xml_status = False
 
-            # Change the status value of the JSON conversion process to False:
-            self.json_status = False
+        try: # Try to convert response into a Python dictionary:
+            data_type, convertResponse = decode_response(content, content_type)
+        except (ValueError, ExpatError) as error:
+            data_type = None
+            logger.debug(str(error), self.task_id, self.device_name)
 
-            try: # Try to convert XML response into a Python dictionary if JSON fails:
-                # Convert XML response into a Python dictionary:
-                convertResponse = xmltodict.parse(response.text)
-                # Change the status value of the XML conversion process to True:
-                self.xml_status = True
-            except:
-                # Change the status value of the XML conversion process to False:
-                self.xml_status = False
+        # Change the status value of the conversion process:
+        self.json_status = data_type == JSON
+        self.xml_status = data_type == XML
 
-        finally:
+        if data_type is None:
+            # Log when python dictionary convert process fail:
+            logger.warning(
+                'Python JSON and XML dictionary convert process fail.',
+                self.task_id, self.device_name
+            )
+            convertResponse = False
 
-            if self.json_status is False and self.xml_status is False:
-                # Log when python dictionary convert process fail:
-                logger.warning(
-                    'Python JSON and XML dictionary convert process fail.',
-                    self.task_id, self.device
-                )
-                convertResponse = False
-        
         # Return Https response in Json format:
         return convertResponse
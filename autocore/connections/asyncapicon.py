@@ -0,0 +1,308 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+from functools import lru_cache
+import asyncio
+import requests
+import time
+import ssl
+
+# AIOHTTP Import (optional):
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Django Import:
+from asgiref.sync import sync_to_async
+
+# Connection Import:
+from .apicon import ApiCon
+
+# Token manager Import:
+from .token_manager import token_manager, LoginError
+
+# Rate limiter Import:
+from .rate_limiter import rate_limiter
+from .rate_limiter import collect_retry_after
+from .rate_limiter import MAX_RETRIES
+
+# Logger import:
+from logger.logger import Logger
+
+# Logger class initiation:
+logger = Logger('HTTPS AIOHTTP connection')
+
+# Default fleet request limits:
+DEFAULT_MAX_REQUESTS = 1000
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_TIMEOUT = 30
+
+
+def create_client_session(max_requests: int = DEFAULT_MAX_REQUESTS, max_per_host: int = DEFAULT_MAX_PER_HOST, timeout: int = DEFAULT_TIMEOUT):
+    """
+    Create AIOHTTP client session, with global and per host limit of open connections.
+    ! Must be called from running event loop.
+    """
+
+    if aiohttp is None:
+        raise ImportError('AIOHTTP package is required to send asynchronous HTTPS requests.')
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=max_requests, limit_per_host=max_per_host),
+        timeout=aiohttp.ClientTimeout(total=timeout))
+
+
+@lru_cache(maxsize=None)
+def _ssl_context(cafile: str) -> ssl.SSLContext:
+    """ Return SSL context verifying server certificate with provided CA bundle, created once per file. """
+
+    return ssl.create_default_context(cafile=cafile)
+
+
+def collect_ssl(certificate):
+    """
+    Convert device certificate value to AIOHTTP ssl argument, the same way as requests verify argument:
+    CA bundle path verifies certificate with the bundle, True uses default CA certificates, False skips verification.
+    """
+
+    if isinstance(certificate, str):
+        return _ssl_context(certificate)
+    return None if certificate else False
+
+
+# Main AsyncApiCon class:
+class AsyncApiCon(ApiCon):
+    """
+    The AsyncApiCon class uses AIOHTTP library, to send HTTPS requests to network device on asyncio event loop.
+    Response status classification and data conversion are the same as in ApiCon class.
+
+    Methods:
+    --------
+    get:
+        Send HTTPS GET request (Coroutine).
+    post:
+        Send HTTPS POST request (Coroutine).
+    put:
+        Send HTTPS PUT request (Coroutine).
+    delete:
+        Send HTTPS DELETE request (Coroutine).
+    """
+
+    def __init__(self, *args, session=None, **kwargs) -> None:
+        """
+        Parameters:
+        -----------------
+        session: AIOHTTP ClientSession
+            Client session shared by many devices (Optional), if not provided
+            a new session is created for each request.
+        """
+
+        super().__init__(*args, **kwargs)
+        self.session = session
+
+    async def _log(self, level, message, **kwargs):
+        """ Log message from event loop, database write is executed in a thread pool, not in a single shared thread. """
+
+        await sync_to_async(getattr(logger, level), thread_sensitive=False)(message, self.task_id, self.device_name, **kwargs)
+
+    async def get(self, url: str, payload: str = None, headers: dict = None) -> dict:
+        """ Send HTTPS GET request (Coroutine), parameters are the same as in ApiCon.get. """
+
+        self._verify(url, payload, headers)
+        return await self._async_connection('GET', url, payload)
+
+    async def post(self, url: str, payload: str = None, headers: dict = None) -> dict:
+        """ Send HTTPS POST request (Coroutine), parameters are the same as in ApiCon.post. """
+
+        self._verify(url, payload, headers)
+        return await self._async_connection('POST', url, payload)
+
+    async def put(self, url: str, payload: str = None, headers: dict = None) -> dict:
+        """ Send HTTPS PUT request (Coroutine), parameters are the same as in ApiCon.put. """
+
+        self._verify(url, payload, headers)
+        return await self._async_connection('PUT', url, payload)
+
+    async def delete(self, url: str, payload: str = None, headers: dict = None) -> dict:
+        """ Send HTTPS DELETE request (Coroutine), parameters are the same as in ApiCon.delete. """
+
+        self._verify(url, payload, headers)
+        return await self._async_connection('DELETE', url, payload)
+
+    def _request_headers(self) -> dict:
+        """ Return request headers, with default Cisco header and device token. """
+
+        if self.headers is None:
+            headers = {
+                'Accept': 'application/yang-data+json',
+                'Content-Type': 'application/yang-data+json',
+            }
+        else:
+            headers = dict(self.headers)
+
+        # Add the token to the header, if provided:
+        if self.device_token is not None:
+            headers['x-token'] = self.device_token
+        return headers
+
+    async def _async_connection(self, request_method, url, payload) -> dict:
+        """ Connect to server using HTTPS protocol (Coroutine). """
+
+        # Create URL Address from tamplate:
+        request_url = f'https://{self.device_hostname}:{self.device_https_port}/{url}'
+
+        # Collect shared client session, or create a new one:
+        session = self.session or create_client_session()
+
+        # Connect to the network device with password and username or by using token:
+        auth = None
+        if self.device_token is None:
+            auth = aiohttp.BasicAuth(self.device_username, self.device_password or '')
+
+        # Log the beginning of a new connection to the https server:
+        await self._log('info', 'Starting a new Https connection.')
+
+        # Start clock count:
+        start_time = time.perf_counter()
+
+        try: # Try to establish a connection to a network device:
+
+            # Device types with login API use token shared by token manager, login is executed in a thread:
+            token_header = None
+            if self.device_token is None and token_manager.config(self.device_type):
+                token_header = await sync_to_async(token_manager.token, thread_sensitive=False)(self)
+
+            # Requests above device rate wait in queue, 429/503 responses are repeated after Retry-After:
+            self.queue_wait_time = 0.0
+            retries = 0
+            reauthenticated = False
+            while True:
+                headers = self._request_headers()
+                if token_header is not None:
+                    headers.update(token_header)
+
+                # Wait for token and in-flight limit of device (api_limits max_in_flight):
+                async with rate_limiter.async_slot(self) as wait_time:
+                    self.queue_wait_time += wait_time
+                    send_time = time.perf_counter()
+                    async with session.request(
+                        request_method,
+                        request_url,
+                        headers=headers,
+                        auth=None if token_header is not None else auth,
+                        data=payload,
+                        ssl=collect_ssl(self.device_certificate),
+                    ) as response:
+                        first_byte_time = time.perf_counter()
+                        status_code = response.status
+                        content_type = response.headers.get('Content-Type')
+                        content = await response.read()
+                        retry_after = collect_retry_after(response)
+
+                # Token was rejected, log in again once and repeat request:
+                if status_code == 401 and token_header is not None and not reauthenticated:
+                    reauthenticated = True
+                    await self._log('debug', 'API token was rejected, logging in again.')
+                    token_manager.invalidate(self, token_header)
+                    token_header = await sync_to_async(token_manager.token, thread_sensitive=False)(self)
+                    continue
+
+                # Check if device asked to repeat request later:
+                if retry_after is not None and retries < MAX_RETRIES:
+                    retries += 1
+                    await self._log(
+                        'warning', f'HTTPS response returned {status_code} code, request will be repeated after {retry_after} second/s.')
+                    rate_limiter.defer(self, retry_after)
+                    continue
+                break
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, requests.exceptions.RequestException, LoginError) as error:
+            await self._log('error', str(error) or type(error).__name__)
+            # Change connection status to False:
+            self.status = False
+            # Return connection starus:
+            return self.status
+
+        finally:
+            if self.session is None:
+                await session.close()
+
+        # Finish clock count & method execution time:
+        self.execution_time = round(time.perf_counter() - start_time, 5)
+        self.first_byte_time = round(first_byte_time - send_time, 5)
+        self.queue_wait_time = round(self.queue_wait_time, 5)
+
+        # Log time of request execution:
+        await self._log(
+            'debug', f'HTTPS connection taken {self.execution_time} second/s.',
+            execution_time=self.execution_time, first_byte_time=self.first_byte_time,
+            queue_wait_time=self.queue_wait_time)
+
+        # Classify response status and convert response to dictionary, outside of event loop:
+        await sync_to_async(self._classify_response, thread_sensitive=False)(status_code)
+        return await sync_to_async(self._decode_response, thread_sensitive=False)(content, content_type)
+
+
+async def fleet_api_requests(devices: list, url: str, method: str = 'GET', payload: str = None, task_id: str = None, max_requests: int = DEFAULT_MAX_REQUESTS, max_per_host: int = DEFAULT_MAX_PER_HOST):
+    """
+    Send the same HTTPS request to many devices concurrently, using one event loop.
+
+    Parameters:
+    -----------------
+    devices: List
+        List of Device objects.
+    url: String
+        URL string used to construct the HTTPS request (e.g. RESTCONF path).
+    method: String
+        HTTPS request method: GET, POST, PUT or DELETE.
+    payload: String
+        Data used to construct the HTTPS request (Optional).
+    task_id: String
+        Specifies the Celery task ID value, that will be added to logs messages.
+    max_requests: Intiger
+        Maximum number of concurrent requests.
+    max_per_host: Intiger
+        Maximum number of concurrent requests to a single device.
+
+    Return:
+    --------
+    Asynchronous generator of per device result dictionaries, in order of completion.
+    """
+
+    if method not in ('GET', 'POST', 'PUT', 'DELETE'):
+        raise ValueError(f'HTTPS request method "{method}" is not supported.')
+
+    semaphore = asyncio.Semaphore(max_requests)
+
+    async with create_client_session(max_requests, max_per_host) as session:
+
+        async def execute(device):
+            async with semaphore:
+                result = {
+                    'device': device,
+                    'status': False,
+                    'response_code': None,
+                    'execution_time': None,
+                    'queue_wait_time': None,
+                    'output': None,
+                    'error': None,
+                }
+                try:
+                    # Device credential is collected from database, outside of event loop:
+                    connection = await sync_to_async(AsyncApiCon, thread_sensitive=False)(device, task_id, session=session)
+                    result['output'] = await getattr(connection, method.lower())(url, payload)
+                except Exception as error:
+                    result['error'] = error
+                else:
+                    result['status'] = connection.status
+                    result['response_code'] = getattr(connection, 'response_code', None)
+                    result['execution_time'] = connection.execution_time
+                    result['queue_wait_time'] = connection.queue_wait_time
+                return result
+
+        # Return device output, as soon as each device finishes:
+        for future in asyncio.as_completed([execute(device) for device in devices]):
+            yield await future
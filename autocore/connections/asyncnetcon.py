@@ -0,0 +1,469 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import asyncio
+import textfsm
+import re
+
+# AsyncSSH Import:
+import asyncssh
+
+# Django Import:
+from asgiref.sync import sync_to_async
+
+# Connection Import:
+from .connection import Connection
+
+# Device name translation Import:
+from .device_name_translation import collect_device_type_commands_from_id
+from .device_name_translation import collect_device_type_value_from_id
+
+# Text FSM parser Import:
+from .output_parser import parse_command_output
+
+# Logger import:
+from logger.logger import Logger
+
+# Logger class initiation:
+logger = Logger('SSH AsyncSSH connection')
+
+# Channel read settings:
+READ_SIZE = 65536
+PROMPT_TAIL_SIZE = 256
+
+# Default maximum number of concurrent SSH sessions in one event loop:
+DEFAULT_MAX_SESSIONS = 1000
+
+
+# Main AsyncNetCon class:
+class AsyncNetCon(Connection):
+    """
+    The AsyncNetCon class uses asyncssh library, to establish a SSH connection with networks device on asyncio event loop.
+    Many sessions can run concurrently in one process, without a thread per device.
+
+    Methods:
+    --------
+    open_connection:
+        Open a new SSH connection (Coroutine).
+    close_connection:
+        Close SSH connection (Coroutine).
+    enabled_commands:
+        Executes commands that do not require privileged mode (Coroutine).
+    configuration_commands:
+        Executes commands that require privileged mode (Coroutine).
+    """
+
+    # Channel read timeout in seconds:
+    read_timeout = 30
+    # Connection timeout in seconds:
+    connection_timeout = 10
+
+    async def _log(self, level, message):
+        """ Log message from event loop, database write is executed in a thread pool, not in a single shared thread. """
+
+        await sync_to_async(getattr(logger, level), thread_sensitive=False)(message, self.task_id, self.device_name)
+
+    async def _async_log_error(self, error):
+        """ Log error from event loop. """
+
+        # Log error:
+        await self._log('error', str(error))
+        # Change connection status to False:
+        self.connection_status = False
+
+    async def _ssh_connect(self):
+        """ Connect to device using SSH protocol, and open interactive shell channel. """
+
+        # Check if device is supported before connection attempt:
+        if self.supported_device is False:
+
+            # Log unsupported device type:
+            await self._async_log_error(f'Device {self.device_hostname} is not supported')
+            return False
+
+        # Jump host channels are provided only by Paramiko transport, jump host is collected outside of event loop:
+        if await sync_to_async(lambda: self.device_jump_host, thread_sensitive=False)() is not None:
+            await self._async_log_error(
+                f'Device {self.device_hostname} is reached through jump host, that is not supported by AsyncSSH connection.')
+            return False
+
+        # Performs a specified number of SSH connection attempts to a specified device.
+        for connection_attempts in range(1, self.repeat_connection + 1):
+
+            if connection_attempts != 1:
+                await asyncio.sleep(self.repeat_connection_time)
+
+            # Log stat of a new SSH connection attempt:
+            await self._log(
+                'debug', f'SSH connection to device {self.device_hostname} has been started (Attempt: {connection_attempts}).')
+
+            try: # Try connect to device, using SSH protocol:
+                self.connection = await asyncio.wait_for(asyncssh.connect(
+                    self.device_hostname,
+                    port=self.device_ssh_port,
+                    username=self.device_username,
+                    password=self.device_password,
+                    known_hosts=None), self.connection_timeout)
+                # Open interactive shell channel:
+                self._writer, self._reader, _ = await self.connection.open_session(
+                    term_type='vt100', term_size=(511, 24))
+                # Collect device prompt and disable output paging:
+                await self._session_preparation()
+
+            # Handel SSH connection exceptions:
+            except asyncssh.PermissionDenied as error:
+                await self._async_log_error(error)
+                # Return connection starus:
+                return self.connection_status
+            except asyncio.TimeoutError:
+                await self._async_log_error(f'SSH connection to device {self.device_hostname} timed out.')
+                self._discard_connection()
+            except asyncssh.Error as error:
+                await self._async_log_error(error)
+                self._discard_connection()
+            except OSError as error:
+                await self._async_log_error(error)
+                self._discard_connection()
+
+            else:
+                # Change connection status to True.
+                self.connection_status = True
+                # Log the start of a new connection:
+                await self._log(
+                    'info', f'SSH connection to device {self.device_hostname} has been established (Attempt: {connection_attempts}).')
+                # Return connection:
+                return self.connection
+
+        # Return connection starus:
+        return self.connection_status
+
+    def _discard_connection(self):
+        """ Close partially opened SSH connection before next connection attempt. """
+
+        if getattr(self, 'connection', None) is not None:
+            self.connection.close()
+            self.connection = None
+
+    async def _session_preparation(self):
+        """ Collect device prompt and disable output paging. """
+
+        # Find device prompt:
+        self._writer.write('\n')
+        output = await self._read_until(re.compile(r'[>#]\s*$'))
+        self.prompt = output.strip().splitlines()[-1].strip()
+        self.base_prompt = self.prompt[:-1]
+        # Any prompt of the device (exec or configuration mode):
+        self._prompt_pattern = re.compile(re.escape(self.base_prompt) + r'[^\n]*[>#]\s*$')
+        # Exec prompt of the device:
+        self._exec_prompt_pattern = re.compile(re.escape(self.base_prompt) + r'[>#]\s*$')
+
+        # Disable output paging:
+        paging_command = collect_device_type_value_from_id(self.device_type, 'paging_command')
+        if paging_command:
+            self._writer.write(f'{paging_command}\n')
+            await self._read_until(self._prompt_pattern)
+
+    async def _read_until(self, pattern, timeout: int = None):
+        """ Read from shell channel until provided pattern is found at the end of received data. """
+
+        buffer = []
+        tail = ''
+
+        async def read():
+            nonlocal tail
+            while True:
+                data = await self._reader.read(READ_SIZE)
+                if not data:
+                    raise ConnectionResetError('SSH channel was closed by the device.')
+                buffer.append(data)
+                tail = (tail + data)[-PROMPT_TAIL_SIZE:]
+                if pattern.search(tail):
+                    return ''.join(buffer)
+
+        return await asyncio.wait_for(read(), timeout or self.read_timeout)
+
+    def _clean_output(self, output):
+        """ Remove command echo and trailing prompt from command output. """
+
+        lines = output.replace('\r', '').split('\n')
+        return '\n'.join(lines[1:-1])
+
+    async def _enabled_command_execution(self, command: str, expect_string: str = False) -> dict:
+        """ Enabled CLI command execution. """
+
+        # Log start of command execution:
+        await self._log('debug', f'Sending of a new enabled CLI command "{command}" has been started.')
+
+        return_data = {
+            'command': command,
+            'expect_string': expect_string,
+            'command_output': None,
+            'proccessed_output': None,
+            'error': None
+        }
+
+        try:
+            self._writer.write(f'{command}\n')
+            if expect_string is False:
+                command_output = await self._read_until(self._prompt_pattern)
+            else:
+                command_output = await self._read_until(re.compile(expect_string))
+
+        except asyncio.TimeoutError:
+            error = f'Command "{command}" output was not received in {self.read_timeout} seconds.'
+            await self._async_log_error(error)
+            # Add error to return data:
+            return_data['command_output'] = False
+            return_data['error'] = error
+            return return_data
+        except OSError as error:
+            await self._async_log_error(error)
+            # Add error to return data:
+            return_data['command_output'] = False
+            return_data['error'] = error
+            return return_data
+
+        else:
+            # Log end of command execution:
+            await self._log('info', f'The enabled CLI command "{command}" has been sent.')
+
+            command_output = self._clean_output(command_output)
+            # Check if received output is valid:
+            if 'Invalid input detected' in command_output:
+                return_data['command_output'] = False
+                return_data['error'] = 'Provided command is not valid'
+            else:
+                # Add command output to return dictionary:
+                return_data['command_output'] = command_output
+                # Proccess outpud data to dictionary:
+                return_data['proccessed_output'] = await self._process_command_output_to_dictionary(command, command_output)
+
+            # Return data:
+            return return_data
+
+    async def _process_command_output_to_dictionary(self, command, command_output):
+        """ Convert commands output to dictionary based on Text FSM templates. """
+
+        # Collect template data:
+        device_type_command = collect_device_type_commands_from_id(self.device_type)
+
+        try: # Try to parse collected data from Text FSM, in a thread, so other devices of event loop are not blocked:
+            fsm_result = await asyncio.get_running_loop().run_in_executor(
+                None, parse_command_output, device_type_command, command, command_output)
+        except FileNotFoundError as error:
+            await self._async_log_error(error)
+        except textfsm.TextFSMError as error:
+            await self._async_log_error(error)
+        else:
+            # Log that there is no template for provided command:
+            if fsm_result is None:
+                await self._log('warning', f'There is no Text FSM template for "{command}" command.')
+            return fsm_result
+
+    def _update_device_type(self):
+        """ Obtain network device type using thread based NetCon autodetect process. """
+
+        from .netcon import NetCon
+
+        connection = NetCon(self.device, self.task_id, self.repeat_connection, self.repeat_connection_time)
+        connection.update_device_type()
+        connection.close_connection()
+        return connection.device_type
+
+    async def open_connection(self):
+        """ Open a new SSH connection """
+
+        # Check if device need autodetect process:
+        if self.supported_device is None:
+            # Update device type based on information collected via SSH protocol:
+            self.device_type = await sync_to_async(self._update_device_type, thread_sensitive=False)()
+            self.supported_device = bool(collect_device_type_commands_from_id(self.device_type))
+            # Connect to network device:
+            await self._ssh_connect()
+        # Check connection status:
+        elif self.connection_status is not True:
+            await self._ssh_connect()
+
+        # Start connection timer if connected successfully:
+        if self.connection_status:
+            # Start session timer:
+            self.connection_timer = self._start_connection_timer()
+
+    async def close_connection(self):
+        """ End of SSH connection """
+
+        # Check connection status:
+        if self.connection_status:
+            # Close SSH connection:
+            self.connection.close()
+            await self.connection.wait_closed()
+            # Log close of SSH connection:
+            await self._log('info', 'SSH session ended.')
+            # End session timer:
+            await sync_to_async(self._end_connection_timer, thread_sensitive=False)(logger)
+
+    async def enabled_commands(self, commands: str or list, expect_string: str = False) -> dict:
+        """
+        Retrieves a string or list containing network CLI commands, and sends them to a network device using SSH protocol.
+        ! Usable only with enable levels commend/s.
+
+        Parameters:
+        -----------------
+        commands: String or List
+            CLI command/s that will be executed on device.
+        expect_string: String
+            Pattern that will end command execution (Optional).
+
+        Return:
+        --------
+        Dictionary containing command/s output.
+        """
+
+        # Check if provided command variable is valid string or list:
+        if not isinstance(commands, (str, list, tuple)):
+            raise TypeError('The provided command/s variable must be a string or list.')
+
+        # Check if provided expect string variable is valid string:
+        if not (isinstance(expect_string, str) or expect_string is False):
+            raise TypeError('The provided expect string variable must be a string.')
+
+        # Check connection status:
+        if self.connection_status:
+
+            # Start clock count:
+            start_time = self._start_execution_timer()
+
+            # Collect data from device:
+            return_data = {}
+
+            # First option: comand is string:
+            if isinstance(commands, str):
+                return_data[commands] = await self._enabled_command_execution(commands, expect_string)
+
+            else:
+                for command in commands:
+
+                    # Second option: comand is list / tuple of strings:
+                    if isinstance(command, str):
+                        return_data[command] = await self._enabled_command_execution(command)
+
+                    # Third option: comand is list / tuple of lists or tuples (keyed the same as in NetCon):
+                    elif isinstance(command, (list, tuple)):
+                        return_data[command] = await self._enabled_command_execution(command[0], command[1])
+                    else:
+                        raise TypeError('Wrong data type.')
+
+            # Finish clock count & method execution time:
+            await sync_to_async(self._end_execution_timer, thread_sensitive=False)(start_time, logger, commands)
+            # Return data:
+            return return_data
+
+        else:
+            # Inform that the command cannot be sent:
+            await self._async_log_error('Command/s could not be executed because SSH connection was interrupted.')
+
+    async def configuration_commands(self, commands: str or list) -> str:
+        """
+        Retrieves a string or list containing network CLI commands, and sends them to a network device using SSH protocol.
+        ! Usable only with configuration terminal levels commends.
+
+        Parameters:
+        -----------------
+        commands: String or List
+            CLI command/s that will be executed on device.
+
+        Return:
+        --------
+        String containing command/s output.
+        """
+
+        # Check if provided command variable is valid string or list:
+        if isinstance(commands, str):
+            commands = [commands]
+        elif not isinstance(commands, list):
+            raise TypeError('The provided command/s variable must be a string or list.')
+
+        # Check connection status:
+        if self.connection_status:
+
+            # Start clock count:
+            start_time = self._start_execution_timer()
+
+            # Log start of command execution:
+            await self._log('debug', f'Sending of a new configuration CLI command "{commands}" has been started.')
+
+            try:
+                # Send all configuration commands and wait for exec prompt:
+                config_set = ['configure terminal'] + commands + ['end']
+                self._writer.write(''.join(f'{command}\n' for command in config_set))
+                return_data = await self._read_until(self._exec_prompt_pattern)
+            except asyncio.TimeoutError:
+                await self._async_log_error(f'Configuration commands were not confirmed in {self.read_timeout} seconds.')
+                return self.connection_status
+            except OSError as error:
+                await self._async_log_error(error)
+                return self.connection_status
+
+            # Log end of command execution:
+            await self._log('info', f'The configuration CLI command "{commands}" has been sent.')
+            # Finish clock count & method execution time:
+            await sync_to_async(self._end_execution_timer, thread_sensitive=False)(start_time, logger, commands)
+            # Return command output:
+            return return_data.replace('\r', '')
+
+        else:
+            # Inform that the command cannot be sent:
+            await self._async_log_error('Command/s could not be executed because SSH connection was interrupted.')
+
+
+async def fleet_enabled_commands(devices: list, commands: str or list, task_id: str = None, max_sessions: int = DEFAULT_MAX_SESSIONS):
+    """
+    Execute enabled commands on many devices concurrently, using one event loop.
+
+    Parameters:
+    -----------------
+    devices: List
+        List of Device objects.
+    commands: String or List
+        CLI command/s that will be executed on every device.
+    task_id: String
+        Specifies the Celery task ID value, that will be added to logs messages.
+    max_sessions: Intiger
+        Maximum number of concurrent SSH sessions.
+
+    Return:
+    --------
+    Asynchronous generator of per device result dictionaries, in order of completion.
+    """
+
+    semaphore = asyncio.Semaphore(max_sessions)
+
+    async def execute(device):
+        async with semaphore:
+            result = {
+                'device': device,
+                'connection_status': False,
+                'execution_time': None,
+                'output': None,
+                'error': None,
+            }
+            try:
+                # Device credential is collected from database, outside of event loop:
+                connection = await sync_to_async(AsyncNetCon, thread_sensitive=False)(device, task_id)
+                try:
+                    await connection.open_connection()
+                    result['output'] = await connection.enabled_commands(commands)
+                finally:
+                    await connection.close_connection()
+            except Exception as error:
+                result['error'] = error
+            else:
+                result['connection_status'] = connection.connection_status
+                result['execution_time'] = connection.execution_time
+            return result
+
+    # Return device output, as soon as each device finishes:
+    for future in asyncio.as_completed([execute(device) for device in devices]):
+        yield await future
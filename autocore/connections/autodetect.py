@@ -0,0 +1,46 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import hashlib
+
+# Django Import:
+from django.core.cache import cache
+
+# Autodetect settings:
+FINGERPRINT_TTL = 60 * 60 * 24 * 30
+
+
+def _fingerprint_key(hostname, banner):
+    """ Create cache key from device hostname and SSH server identification string hash. """
+
+    banner_hash = hashlib.sha256(banner.encode()).hexdigest()
+    return f'autodetect:{hostname}:{banner_hash}'
+
+
+def collect_cached_device_type_id(hostname: str, banner: str) -> int:
+    """ Return device type ID, stored for device hostname and SSH server identification string. """
+
+    if banner is None:
+        return None
+    return cache.get(_fingerprint_key(hostname, banner))
+
+
+def cache_device_type_id(hostname: str, banner: str, device_type_id: int) -> None:
+    """ Store device type ID for device hostname and SSH server identification string. """
+
+    if banner is not None and device_type_id:
+        cache.set(_fingerprint_key(hostname, banner), device_type_id, FINGERPRINT_TTL)
+
+
+def collect_ssh_banner(connection) -> str:
+    """
+    Return SSH server identification string (e.g. SSH-2.0-Cisco-1.25) of connected Netmiko session.
+    String is received during SSH handshake, so no additional connection to device is required.
+    """
+
+    try:
+        return connection.remote_conn_pre.get_transport().remote_version
+    except AttributeError:
+        return None
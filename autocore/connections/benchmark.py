@@ -0,0 +1,187 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Benchmark of SSH connection backends against a local simulated network device.
+# Usage: python -m autocore.connections.benchmark --sessions 500 --mode all
+# The simulated device (asyncssh server) runs in a separate process and every
+# client backend runs in its own process, so peak memory is measured per backend.
+# Modes: threads (Netmiko/Paramiko), openssh (OpenSSH ControlMaster) and async (asyncssh).
+# Peak memory of openssh mode does not include OpenSSH client processes.
+
+# Python Import:
+import multiprocessing
+import threading
+import argparse
+import resource
+import asyncio
+import time
+import os
+
+# Simulated device settings:
+DEVICE_PROMPT = 'bench#'
+DEVICE_COMMAND = 'show interfaces'
+DEVICE_OUTPUT_LINES = 200
+
+
+def _simulated_device(port, latency, ready):
+    """ Run asyncssh server that emulates Cisco IOS exec shell. """
+
+    import asyncssh
+
+    output = '\n'.join(
+        f'GigabitEthernet0/{line} is up, line protocol is up' for line in range(DEVICE_OUTPUT_LINES))
+
+    class Server(asyncssh.SSHServer):
+        def begin_auth(self, username):
+            return True
+
+        def password_auth_supported(self):
+            return True
+
+        def validate_password(self, username, password):
+            return True
+
+    async def shell(process):
+        # Exec channel (e.g. OpenSSH client command) returns single command output:
+        if process.command is not None:
+            await asyncio.sleep(latency)
+            process.stdout.write(f'{output}\n' if process.command.strip() == DEVICE_COMMAND else '')
+            process.exit(0)
+            return
+
+        process.stdout.write(f'\n{DEVICE_PROMPT}')
+        try:
+            async for line in process.stdin:
+                line = line.strip()
+                await asyncio.sleep(latency)
+                if line == DEVICE_COMMAND:
+                    process.stdout.write(f'\n{output}\n{DEVICE_PROMPT}')
+                else:
+                    process.stdout.write(f'\n{DEVICE_PROMPT}')
+        except asyncssh.BreakReceived:
+            pass
+        process.exit(0)
+
+    async def start():
+        await asyncssh.create_server(
+            Server, '127.0.0.1', port,
+            server_host_keys=[asyncssh.generate_private_key('ssh-rsa')],
+            process_factory=shell, line_editor=True)
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(start())
+
+
+def _devices(port, sessions):
+    """
+    Create unsaved Device objects pointing to simulated device.
+    Unsaved devices have no groups, so connection classes do not query jump hosts for them.
+    """
+
+    from inventory.models.device import Device
+
+    return [
+        Device(name=f'bench-{number}', hostname='127.0.0.1', ssh_port=port, device_type=1)
+        for number in range(sessions)]
+
+
+def _run_threads(port, sessions):
+    """ Run netmiko thread based fleet execution. """
+
+    from autocore.connections.fleet import FleetExecutor
+
+    fleet = FleetExecutor(_devices(port, sessions), max_sessions=sessions)
+    return sum(1 for result in fleet.enabled_commands(DEVICE_COMMAND) if result['connection_status'])
+
+
+def _run_openssh(port, sessions):
+    """ Run OpenSSH ControlMaster based fleet execution. """
+
+    from autocore.connections.fleet import FleetExecutor
+    from autocore.connections.opensshcon import OpenSSHCon
+
+    fleet = FleetExecutor(_devices(port, sessions), max_sessions=sessions, connection_class=OpenSSHCon)
+    return sum(1 for result in fleet.enabled_commands(DEVICE_COMMAND) if result['connection_status'])
+
+
+def _run_async(port, sessions):
+    """ Run asyncssh event loop based fleet execution. """
+
+    from autocore.connections.asyncnetcon import fleet_enabled_commands
+
+    async def run():
+        successful = 0
+        async for result in fleet_enabled_commands(_devices(port, sessions), DEVICE_COMMAND, max_sessions=sessions):
+            successful += bool(result['connection_status'])
+        return successful
+
+    return asyncio.run(run())
+
+
+def _client(mode, port, sessions, results):
+    """ Run one benchmark mode and report time, thread and memory usage. """
+
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'automation.settings')
+    django.setup()
+
+    # Sample peak number of threads during execution:
+    peak_threads = threading.active_count()
+    running = True
+
+    def sample():
+        nonlocal peak_threads
+        while running:
+            peak_threads = max(peak_threads, threading.active_count())
+            time.sleep(0.05)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    start_time = time.perf_counter()
+    runners = {'threads': _run_threads, 'openssh': _run_openssh, 'async': _run_async}
+    successful = runners[mode](port, sessions)
+    execution_time = time.perf_counter() - start_time
+    running = False
+
+    results.put({
+        'mode': mode,
+        'sessions': sessions,
+        'successful': successful,
+        'execution_time': round(execution_time, 3),
+        'peak_threads': peak_threads - 1,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark of SSH connection backends.')
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--port', type=int, default=8022)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--mode', choices=['threads', 'openssh', 'async', 'all'], default='all')
+    arguments = parser.parse_args()
+
+    # Start simulated device:
+    ready = multiprocessing.Event()
+    device = multiprocessing.Process(
+        target=_simulated_device, args=(arguments.port, arguments.latency, ready), daemon=True)
+    device.start()
+    ready.wait()
+
+    modes = ['threads', 'openssh', 'async'] if arguments.mode == 'all' else [arguments.mode]
+    results = multiprocessing.Queue()
+    for mode in modes:
+        client = multiprocessing.Process(target=_client, args=(mode, arguments.port, arguments.sessions, results))
+        client.start()
+        client.join()
+        print(results.get())
+
+    device.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import hashlib
+import re
+
+# Django Import:
+from django.db.models import F
+from django.db.models import Sum
+from django.utils import timezone
+
+# Model Import:
+from inventory.models.device import DeviceRawData
+
+
+# Output lines, that change on every collection (uptime, clock), per command pattern:
+VOLATILE_LINES = (
+    # Any command (IOS XR prints device clock before every command output):
+    (r'', (
+        r'^(Mon|Tue|Wed|Thu|Fri|Sat|Sun) \w{3} +\d+ \d+:\d+:\d+(\.\d+)? \S+$',)),
+    # Show version:
+    (r'^sh(ow?)?\s+ver', (
+        r' uptime is ',
+        r'^Kernel uptime is ',
+        r'^Uptime for this control processor is ',
+        r'^System returned to ROM by ',
+        r'^System restarted at ',
+        r' up \d+ (years?|weeks?|days?|hours?|mins?|secs?)\b',)),
+    # Show running-config:
+    (r'^sh(ow?)?\s+run', (
+        r'^!+ ?Last configuration change at ',
+        r'^! NVRAM config last updated at ',
+        r'^!Time: ',
+        r'^ntp clock-period ',)),
+)
+
+# Compiled command and volatile line patterns:
+_VOLATILE_LINES = tuple(
+    (re.compile(command_pattern), re.compile('|'.join(line_patterns)))
+    for command_pattern, line_patterns in VOLATILE_LINES)
+
+
+def normalize_output(command: str, command_output: str) -> str:
+    """
+    Remove volatile lines, that change on every collection (uptime, clock),
+    from command output, so they do not mark the output as changed.
+
+    Parameters:
+    -----------------
+    command: String
+        CLI command, used to select volatile line patterns.
+    command_output: String
+        Command output.
+
+    Return:
+    --------
+    Command output without volatile lines.
+    """
+
+    # Collect volatile line patterns of command:
+    patterns = [line_pattern for command_pattern, line_pattern in _VOLATILE_LINES
+                if command_pattern.search(command.strip())]
+
+    # Remove volatile lines:
+    return '\n'.join(
+        line for line in command_output.splitlines()
+        if not any(pattern.search(line) for pattern in patterns))
+
+
+def output_hash(command: str, command_output: str) -> str:
+    """ Return SHA-256 hash of command output, without volatile lines. """
+
+    return hashlib.sha256(normalize_output(command, command_output).encode()).hexdigest()
+
+
+def collect_changed_outputs(connection, commands: str or list, process: bool = True) -> dict:
+    """
+    Execute enabled commands and store raw outputs, that changed since the last collection.
+    Outputs with the same hash as stored in DeviceRawData are not parsed and not saved,
+    only their "last seen" timestamp and seen counter are updated.
+
+    Parameters:
+    -----------------
+    connection: NetCon
+        Open connection to network device.
+    commands: String or List
+        CLI command/s that will be executed.
+    process: Boolean
+        If True, changed outputs are processed to dictionaries.
+
+    Return:
+    --------
+    Dictionary of command and command data, with additional "changed" key.
+    Outputs are stored by command string, also when command was provided with expect string.
+    """
+
+    device = connection.device
+    now = timezone.now()
+
+    # Execute commands without output processing:
+    return_data = connection.enabled_commands(commands, parse=False)
+    if not return_data:
+        return return_data
+
+    # Collect stored hashes of all commands at once (commands with expect string are stored by command string):
+    command_names = [command_data['command'] for command_data in return_data.values()]
+    stored_hashes = dict(DeviceRawData.objects.filter(
+        device=device, command_name__in=command_names).values_list('command_name', 'command_hash'))
+
+    unchanged_commands = []
+    for command_data in return_data.values():
+        command_data['changed'] = None
+        command = command_data['command']
+        command_output = command_data['command_output']
+        if not command_output:
+            continue
+
+        # Skip processing and saving of unchanged outputs:
+        command_hash = output_hash(command, command_output)
+        if stored_hashes.get(command) == command_hash:
+            unchanged_commands.append(command)
+            command_data['changed'] = False
+            continue
+
+        # Save changed output:
+        raw_data, created = DeviceRawData.objects.get_or_create(device=device, command_name=command)
+        raw_data.command_data = command_output
+        raw_data.command_hash = command_hash
+        raw_data.last_seen = now
+        raw_data.seen_count = F('seen_count') + 1
+        raw_data.change_count = F('change_count') + 1
+        raw_data.save()
+        command_data['changed'] = True
+
+        # Proccess changed output data to dictionary:
+        if process:
+            command_data['proccessed_output'] = connection._process_command_output_to_dictionary(
+                command, command_output)
+
+    # Update last seen time of all unchanged outputs at once:
+    if unchanged_commands:
+        DeviceRawData.objects.filter(device=device, command_name__in=unchanged_commands).update(
+            last_seen=now, seen_count=F('seen_count') + 1)
+
+    # Return data:
+    return return_data
+
+
+def collect_change_ratio(command_name: str = None) -> dict:
+    """
+    Return ratio of changed outputs to all collected outputs, per command.
+    Commands with low change ratio can be polled less frequently.
+
+    Parameters:
+    -----------------
+    command_name: String
+        Return change ratio of a single command only (Optional).
+
+    Return:
+    --------
+    Dictionary of command name and change ratio.
+    """
+
+    raw_data = DeviceRawData.objects.all()
+    if command_name is not None:
+        raw_data = raw_data.filter(command_name=command_name)
+
+    counters = raw_data.values('command_name').annotate(
+        seen=Sum('seen_count'), changed=Sum('change_count'))
+    return {
+        counter['command_name']: counter['changed'] / counter['seen'] if counter['seen'] else None
+        for counter in counters}
@@ -0,0 +1,76 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+
+# Main CommandResult class:
+class CommandResult(dict):
+    """
+    Command execution result dictionary, with lazily processed output.
+    Raw command output is stored as it is, Text FSM parsing runs only when
+    "proccessed_output" is read for the first time, and the result is memoized.
+
+    Methods:
+    --------
+    parsed_output:
+        Return processed command output, parsing it if required.
+    is_parsed:
+        Check if command output was already processed.
+    """
+
+    def __init__(self, *args, parser=None, **kwargs) -> None:
+        """
+        Parameters:
+        -----------------
+        parser: Callable
+            Function without arguments, that returns processed command output (Optional).
+        """
+
+        super().__init__(*args, **kwargs)
+        # Parser of command output, removed after first use:
+        self._parser = parser
+
+    def __getitem__(self, key):
+        """ Return dictionary value, processed output is parsed on first read. """
+
+        if key == 'proccessed_output' and self._parser is not None:
+            self._parse()
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        """ Return dictionary value or default, processed output is parsed on first read. """
+
+        if key == 'proccessed_output' and self._parser is not None:
+            self._parse()
+        return super().get(key, default)
+
+    def items(self):
+        """ Return dictionary items, processed output is parsed first. """
+
+        if self._parser is not None:
+            self._parse()
+        return super().items()
+
+    def values(self):
+        """ Return dictionary values, processed output is parsed first. """
+
+        if self._parser is not None:
+            self._parse()
+        return super().values()
+
+    def parsed_output(self):
+        """ Return processed command output, parsing it if required. """
+
+        return self['proccessed_output']
+
+    def is_parsed(self) -> bool:
+        """ Check if command output was already processed. """
+
+        return self._parser is None
+
+    def _parse(self):
+        """ Run parser and memoize processed output. """
+
+        parser = self._parser
+        self._parser = None
+        super().__setitem__('proccessed_output', parser())
@@ -0,0 +1,328 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import hashlib
+import bisect
+import threading
+
+# Django Import:
+from django.core.cache import cache
+
+# Histogram bucket upper bounds (in seconds):
+BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1200)
+
+# Learned read timeout settings:
+MIN_SAMPLES = 5
+WINDOW = 200
+PERCENTILE = 0.99
+SAFETY_FACTOR = 1.5
+MIN_READ_TIMEOUT = 5
+MAX_READ_TIMEOUT = 1800
+TIMING_TTL = 60 * 60 * 24 * 30
+
+# Cache key and maximum size of learned commands list:
+INDEX_KEY = 'command_timing_index'
+MAX_INDEX_SIZE = 1000
+
+
+# Main CommandTiming class:
+class CommandTiming:
+    """
+    Rolling histogram of command execution times, per device type and command.
+    Histograms are stored in Django cache, so they are shared by all workers using the same cache.
+    Read timeout of each command is derived from high percentile of its execution times.
+
+    Methods:
+    --------
+    record:
+        Add command execution time to histogram.
+    record_timeout:
+        Add command read timeout to histogram, so the next read timeout is longer.
+    read_timeout:
+        Return learned read timeout, or None if there are not enough samples.
+    batch:
+        Return local copy of command histograms, written back to cache at once.
+    stats:
+        Return histogram and learned read timeout of command.
+    collect:
+        Return stats of all learned commands.
+    reset:
+        Remove learned histograms.
+    """
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class CommandTiming ({len(cache.get(INDEX_KEY) or [])} commands)>'
+
+    def _key(self, device_type: int, command: str) -> str:
+        """ Create cache key from device type and command hash. """
+
+        command_hash = hashlib.sha256(command.encode()).hexdigest()
+        return f'command_timing:{device_type}:{command_hash}'
+
+    def _histogram(self, device_type: int, command: str) -> dict:
+        """ Return stored histogram, or empty histogram. """
+
+        return cache.get(self._key(device_type, command)) or self._empty_histogram()
+
+    def _empty_histogram(self) -> dict:
+        """ Return empty histogram. """
+
+        return {
+            'counts': [0] * (len(BUCKETS) + 1),
+            'samples': 0,
+            'max': 0,
+        }
+
+    def _add_sample(self, histogram: dict, execution_time: float) -> None:
+        """ Add execution time to histogram, above window size all counts are halved, so older samples fade out. """
+
+        histogram['counts'][bisect.bisect_left(BUCKETS, execution_time)] += 1
+        histogram['samples'] += 1
+        histogram['max'] = max(histogram['max'], execution_time)
+
+        # Decay older samples:
+        if histogram['samples'] > WINDOW:
+            histogram['counts'] = [count // 2 for count in histogram['counts']]
+            histogram['samples'] = sum(histogram['counts'])
+
+    def _index_commands(self, items: list) -> None:
+        """
+        Add new commands to learned commands list, the oldest commands are dropped above maximum size.
+        The list is used only by collect and reset methods, so a lost concurrent update does not change timeouts.
+        """
+
+        index = cache.get(INDEX_KEY) or []
+        new_items = [list(item) for item in items if list(item) not in index]
+        if new_items:
+            index = (index + new_items)[-MAX_INDEX_SIZE:]
+            cache.set(INDEX_KEY, index, TIMING_TTL)
+
+    def _percentile_timeout(self, histogram: dict) -> float:
+        """ Return read timeout derived from histogram, or None if there are not enough samples. """
+
+        if histogram['samples'] < MIN_SAMPLES:
+            return None
+
+        # Find bucket, that contains percentile of execution times:
+        threshold = histogram['samples'] * PERCENTILE
+        total = 0
+        for index, count in enumerate(histogram['counts']):
+            total += count
+            if total >= threshold:
+                break
+        upper_bound = BUCKETS[index] if index < len(BUCKETS) else histogram['max']
+
+        return min(MAX_READ_TIMEOUT, max(MIN_READ_TIMEOUT, upper_bound * SAFETY_FACTOR))
+
+    def record(self, device_type: int, command: str, execution_time: float) -> None:
+        """
+        Add command execution time to histogram.
+        Above window size all counts are halved, so older samples fade out.
+
+        Parameters:
+        -----------------
+        device_type: Intiger
+            Device type ID.
+        command: String
+            CLI command.
+        execution_time: Float
+            Command execution time in seconds.
+        """
+
+        histogram = self._histogram(device_type, command)
+        self._add_sample(histogram, execution_time)
+
+        # Add new command to learned commands list:
+        if histogram['samples'] == 1:
+            self._index_commands([(device_type, command)])
+
+        cache.set(self._key(device_type, command), histogram, TIMING_TTL)
+
+    def record_timeout(self, device_type: int, command: str, read_timeout: float) -> None:
+        """ Add command read timeout to histogram, so the next read timeout is longer. """
+
+        self.record(device_type, command, read_timeout * 2)
+
+    def read_timeout(self, device_type: int, command: str) -> float:
+        """
+        Return learned read timeout, or None if there are not enough samples.
+
+        Parameters:
+        -----------------
+        device_type: Intiger
+            Device type ID.
+        command: String
+            CLI command.
+        """
+
+        return self._percentile_timeout(self._histogram(device_type, command))
+
+    def batch(self, device_type: int, commands: list) -> 'CommandTimingBatch':
+        """
+        Return local copy of command histograms, loaded from cache in one round trip.
+        New samples are written back to cache at once by its flush method.
+
+        Parameters:
+        -----------------
+        device_type: Intiger
+            Device type ID.
+        commands: List
+            CLI commands, that will be executed.
+        """
+
+        return CommandTimingBatch(self, device_type, commands)
+
+    def stats(self, device_type: int, command: str) -> dict:
+        """ Return histogram and learned read timeout of command. """
+
+        histogram = self._histogram(device_type, command)
+        return {
+            'device_type': device_type,
+            'command': command,
+            'buckets': dict(zip([*BUCKETS, 'inf'], histogram['counts'])),
+            'samples': histogram['samples'],
+            'max': histogram['max'],
+            'read_timeout': self.read_timeout(device_type, command),
+        }
+
+    def collect(self, device_type: int = None) -> list:
+        """ Return stats of all learned commands, or only commands of provided device type. """
+
+        return [
+            self.stats(index_device_type, command)
+            for index_device_type, command in cache.get(INDEX_KEY) or []
+            if device_type is None or index_device_type == device_type]
+
+    def reset(self, device_type: int = None, command: str = None) -> None:
+        """
+        Remove learned histograms.
+        Without parameters all histograms are removed.
+
+        Parameters:
+        -----------------
+        device_type: Intiger
+            Remove histograms of provided device type only (Optional).
+        command: String
+            Remove histogram of provided command only (Optional).
+        """
+
+        index = cache.get(INDEX_KEY) or []
+        removed = [
+            [index_device_type, index_command] for index_device_type, index_command in index
+            if (device_type is None or index_device_type == device_type)
+            and (command is None or index_command == command)]
+
+        cache.delete_many([self._key(*item) for item in removed])
+        cache.set(INDEX_KEY, [item for item in index if item not in removed], TIMING_TTL)
+
+
+# Local command timing batch class:
+class CommandTimingBatch:
+    """
+    Local copy of command histograms of one device type, used during execution of multiple commands.
+    Histograms are loaded from cache in one round trip, and only changed histograms are written back by flush.
+    Samples recorded concurrently by other workers between load and flush are overwritten,
+    the same as by concurrent record calls.
+
+    Methods:
+    --------
+    record:
+        Add command execution time to local histogram.
+    record_timeout:
+        Add command read timeout to local histogram, so the next read timeout is longer.
+    read_timeout:
+        Return learned read timeout, or None if there are not enough samples.
+    flush:
+        Write changed histograms back to cache.
+    """
+
+    def __init__(self, timing: CommandTiming, device_type: int, commands: list) -> None:
+        """
+        Local copy of command histograms.
+
+        Parameters:
+        -----------------
+        timing: CommandTiming
+            Command timing, that stores histograms.
+        device_type: Intiger
+            Device type ID.
+        commands: List
+            CLI commands, that will be executed.
+        """
+
+        self.timing = timing
+        self.device_type = device_type
+        self._lock = threading.Lock()
+        self._changed = set()
+
+        # Load histograms of all commands at once:
+        keys = {timing._key(device_type, command): command for command in set(commands)}
+        stored = cache.get_many(list(keys))
+        self._histograms = {
+            command: stored.get(key) or timing._empty_histogram() for key, command in keys.items()}
+        # Commands without stored histogram are added to learned commands list by flush:
+        self._new = {command for command, histogram in self._histograms.items() if not histogram['samples']}
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class CommandTimingBatch ({len(self._histograms)} commands, {len(self._changed)} changed)>'
+
+    def _histogram(self, command: str) -> dict:
+        """ Return local histogram, commands outside of batch are loaded from cache. """
+
+        with self._lock:
+            histogram = self._histograms.get(command)
+        if histogram is None:
+            histogram = self.timing._histogram(self.device_type, command)
+            with self._lock:
+                if command not in self._histograms and not histogram['samples']:
+                    self._new.add(command)
+                histogram = self._histograms.setdefault(command, histogram)
+        return histogram
+
+    def record(self, device_type: int, command: str, execution_time: float) -> None:
+        """ Add command execution time to local histogram. """
+
+        histogram = self._histogram(command)
+        with self._lock:
+            self.timing._add_sample(histogram, execution_time)
+            self._changed.add(command)
+
+    def record_timeout(self, device_type: int, command: str, read_timeout: float) -> None:
+        """ Add command read timeout to local histogram, so the next read timeout is longer. """
+
+        self.record(device_type, command, read_timeout * 2)
+
+    def read_timeout(self, device_type: int, command: str) -> float:
+        """ Return learned read timeout, or None if there are not enough samples. """
+
+        histogram = self._histogram(command)
+        with self._lock:
+            return self.timing._percentile_timeout(histogram)
+
+    def flush(self) -> None:
+        """ Write changed histograms back to cache, in one round trip. """
+
+        with self._lock:
+            changed = {command: self._histograms[command] for command in self._changed}
+            self._changed.clear()
+        if not changed:
+            return
+
+        cache.set_many({
+            self.timing._key(self.device_type, command): histogram
+            for command, histogram in changed.items()}, TIMING_TTL)
+
+        # Add new commands to learned commands list:
+        new_commands = [(self.device_type, command) for command in changed if command in self._new]
+        if new_commands:
+            self.timing._index_commands(new_commands)
+            with self._lock:
+                self._new.difference_update(command for _, command in new_commands)
+
+
+# Process-wide command timing:
+command_timing = CommandTiming()
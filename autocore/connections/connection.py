@@ -30,6 +30,8 @@ class Connection:
         Xxx.
     device_password:
         Xxx.
+    device_jump_host:
+        JumpHost object, used to reach device (Optional).
     device_type:
         Xxx.
     connection_status:
@@ -131,6 +133,26 @@ class Connection:
         else:
             self.supported_device = True
 
+    @property
+    def device_jump_host(self):
+        """ Jump host of device, collected from database on first use (only SSH connections use it). """
+
+        if not hasattr(self, '_device_jump_host'):
+            self._device_jump_host = self._collect_jump_host(self.device)
+        return self._device_jump_host
+
+    def _collect_jump_host(self, device):
+        """ Return jump host of device credential, or of the first device group with jump host. """
+
+        if device.credential is not None and device.credential.jump_host_id is not None:
+            return device.credential.jump_host
+        # Unsaved device does not belong to any group:
+        if device.pk is None:
+            return None
+        group = device.group_set.filter(jump_host__isnull=False).select_related(
+            'jump_host__credential').first()
+        return group.jump_host if group is not None else None
+
     def __repr__(self) -> str:
         """ Class representation. """
         return f'<Class connection ({self.device_name}/{self.device_hostname})>'
@@ -0,0 +1,200 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import random
+import uuid
+import time
+
+# Django Import:
+from django.core.cache import cache
+
+# Connection failure types:
+AUTHENTICATION = 'authentication'
+TIMEOUT = 'timeout'
+REFUSED = 'refused'
+ERROR = 'error'
+
+# Number of consecutive failures of each type, that opens the circuit:
+FAILURE_THRESHOLD = {
+    AUTHENTICATION: 1,
+    TIMEOUT: 3,
+    REFUSED: 1,
+    ERROR: 3,
+}
+
+# Base cool-down time (in seconds) of each failure type:
+FAILURE_COOL_DOWN = {
+    AUTHENTICATION: 900,
+    TIMEOUT: 60,
+    REFUSED: 120,
+    ERROR: 30,
+}
+
+# Failure types, that are not retried during the same connection attempt (e.g. unreachable device):
+FAIL_FAST = (AUTHENTICATION, TIMEOUT, REFUSED)
+
+# Circuit breaker settings:
+MAX_COOL_DOWN = 3600
+MAX_RETRY_DELAY = 30
+HEALTH_TTL = 60 * 60 * 24
+
+# Circuit breaker states:
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+# Main DeviceHealth class:
+class DeviceHealth:
+    """
+    Circuit breaker of a single network device.
+    Health state is stored in Django cache, so it is shared by all workers using the same cache.
+
+    Attributes:
+    -----------------
+    hostname:
+        IP address or DNS name of network device.
+    port:
+        Port of network device.
+
+    Methods:
+    --------
+    state:
+        Return current health state of device.
+    allow_request:
+        Check if connection attempt is allowed.
+    record_success:
+        Close the circuit after successful connection.
+    record_failure:
+        Count failure and open the circuit above failure threshold.
+    retry_delay:
+        Return jittered exponential backoff delay.
+    reset:
+        Remove health state of device.
+    """
+
+    def __init__(self, hostname: str, port: int) -> None:
+        """
+        Parameters:
+        -----------------
+        hostname: String
+            IP address or DNS name of network device.
+        port: Intiger
+            Port of network device.
+        """
+
+        self.hostname = hostname
+        self.port = port
+        # Cache keys declaration:
+        self._key = f'device_health:{hostname}:{port}'
+        self._probe_key = f'device_health_probe:{hostname}:{port}'
+        # Failure counters per failure type:
+        self._failure_keys = {
+            failure_type: f'device_health_failures:{hostname}:{port}:{failure_type}'
+            for failure_type in FAILURE_THRESHOLD}
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class DeviceHealth ({self.hostname}:{self.port}/{self.state()["state"]})>'
+
+    def state(self) -> dict:
+        """ Return current health state of device. """
+
+        return cache.get(self._key) or {
+            'state': CLOSED,
+            'failures': 0,
+            'failure_type': None,
+            'opened': 0,
+            'open_until': None,
+            'open_id': None,
+        }
+
+    def _open_probe_key(self, state: dict) -> str:
+        """ Return probe key of open period, each open period of the circuit allows a single probe. """
+
+        return f'{self._probe_key}:{state.get("open_id")}'
+
+    def allow_request(self) -> bool:
+        """
+        Check if connection attempt is allowed.
+        After cool-down, only one worker is allowed to probe the device (half-open state).
+        Probe key is taken with atomic cache add and it is not removed after failed probe,
+        so also worker that read state before the circuit was opened again can't probe the device.
+        """
+
+        state = self.state()
+        if state['state'] == CLOSED:
+            return True
+        if time.time() < state['open_until']:
+            return False
+
+        # Allow a single probe connection after cool-down:
+        return cache.add(self._open_probe_key(state), HALF_OPEN, MAX_RETRY_DELAY * 10)
+
+    def record_success(self) -> None:
+        """ Close the circuit after successful connection. """
+
+        cache.delete_many([self._key, self._open_probe_key(self.state()), *self._failure_keys.values()])
+
+    def record_failure(self, failure_type: str) -> bool:
+        """
+        Count failure and open the circuit above failure threshold.
+
+        Parameters:
+        -----------------
+        failure_type: String
+            One of AUTHENTICATION, TIMEOUT, REFUSED or ERROR.
+
+        Return:
+        --------
+        True if the circuit is open after this failure.
+        """
+
+        # Count consecutive failures of the same type, atomic increment is shared by all workers:
+        failure_key = self._failure_keys[failure_type]
+        cache.add(failure_key, 0, HEALTH_TTL)
+        try:
+            failures = cache.incr(failure_key)
+        except ValueError:
+            # Counter expired between add and increment:
+            cache.set(failure_key, 1, HEALTH_TTL)
+            failures = 1
+        # Failure of other type breaks the sequence of consecutive failures:
+        cache.delete_many([key for other_type, key in self._failure_keys.items() if other_type != failure_type])
+
+        state = self.state()
+        state['failures'] = failures
+        state['failure_type'] = failure_type
+
+        # Open the circuit, or open it again after failed probe:
+        if state['failures'] >= FAILURE_THRESHOLD[failure_type] or state['state'] != CLOSED:
+            state['opened'] += 1
+            cool_down = min(MAX_COOL_DOWN, FAILURE_COOL_DOWN[failure_type] * 2 ** (state['opened'] - 1))
+            state['state'] = OPEN
+            state['open_until'] = time.time() + random.uniform(cool_down / 2, cool_down)
+            # New open period has its own probe key:
+            state['open_id'] = uuid.uuid4().hex
+
+        cache.set(self._key, state, HEALTH_TTL)
+        return state['state'] == OPEN
+
+    def retry_delay(self, attempt: int, base: float) -> float:
+        """
+        Return jittered exponential backoff delay.
+
+        Parameters:
+        -----------------
+        attempt: Intiger
+            Number of already failed attempts.
+        base: Float
+            Base delay in seconds.
+        """
+
+        return random.uniform(0, min(MAX_RETRY_DELAY, base * 2 ** attempt))
+
+    def reset(self) -> None:
+        """ Remove health state of device. """
+
+        cache.delete_many([self._key, self._open_probe_key(self.state()), *self._failure_keys.values()])
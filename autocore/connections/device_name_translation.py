@@ -20,6 +20,14 @@ def collect_device_type_commands_from_id(device_type_id: int):
 
     return template.get(device_type_id, {}).get('textfsm', False)
 
+def collect_device_type_value_from_id(device_type_id: int, key: str, default=None):
+
+    return template.get(device_type_id, {}).get(key, default)
+
+def collect_device_type_textfsm_names():
+
+    return [device_type['textfsm'] for device_type in template.values() if device_type.get('textfsm')]
+
 # Device name translation functions:
 def collect_device_type_name_from_id(device_type_id: int, netmiko: bool = False, napalm: bool = False):
     
@@ -0,0 +1,348 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+
+# Django Import:
+from django.db import connection as db_connection
+from django.db.models.query import QuerySet
+
+# Connection Import:
+from .netcon import NetCon
+from .opensshcon import collect_connection_class
+
+# Columnar result table Import:
+from .result_table import ResultTable
+from .result_table import parse_command_output_table
+
+# Device name translation Import:
+from .device_name_translation import collect_device_type_commands_from_id
+
+# Model Import:
+from inventory.models.device import Device
+from inventory.models.group import Group
+
+# Logger import:
+from logger.logger import Logger
+
+# Logger class initiation:
+logger = Logger('Fleet execution')
+
+# Default maximum number of concurrent SSH sessions:
+DEFAULT_MAX_SESSIONS = 50
+
+
+# Main FleetExecutor class:
+class FleetExecutor:
+    """
+    The FleetExecutor class runs NetCon sessions against many devices at once.
+    Results are returned per device, as soon as each device finishes.
+
+    Attributes:
+    -----------------
+    devices:
+        List of Device objects.
+    task_id:
+        Celery task ID value, that will be added to logs messages.
+    max_sessions:
+        Maximum number of concurrent SSH sessions.
+
+    Methods:
+    --------
+    map:
+        Run provided function against every device.
+    enabled_commands:
+        Executes commands that do not require privileged mode on every device.
+    configuration_commands:
+        Executes commands that require privileged mode on every device.
+    command_table:
+        Executes enabled command on every device and join parsed outputs into one columnar table.
+    update_device_types:
+        Collect device type of every device and save all devices at once.
+    """
+
+    def __init__(self, devices, task_id: str = None, max_sessions: int = DEFAULT_MAX_SESSIONS, repeat_connection: int = 3, repeat_connection_time: int = 2, connection_class: type = NetCon, pooled: bool = False) -> None:
+        """
+        Parameters:
+        -----------------
+        devices: QuerySet, Group or List
+            Devices, that commands will be executed on.
+        task_id: String
+            Specifies the Celery task ID value, that will be added to logs messages.
+        max_sessions: Intiger
+            Maximum number of concurrent SSH sessions.
+        repeat_connection: Intiger
+            Specifies how many times the network connection will be retried.
+        repeat_connection_time: Intiger
+            Specifies how long to wait between connection attempts.
+        connection_class: Class
+            Connection class used to connect with devices.
+        pooled: Boolean
+            If True, SSH sessions are collected from and returned to worker session pool.
+        """
+
+        # Collect device objects from provided devices variable:
+        self.devices = self._collect_devices(devices)
+
+        # Verify if the specified taks_id variable is a string:
+        if task_id is None or isinstance(task_id, str):
+            self.task_id = task_id
+        else:
+            raise TypeError('The provided task ID variable must be a string.')
+
+        # Verify if the specified max sessions variable is a positive intiger:
+        if isinstance(max_sessions, int) and max_sessions > 0:
+            self.max_sessions = max_sessions
+        else:
+            raise TypeError('The provided max sessions variable must be a positive intiger.')
+
+        # Connection settings declaration:
+        self.repeat_connection = repeat_connection
+        self.repeat_connection_time = repeat_connection_time
+        self.connection_class = connection_class
+        self.pooled = pooled
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class FleetExecutor ({len(self.devices)} devices/{self.max_sessions} sessions)>'
+
+    def _collect_devices(self, devices):
+        """ Collect list of device objects from QuerySet, Group or list. """
+
+        if isinstance(devices, Group):
+            devices = devices.devices.all()
+        if isinstance(devices, QuerySet):
+            devices = list(devices.select_related('credential'))
+
+        # Verify if all provided devices are valid Device objects:
+        if isinstance(devices, (list, tuple)) and all(isinstance(device, Device) for device in devices):
+            return list(devices)
+        else:
+            raise TypeError('The provided devices variable must be a QuerySet, Group or list of Device objects.')
+
+    def _new_connection(self, device):
+        """
+        Create a new connection object for provided device.
+        Default NetCon class is replaced by connection class of device type transport.
+        """
+
+        connection_class = self.connection_class
+        if connection_class is NetCon:
+            connection_class = collect_connection_class(device.device_type)
+        return connection_class(
+            device, self.task_id, self.repeat_connection, self.repeat_connection_time)
+
+    def _run_on_device(self, function, device):
+        """ Run provided function, Django database connection of the thread is closed afterwards. """
+
+        try:
+            return function(device)
+        finally:
+            db_connection.close()
+
+    def map(self, function, devices: list = None):
+        """
+        Run provided function against every device, using limited number of threads.
+
+        Parameters:
+        -----------------
+        function: Callable
+            Function that receives a Device object.
+        devices: List
+            Subset of devices to run function against (Optional).
+
+        Return:
+        --------
+        Generator of (device, function output) tuples, in order of completion.
+        """
+
+        if devices is None:
+            devices = self.devices
+
+        # Log the beginning of fleet execution:
+        logger.info(
+            f'Fleet execution on {len(devices)} devices has been started ({self.max_sessions} sessions).',
+            self.task_id)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_sessions)
+        futures = {}
+        try:
+            # Submit function execution for each device:
+            futures = {
+                executor.submit(self._run_on_device, function, device): device for device in devices}
+
+            # Return device output, as soon as each device finishes:
+            for future in as_completed(futures):
+                device = futures[future]
+                try:
+                    output = future.result()
+                except Exception as error:
+                    logger.error(str(error), self.task_id, device.name)
+                    output = error
+                yield device, output
+
+        finally:
+            # Devices not started yet are cancelled, if generator was closed early (e.g. by break in consumer loop):
+            cancelled = [future for future in futures if future.cancel()]
+            executor.shutdown(wait=True)
+            if cancelled:
+                logger.warning(
+                    f'Fleet execution was stopped, {len(cancelled)} devices were cancelled.',
+                    self.task_id)
+
+        # Log the end of fleet execution:
+        logger.info(
+            f'Fleet execution on {len(devices)} devices has been finished.',
+            self.task_id)
+
+    def enabled_commands(self, commands: str or list, expect_string: str = False, **kwargs):
+        """
+        Open connection, execute enabled commands and close connection on every device.
+
+        Parameters:
+        -----------------
+        commands: String or List
+            CLI command/s that will be executed on every device.
+        expect_string: String
+            Pattern that will end command execution (Optional).
+
+        Return:
+        --------
+        Generator of per device result dictionaries, in order of completion.
+        """
+
+        def execute(device):
+            connection = self._new_connection(device)
+            try:
+                connection.open_connection(self.pooled)
+                output = connection.enabled_commands(commands, expect_string, **kwargs)
+            finally:
+                connection.close_connection()
+            return connection, output
+
+        for device, output in self.map(execute):
+            yield self._result(device, output)
+
+    def configuration_commands(self, commands: str or list):
+        """
+        Open connection, execute configuration commands and close connection on every device.
+
+        Parameters:
+        -----------------
+        commands: String or List
+            CLI command/s that will be executed on every device.
+
+        Return:
+        --------
+        Generator of per device result dictionaries, in order of completion.
+        """
+
+        def execute(device):
+            connection = self._new_connection(device)
+            try:
+                connection.open_connection(self.pooled)
+                output = connection.configuration_commands(commands)
+            finally:
+                connection.close_connection()
+            return connection, output
+
+        for device, output in self.map(execute):
+            yield self._result(device, output)
+
+    def command_table(self, command: str, **kwargs) -> ResultTable:
+        """
+        Execute enabled command on every device and join parsed outputs into one columnar table.
+        Outputs are parsed directly to columns, without creating dictionary per row.
+
+        Parameters:
+        -----------------
+        command: String
+            CLI command that will be executed on every device.
+
+        Return:
+        --------
+        ResultTable object with DEVICE column, empty if no output could be parsed.
+        """
+
+        tables = []
+        for result in self.enabled_commands(command, parse=False, **kwargs):
+            # Skip devices, that command could not be executed on:
+            command_data = (result['output'] or {}).get(command)
+            if not command_data or not command_data['command_output']:
+                continue
+
+            device = result['device']
+            try:
+                tables.append(parse_command_output_table(
+                    collect_device_type_commands_from_id(device.device_type),
+                    command, command_data['command_output'], device.name))
+            except Exception as error:
+                logger.error(str(error), self.task_id, device.name)
+
+        # Join all device tables:
+        return ResultTable.concat(tables)
+
+    def update_device_types(self, batch_size: int = 500) -> dict:
+        """
+        Collect device type of every device, that requires autodetect process.
+        All updated devices are saved with one bulk update.
+
+        Parameters:
+        -----------------
+        batch_size: Intiger
+            Number of devices saved in a single database query.
+
+        Return:
+        --------
+        Dictionary of device name and discovered Netmiko device type name.
+        """
+
+        def execute(device):
+            connection = self._new_connection(device)
+            try:
+                return connection.update_device_type(save=False)
+            finally:
+                connection.close_connection()
+
+        # Collect device type of devices, that requires autodetect process:
+        devices = [device for device in self.devices if device.device_type == 0]
+        output = {}
+        for device, device_type_name in self.map(execute, devices):
+            output[device.name] = None if isinstance(device_type_name, Exception) else device_type_name
+
+        # Save all updated devices at once:
+        updated = [device for device in devices if device.device_type != 0]
+        Device.objects.bulk_update(updated, ['device_type'], batch_size=batch_size)
+
+        # Log end of device type update:
+        logger.info(
+            f'Device type of {len(updated)} from {len(devices)} devices has been updated.',
+            self.task_id)
+
+        # Return data:
+        return output
+
+    def _result(self, device, output):
+        """ Create per device result dictionary. """
+
+        # Handle exceptions raised during device execution:
+        if isinstance(output, Exception):
+            return {
+                'device': device,
+                'connection_status': False,
+                'execution_time': None,
+                'output': None,
+                'error': output,
+            }
+
+        connection, output = output
+        return {
+            'device': device,
+            'connection_status': connection.connection_status,
+            'execution_time': connection.execution_time,
+            'output': output,
+            'error': None,
+        }
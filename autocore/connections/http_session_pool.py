@@ -0,0 +1,228 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+from collections import OrderedDict
+import threading
+import hashlib
+import time
+
+# Requests Import:
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.connectionpool import HTTPSConnectionPool
+
+# Default HTTPS session pool settings:
+DEFAULT_POOL_SIZE = 256
+DEFAULT_IDLE_TTL = 120
+DEFAULT_CONNECTIONS_PER_DEVICE = 4
+
+# Connection time of the last request, per thread:
+_timing = threading.local()
+
+
+def credential_key(username: str, secret: str) -> tuple:
+    """ Return credential identity (username and secret hash), used to separate sessions and cached data of users. """
+
+    return (username, hashlib.sha256(str(secret).encode()).hexdigest())
+
+
+def collect_connect_time() -> float:
+    """ Return TCP and TLS handshake time of the last request in current thread, 0 if connection was reused. """
+
+    return getattr(_timing, 'connect_time', 0.0)
+
+
+def reset_connect_time() -> None:
+    """ Reset handshake time before a new request in current thread. """
+
+    _timing.connect_time = 0.0
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """ HTTPS connection, that stores TCP and TLS handshake time. """
+
+    def connect(self):
+        start_time = time.perf_counter()
+        super().connect()
+        _timing.connect_time = getattr(_timing, 'connect_time', 0.0) + time.perf_counter() - start_time
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    """ HTTPS connection pool of TimedHTTPSConnection objects. """
+
+    ConnectionCls = TimedHTTPSConnection
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """ Requests adapter, that keeps connections to a single device open and measures handshakes. """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': HTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+# Main HttpSessionPool class:
+class HttpSessionPool:
+    """
+    Per worker pool of keep-alive HTTPS sessions, shared by all ApiCon objects.
+    Sessions are keyed by device hostname, HTTPS port and credential, so cookies
+    of one user are never sent by other users. Each session keeps
+    up to connections per device open connections, so following requests
+    do not repeat TCP and TLS handshakes. Idle sessions are closed after TTL.
+
+    Attributes:
+    -----------------
+    max_size:
+        Maximum number of sessions kept in pool.
+    idle_ttl:
+        Number of seconds after which idle session is closed.
+    connections_per_device:
+        Maximum number of open connections of each session.
+
+    Methods:
+    --------
+    acquire:
+        Return session of device, a new session is created if required.
+    evict_idle:
+        Close sessions idle longer than TTL.
+    close_all:
+        Close all sessions.
+    stats:
+        Return pool statistics.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE, idle_ttl: int = DEFAULT_IDLE_TTL, connections_per_device: int = DEFAULT_CONNECTIONS_PER_DEVICE) -> None:
+        """
+        Parameters:
+        -----------------
+        max_size: Intiger
+            Maximum number of sessions kept in pool.
+        idle_ttl: Intiger
+            Number of seconds after which idle session is closed.
+        connections_per_device: Intiger
+            Maximum number of open connections of each session.
+        """
+
+        # Verify if the specified pool settings are positive intigers:
+        for name, value in (('max size', max_size), ('idle TTL', idle_ttl), ('connections per device', connections_per_device)):
+            if not isinstance(value, int) or value < 1:
+                raise TypeError(f'The provided {name} variable must be a positive intiger.')
+
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.connections_per_device = connections_per_device
+
+        # Sessions per key, as (last use time, session), least recently used first:
+        self._sessions = OrderedDict()
+        # Pool lock:
+        self._lock = threading.Lock()
+
+        # Pool counters declaration:
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class HttpSessionPool ({len(self._sessions)}/{self.max_size})>'
+
+    def _new_session(self):
+        """ Create session with keep-alive adapter sized per device. """
+
+        session = requests.Session()
+        adapter = KeepAliveAdapter(
+            pool_connections=1,
+            pool_maxsize=self.connections_per_device,
+            max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def acquire(self, hostname: str, port: int, credential: tuple = None):
+        """
+        Return session of device, a new session is created if required.
+
+        Parameters:
+        -----------------
+        hostname: String
+            IP address or DNS name of network device.
+        port: Intiger
+            HTTPS port of network device.
+        credential: Tuple
+            Credential identity created by credential_key function.
+
+        Return:
+        --------
+        Requests session object.
+        """
+
+        # Close sessions idle longer than TTL:
+        self.evict_idle()
+
+        key = (hostname, port, credential)
+        evicted = []
+        with self._lock:
+            if key in self._sessions:
+                self.hits += 1
+                session = self._sessions.pop(key)[1]
+            else:
+                self.misses += 1
+                session = self._new_session()
+            self._sessions[key] = (time.monotonic(), session)
+
+            # Close least recently used sessions above pool size:
+            while len(self._sessions) > self.max_size:
+                evicted.append(self._sessions.popitem(last=False)[1][1])
+
+        for session_to_close in evicted:
+            session_to_close.close()
+        return session
+
+    def evict_idle(self) -> None:
+        """ Close sessions idle longer than TTL. """
+
+        evicted = []
+        deadline = time.monotonic() - self.idle_ttl
+        with self._lock:
+            while self._sessions:
+                key, (last_use, session) = next(iter(self._sessions.items()))
+                if last_use >= deadline:
+                    break
+                del self._sessions[key]
+                evicted.append(session)
+
+        for session in evicted:
+            session.close()
+
+    def close_all(self) -> None:
+        """ Close all sessions. """
+
+        with self._lock:
+            sessions = [session for _, session in self._sessions.values()]
+            self._sessions = OrderedDict()
+
+        for session in sessions:
+            session.close()
+
+    def stats(self) -> dict:
+        """ Return pool statistics. """
+
+        with self._lock:
+            requests_count = self.hits + self.misses
+            return {
+                'size': len(self._sessions),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / requests_count, 5) if requests_count else None,
+            }
+
+
+# Process-wide (per worker) HTTPS session pool:
+http_session_pool = HttpSessionPool()
@@ -0,0 +1,162 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import threading
+
+# Paramiko Import:
+import paramiko
+
+# Jump host settings:
+JUMP_HOST_TIMEOUT = 10
+CHANNEL_WAIT_TIMEOUT = 60
+
+
+# Jump host channel class:
+class JumpHostChannel:
+    """
+    Direct TCP/IP channel opened through jump host transport.
+    Channel is used as Netmiko sock parameter, jump host channel slot
+    is released when channel is closed.
+    """
+
+    def __init__(self, channel, semaphore) -> None:
+        self._channel = channel
+        self._semaphore = semaphore
+        self._released = False
+
+    def __getattr__(self, name):
+        """ Forward all other attributes to Paramiko channel. """
+        return getattr(self._channel, name)
+
+    def close(self) -> None:
+        """ Close channel and release jump host channel slot. """
+
+        self._channel.close()
+        if not self._released:
+            self._released = True
+            self._semaphore.release()
+
+
+# Main JumpHostPool class:
+class JumpHostPool:
+    """
+    Process-wide pool of authenticated SSH transports to jump hosts.
+    Each jump host is authenticated once, and all device sessions routed
+    through it use direct TCP/IP channels of the same transport.
+    Number of channels opened at once is limited per jump host.
+
+    Methods:
+    --------
+    open_channel:
+        Open direct TCP/IP channel to device through jump host.
+    close_all:
+        Close all jump host transports.
+    stats:
+        Return jump host transports statistics.
+    """
+
+    def __init__(self) -> None:
+        # Jump host transports and channel limits:
+        self._transports = {}
+        self._semaphores = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class JumpHostPool ({len(self._transports)} jump hosts)>'
+
+    def _key(self, jump_host):
+        """ Create pool key from jump host connection data. """
+
+        username = jump_host.credential.username if jump_host.credential else 'admin'
+        return (jump_host.hostname, jump_host.ssh_port, username)
+
+    def _collect_transport(self, jump_host, key):
+        """ Return active jump host transport, authenticate jump host only if required. """
+
+        with self._locks[key]:
+            transport = self._transports.get(key)
+            if transport is not None and transport.is_active():
+                return transport
+
+            # Connect and authenticate jump host:
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(
+                hostname=jump_host.hostname,
+                port=jump_host.ssh_port,
+                username=key[2],
+                password=jump_host.credential.password if jump_host.credential else 'password',
+                timeout=JUMP_HOST_TIMEOUT,
+                allow_agent=False,
+                look_for_keys=False)
+            transport = client.get_transport()
+            transport.set_keepalive(30)
+            self._transports[key] = transport
+            return transport
+
+    def open_channel(self, jump_host, hostname: str, port: int, timeout: int = JUMP_HOST_TIMEOUT) -> JumpHostChannel:
+        """
+        Open direct TCP/IP channel to device through jump host.
+        If all jump host channels are in use, waits for a free channel.
+
+        Parameters:
+        -----------------
+        jump_host: JumpHost object
+            Jump host used to reach device.
+        hostname: String
+            IP address or DNS name of network device.
+        port: Intiger
+            SSH port of network device.
+        timeout: Intiger
+            Number of seconds to wait for channel opening.
+
+        Return:
+        --------
+        JumpHostChannel object, that can be used as Netmiko sock parameter.
+        """
+
+        key = self._key(jump_host)
+        with self._lock:
+            if key not in self._semaphores:
+                self._semaphores[key] = threading.BoundedSemaphore(max(1, jump_host.max_channels))
+                self._locks[key] = threading.Lock()
+        semaphore = self._semaphores[key]
+
+        # Wait for a free jump host channel:
+        if not semaphore.acquire(timeout=CHANNEL_WAIT_TIMEOUT):
+            raise TimeoutError(
+                f'No free channel of jump host {jump_host.hostname} in {CHANNEL_WAIT_TIMEOUT} seconds.')
+
+        try:
+            transport = self._collect_transport(jump_host, key)
+            channel = transport.open_channel(
+                'direct-tcpip', (hostname, port), ('127.0.0.1', 0), timeout=timeout)
+        except BaseException:
+            semaphore.release()
+            raise
+        return JumpHostChannel(channel, semaphore)
+
+    def close_all(self) -> None:
+        """ Close all jump host transports. """
+
+        with self._lock:
+            for transport in self._transports.values():
+                transport.close()
+            self._transports.clear()
+
+    def stats(self) -> dict:
+        """ Return number of active transports and free channels per jump host. """
+
+        return {
+            f'{key[0]}:{key[1]}': {
+                'active': key in self._transports and self._transports[key].is_active(),
+                'free_channels': semaphore._value,
+            } for key, semaphore in self._semaphores.items()}
+
+
+# Process-wide jump host pool:
+jump_host_pool = JumpHostPool()
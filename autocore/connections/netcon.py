@@ -1,25 +1,79 @@
 # Document descryption:
 __author__ = 'Robert Tadeusz Kucharski'
-__version__ = '2.1'
+__version__ = '2.2'
 
 # Python Import:
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
 import textfsm
-import os
+import socket
+import time
+import re
 
 # Netmiko Import:
 from paramiko import ssh_exception
 from netmiko import ConnectHandler
+from netmiko import redispatch
+from netmiko.ssh_autodetect import SSH_MAPPER_BASE
 from netmiko.ssh_autodetect import SSHDetect
 from netmiko.ssh_exception import  AuthenticationException
 from netmiko.ssh_exception import NetMikoTimeoutException
+import netmiko
+
+# Netmiko 3 raises OSError, when command output is not received in time:
+try:
+    from netmiko.exceptions import ReadTimeout
+except ImportError:
+    class ReadTimeout(Exception):
+        """ Never raised by Netmiko 3, read timeouts are recognized by OSError message. """
+
+# Netmiko 3 read timeout message:
+NETMIKO_3_READ_TIMEOUT_MESSAGE = 'never detected'
+
+# Netmiko 4 replaced send_command delay factor with read timeout:
+NETMIKO_READ_TIMEOUT = int(netmiko.__version__.split('.')[0]) >= 4
 
 # Connection Import:
 from .connection import Connection
 
+# Text FSM parser Import:
+from .output_parser import parse_command_output
+from .output_parser import iter_parse_command_output
+
+# Command result Import:
+from .command_result import CommandResult
+
+# Text FSM parser pool Import:
+from .parser_pool import parser_pool
+
+# SSH session pool Import:
+from .session_pool import session_pool
+
+# Command timing Import:
+from .command_timing import command_timing
+
+# Jump host pool Import:
+from .jump_host_pool import jump_host_pool
+
+# Device health Import:
+from .device_health import DeviceHealth
+from .device_health import AUTHENTICATION
+from .device_health import TIMEOUT
+from .device_health import REFUSED
+from .device_health import ERROR
+from .device_health import FAIL_FAST
+
+# Device type autodetect Import:
+from .autodetect import collect_ssh_banner
+from .autodetect import collect_cached_device_type_id
+from .autodetect import cache_device_type_id
+
 # Device name translation Import:
 from .device_name_translation import collect_device_type_commands_from_id
 from .device_name_translation import collect_device_type_id_from_name
 from .device_name_translation import collect_device_type_name_from_id
+from .device_name_translation import collect_device_type_value_from_id
 
 # Logger import:
 from logger.logger import Logger
@@ -45,6 +99,21 @@ class NetCon(Connection):
         Executes commands that require privileged mode.
     """
 
+    # Reuse SSH sessions from worker session pool:
+    pooled = False
+    # Derive read timeouts from command execution times:
+    adaptive_timeouts = True
+    # Command timing, replaced by local batch of command histograms during enabled commands execution:
+    _command_timing = command_timing
+    # Command output processing mode (True, False or 'lazy'):
+    parse = True
+    # Parse command output in parser processes:
+    parse_pool = False
+    # Read timeout per command of batched commands execution:
+    batch_read_timeout = 10
+    # Read timeout between chunks of streamed command output:
+    stream_read_timeout = 30
+
     def _ssh_connect(self, autodetect: bool = False) -> str:
         """ 
         Connect to device using SSH protocol.
@@ -60,11 +129,20 @@ class NetCon(Connection):
 
         elif self.supported_device or autodetect:
 
+            # Check device health before connection attempt:
+            health = DeviceHealth(self.device_hostname, self.device_ssh_port)
+            if not health.allow_request():
+                # Log skipped connection to unreachable device:
+                self._log_error(
+                    logger, f'SSH connection to device {self.device_hostname} was skipped, device is marked as unreachable.')
+                return self.connection_status
+
             # Performs a specified number of SSH connection attempts to a specified device.
             for connection_attempts in range(1, self.repeat_connection + 1):
 
-                if connection_attempts != self.repeat_connection:
-                    self._sleep()
+                # Wait jittered exponential backoff time before next attempt:
+                if connection_attempts != 1:
+                    time.sleep(health.retry_delay(connection_attempts - 1, self.repeat_connection_time))
 
                 # Log stat of a new SSH connection attempt:
                 logger.debug(
@@ -75,7 +153,7 @@ class NetCon(Connection):
                     # Check if the device type must be detected automatically:
                     if autodetect:
                         # Connect to device to check device type, using SSH protocol:
-                        self.connection = SSHDetect(**{
+                        self.connection = self._open_ssh(SSHDetect, **{
                             'device_type': 'autodetect',
                             'host': self.device_hostname,
                             'port': self.device_ssh_port,
@@ -83,28 +161,43 @@ class NetCon(Connection):
                             'password': self.device_password})
                     else:
                         # Connect to device, using SSH protocol:
-                        self.connection = ConnectHandler(**{
+                        handshake_start = time.perf_counter()
+                        self.connection = self._open_ssh(ConnectHandler, **{
                             'device_type': self._check_device_type_name(),
                             'host': self.device_hostname,
                             'port': self.device_ssh_port,
                             'username': self.device_username,
                             'password': self.device_password})
+                        # Store handshake time of pooled sessions:
+                        if self.pooled:
+                            session_pool.record_handshake(
+                                self._session_pool_key(), time.perf_counter() - handshake_start)
 
                 # Handel SSH connection exceptions:
                 except AuthenticationException as error:
                     self._log_error(logger, error)
+                    health.record_failure(AUTHENTICATION)
                     # Return connection starus:
                     return self.connection_status
                 except NetMikoTimeoutException as error:
                     self._log_error(logger, error)
+                    # Retry connection, if failure type allows it:
+                    if self._connection_failure(health, error, TIMEOUT):
+                        continue
                     # Return connection starus:
                     return self.connection_status
                 except ssh_exception.SSHException as error:
                     self._log_error(logger, error)
+                    # Retry connection, if failure type allows it:
+                    if self._connection_failure(health, error, ERROR):
+                        continue
                     # Return connection starus:
                     return self.connection_status
                 except OSError as error:
                     self._log_error(logger, error)
+                    # Retry connection, if failure type allows it:
+                    if self._connection_failure(health, error, ERROR):
+                        continue
                     # Return connection starus:
                     return self.connection_status
                 except TypeError as error:
@@ -119,6 +212,8 @@ class NetCon(Connection):
                 else:
                     # Change connection status to True.
                     self.connection_status = True
+                    # Close device circuit breaker:
+                    health.record_success()
                     # Log the start of a new connection:
                     logger.info(
                         f'SSH connection to device {self.device_hostname} has been established (Attempt: {connection_attempts}).',
@@ -126,10 +221,115 @@ class NetCon(Connection):
 
                     if autodetect:    
                         # Collect information about device type:
-                        return self.connection.autodetect()
+                        return self._detect_device_type()
                     else: # Return connection:
                         return self.connection
 
+            # Return connection starus:
+            return self.connection_status
+
+    def _detect_device_type(self) -> str:
+        """
+        Run Netmiko autodetect methods of SSHDetect object, and return best matching device type name.
+        SSHDetect.autodetect disconnects SSH session before return, so methods are called directly
+        and the session stays open to be reused as device connection.
+        Device type cached for device hostname and SSH server identification string is used without autodetect methods.
+        """
+
+        # Collect device type from cached device fingerprint:
+        banner = collect_ssh_banner(self.connection.connection)
+        device_name_id = collect_cached_device_type_id(self.device_hostname, banner)
+        device_type = collect_device_type_name_from_id(device_name_id, netmiko=True) if device_name_id else None
+        if device_type:
+            logger.debug(
+                f'Device type was collected from cached fingerprint of SSH server identification string "{banner}".',
+                self.task_id, self.device_name)
+            return device_type
+
+        for device_type, autodetect_dict in SSH_MAPPER_BASE:
+            autodetect_kwargs = dict(autodetect_dict)
+            autodetect_method = getattr(self.connection, autodetect_kwargs.pop('dispatch'))
+            accuracy = autodetect_method(**autodetect_kwargs)
+            if accuracy:
+                self.connection.potential_matches[device_type] = accuracy
+                # Decisive match:
+                if accuracy >= 99:
+                    break
+
+        # Return device type with the highest accuracy:
+        if not self.connection.potential_matches:
+            return None
+        device_type = max(self.connection.potential_matches.items(), key=lambda match: match[1])[0]
+
+        # Store device fingerprint:
+        cache_device_type_id(self.device_hostname, banner, collect_device_type_id_from_name(device_type, netmiko=True))
+        return device_type
+
+    def _open_ssh(self, connection_class, **kwargs):
+        """
+        Create Netmiko connection object.
+        Devices behind jump host are connected over channel of shared jump host transport.
+        """
+
+        if self.device_jump_host is None:
+            return connection_class(**kwargs)
+
+        # Open channel to device through jump host:
+        sock = jump_host_pool.open_channel(
+            self.device_jump_host, self.device_hostname, self.device_ssh_port)
+        try:
+            return connection_class(sock=sock, **kwargs)
+        except BaseException:
+            # Release jump host channel of failed connection:
+            sock.close()
+            raise
+
+    def _connection_failure(self, health, error, failure_type):
+        """
+        Record connection failure in device health state.
+        Returns True if connection attempt can be retried.
+        """
+
+        # Connection refused errors are reported as timeouts or OS errors:
+        if isinstance(error, ConnectionRefusedError) or isinstance(error.__context__, ConnectionRefusedError):
+            failure_type = REFUSED
+        elif isinstance(error, socket.timeout) or isinstance(error.__context__, socket.timeout):
+            failure_type = TIMEOUT
+
+        # Record failure, and check if the circuit was opened:
+        circuit_open = health.record_failure(failure_type)
+        return not circuit_open and failure_type not in FAIL_FAST
+
+    def _session_pool_key(self):
+        """ Collect session pool key of device and credential. """
+
+        return session_pool.key(
+            self.device_hostname, self.device_ssh_port, self.device_username,
+            self.device_password, self._check_device_type_name())
+
+    def _pooled_connect(self):
+        """ Collect live SSH session from worker session pool. """
+
+        # Collect idle session from pool:
+        session = session_pool.acquire(self._session_pool_key())
+        stats = session_pool.stats()
+
+        if session is None:
+            # Log pool miss:
+            logger.debug(
+                f'There is no idle SSH session to device {self.device_hostname} in pool (Hit ratio: {stats["hit_ratio"]}).',
+                self.task_id, self.device_name)
+            return None
+        else:
+            # Change connection status to True.
+            self.connection = session
+            self.connection_status = True
+            # Log pool hit:
+            logger.debug(
+                f'SSH session to device {self.device_hostname} was reused from pool (Hit ratio: {stats["hit_ratio"]}, handshake time saved: {stats["saved_time"]} seconds).',
+                self.task_id, self.device_name)
+            return session
+
     def _check_device_type_name(self):
         """ Change device type ID to proper Netmiko device name. """
 
@@ -151,15 +351,31 @@ class NetCon(Connection):
             'error': None
         }
 
+        # Collect learned read timeout of command:
+        timeout_kwargs, read_timeout = self._command_timeout_kwargs(command)
+        start_time = time.perf_counter()
+
         try:
             if expect_string is False:
                 command_output = self.connection.send_command(
-                    command_string=command)
+                    command_string=command,
+                    **timeout_kwargs)
             else:
                 command_output = self.connection.send_command(
                     command_string=command,
-                    expect_string=expect_string)
+                    expect_string=expect_string,
+                    **timeout_kwargs)
 
+        except ReadTimeout as error:
+            self._log_error(logger, error)
+            # Next read timeout of command will be longer:
+            if self.adaptive_timeouts:
+                self._command_timing.record_timeout(self.device_type, command, read_timeout)
+            # Add error to return data:
+            return_data['command_output'] = False
+            return_data['error'] = error
+            # Return connection starus:
+            return return_data
         except UnboundLocalError as error:
             self._log_error(logger, error)
             # Add error to return data:
@@ -169,6 +385,9 @@ class NetCon(Connection):
             return return_data
         except OSError as error:
             self._log_error(logger, error)
+            # Netmiko 3 read timeout, next read timeout of command will be longer:
+            if self.adaptive_timeouts and not NETMIKO_READ_TIMEOUT and NETMIKO_3_READ_TIMEOUT_MESSAGE in str(error):
+                self._command_timing.record_timeout(self.device_type, command, read_timeout)
             # Add error to return data:
             return_data['command_output'] = False
             return_data['error'] = error
@@ -188,19 +407,228 @@ class NetCon(Connection):
                 f'The enabled CLI command "{command}" has been sent.',
                 self.task_id, self.device_name)
 
-            # Check if received output is valid:
-            if 'Invalid input detected' in command_output:
-                return_data['command_output'] = False
-                return_data['error'] = 'Provided command is not valid'
+            # Store command execution time:
+            if self.adaptive_timeouts:
+                self._command_timing.record(self.device_type, command, time.perf_counter() - start_time)
+
+            # Return data:
+            return self._command_output_to_return_data(return_data, command_output)
+
+    def _command_timeout_kwargs(self, command: str):
+        """
+        Return send_command timeout arguments and read timeout, learned from command execution times.
+        Without enough samples, Netmiko default timeouts are used.
+        """
+
+        # Netmiko default read timeout:
+        default_read_timeout = 10 if NETMIKO_READ_TIMEOUT else 100
+
+        read_timeout = self._command_timing.read_timeout(self.device_type, command) if self.adaptive_timeouts else None
+        if read_timeout is None:
+            return {}, default_read_timeout
+        if NETMIKO_READ_TIMEOUT:
+            return {'read_timeout': read_timeout}, read_timeout
+        # Netmiko 3 waits delay factor * 100 seconds by default. It uses the larger of delay factor
+        # and global delay factor (1), so learned timeouts can only extend the default read timeout:
+        delay_factor = max(read_timeout / 100, 1)
+        return {'delay_factor': delay_factor}, delay_factor * 100
+
+    def _load_command_timing(self, commands: str or list) -> None:
+        """ Replace command timing by local batch of command histograms, loaded from cache in one round trip. """
+
+        commands = [commands] if isinstance(commands, str) else commands if isinstance(commands, (list, tuple)) else []
+        self._command_timing = command_timing.batch(self.device_type, [
+            command if isinstance(command, str) else command[0] for command in commands
+            if isinstance(command, str) or (isinstance(command, (list, tuple)) and command)])
+
+    def _command_output_to_return_data(self, return_data: dict, command_output: str) -> dict:
+        """ Add received command output and proccessed output to return data. """
+
+        # Check if received output is valid:
+        if 'Invalid input detected' in command_output:
+            return_data['command_output'] = False
+            return_data['error'] = 'Provided command is not valid'
+        else:
+            # Add command output to return dictionary:
+            return_data['command_output'] = command_output
+            if self.parse is False:
+                # Skip output processing:
+                pass
+            elif self.parse == 'lazy':
+                # Process output data on first read of proccessed output:
+                command = return_data['command']
+                return_data = CommandResult(
+                    return_data,
+                    parser=lambda: self._process_command_output_to_dictionary(command, command_output))
+            elif self.parse_pool:
+                # Schedule output processing in parser pool, Future is collected by enabled_commands method:
+                return_data['proccessed_output'] = parser_pool.submit(
+                    collect_device_type_commands_from_id(self.device_type),
+                    return_data['command'], command_output)
             else:
-                # Add command output to return dictionary:
-                return_data['command_output'] = command_output
                 # Proccess outpud data to dictionary:
-                return_data['proccessed_output'] = self._process_command_output_to_dictionary(command, command_output)
-            
+                return_data['proccessed_output'] = self._process_command_output_to_dictionary(
+                    return_data['command'], command_output)
+
+        # Return data:
+        return return_data
+
+    def _batched_command_execution(self, commands: list, read_timeout: int = None) -> dict:
+        """
+        Enabled CLI commands execution in a single channel round trip.
+        All commands are written together, the device prompt that follows
+        each command output is used as a marker to split the received stream.
+        """
+
+        # Log start of commands execution:
+        logger.debug(
+            f'Sending of a new batch of enabled CLI commands "{commands}" has been started.',
+            self.task_id, self.device_name)
+
+        return_data = {
+            command: {
+                'command': command,
+                'expect_string': False,
+                'command_output': None,
+                'proccessed_output': None,
+                'error': None
+            } for command in commands}
+
+        # Device prompt, used as command output marker:
+        prompt_pattern = re.compile(
+            r'^' + re.escape(self.connection.base_prompt) + r'[>#]', re.MULTILINE)
+        # Read timeout of the whole batch:
+        if read_timeout is None:
+            read_timeout = self.batch_read_timeout * len(commands)
+
+        try:
+            # Write all commands to SSH channel at once:
+            self.connection.write_channel(
+                ''.join(f'{command}{self.connection.RETURN}' for command in commands))
+
+            # Read SSH channel until prompt was received after each command:
+            output = ''
+            prompts = 0
+            # Position after the last counted prompt:
+            position = 0
+            # Prompt split between two reads is found again in the overlap:
+            overlap = len(self.connection.base_prompt) + 1
+            deadline = time.monotonic() + read_timeout
+            while prompts < len(commands):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(
+                        f'Output of batched commands was not received in {read_timeout} seconds.')
+                data = self.connection.read_channel()
+                if data:
+                    # Scan only newly received data, not the whole output:
+                    start = max(position, len(output) - overlap)
+                    output += data
+                    for match in prompt_pattern.finditer(output, start):
+                        prompts += 1
+                        position = match.end()
+                else:
+                    time.sleep(0.01)
+
+        except TimeoutError as error:
+            self._log_error(logger, error)
+            # Add error to return data:
+            for command in commands:
+                return_data[command]['command_output'] = False
+                return_data[command]['error'] = error
+            return return_data
+        except OSError as error:
+            self._log_error(logger, error)
+            # Add error to return data:
+            for command in commands:
+                return_data[command]['command_output'] = False
+                return_data[command]['error'] = error
+            return return_data
+
+        else:
+            # Log end of commands execution:
+            logger.info(
+                f'The batch of enabled CLI commands "{commands}" has been sent.',
+                self.task_id, self.device_name)
+
+            # Split received stream into per command outputs:
+            output = output.replace('\r\n', '\n').replace('\r', '')
+            command_outputs = prompt_pattern.split(output)
+            for command, command_output in zip(commands, command_outputs):
+                # Remove command echo from command output:
+                command_output = command_output.split('\n', 1)[1] if '\n' in command_output else ''
+                return_data[command] = self._command_output_to_return_data(
+                    return_data[command], command_output.strip('\n'))
+
             # Return data:
             return return_data
 
+    def _multiplexed_command_execution(self, commands: list, channels: int) -> dict:
+        """
+        Enabled CLI commands execution over many exec channels of the same SSH transport.
+        Each command runs in its own channel, up to provided number of channels at once,
+        so independent commands are executed concurrently after a single authentication.
+        """
+
+        # Log start of commands execution:
+        logger.debug(
+            f'Sending of enabled CLI commands "{commands}" over {channels} SSH channels has been started.',
+            self.task_id, self.device_name)
+
+        # Collect authenticated SSH transport of current connection:
+        transport = self.connection.remote_conn_pre.get_transport()
+
+        def execute(command):
+            # Open a new exec channel for command:
+            timeout_kwargs, read_timeout = self._command_timeout_kwargs(command)
+            start_time = time.perf_counter()
+            channel = transport.open_session(timeout=read_timeout)
+            try:
+                channel.settimeout(read_timeout)
+                channel.exec_command(command)
+                # Read command output until channel is closed by device:
+                chunks = []
+                data = channel.recv(65535)
+                while data:
+                    chunks.append(data)
+                    data = channel.recv(65535)
+            finally:
+                channel.close()
+            if self.adaptive_timeouts:
+                self._command_timing.record(self.device_type, command, time.perf_counter() - start_time)
+            return b''.join(chunks).decode(errors='replace')
+
+        return_data = {}
+        with ThreadPoolExecutor(max_workers=channels) as executor:
+            futures = {command: executor.submit(execute, command) for command in commands}
+
+            for command, future in futures.items():
+                return_data[command] = {
+                    'command': command,
+                    'expect_string': False,
+                    'command_output': None,
+                    'proccessed_output': None,
+                    'error': None
+                }
+                try:
+                    command_output = future.result()
+                except (ssh_exception.SSHException, OSError) as error:
+                    self._log_error(logger, error)
+                    # Add error to return data:
+                    return_data[command]['command_output'] = False
+                    return_data[command]['error'] = error
+                else:
+                    command_output = command_output.replace('\r\n', '\n').replace('\r', '')
+                    return_data[command] = self._command_output_to_return_data(
+                        return_data[command], command_output.strip('\n'))
+
+        # Log end of commands execution:
+        logger.info(
+            f'Enabled CLI commands "{commands}" have been sent over {channels} SSH channels.',
+            self.task_id, self.device_name)
+
+        # Return data:
+        return return_data
+
     def _config_command_execution(self, command: str) -> str:
         """ Configuration CLI command execution. """
 
@@ -233,44 +661,68 @@ class NetCon(Connection):
             # Return command output:
             return return_data
 
-    def _process_command_output_to_dictionary(self, command, command_output):
-        """ Convert commands output to dictionary based on Text FSM templates. """
+    def _process_command_output_to_dictionary(self, command, command_output, raw_output: str = None):
+        """
+        Convert commands output to dictionary based on Text FSM templates.
+        Command output can be a Future object of output parsed in parser pool,
+        raw output is then parsed in current process if parser process was terminated.
+        """
 
-        # FSM result list:
-        fsm_result = []
-        # Collect command information:
-        command_no_space = command.strip().replace(' ', '_')
         # Collect template data:
         device_type_command = collect_device_type_commands_from_id(self.device_type)
-        command_filename = f'{device_type_command}_{command_no_space}.textfsm'
-        path = f'autocore/connections/commands/{device_type_command}/{command_filename}'
 
         try: # Try to parse collected data from Text FSM:
-            with open(path) as template:
-                fsm = textfsm.TextFSM(template)
-                result = fsm.ParseText(command_output)
-                # Create one or many dictionaries from Text FSM result:
-                for value in result:
-                    fsm_result.append(dict(zip(fsm.header, value)))
+            if isinstance(command_output, Future):
+                try:
+                    # Collect output parsed in parser pool:
+                    fsm_result = command_output.result()
+                except BrokenProcessPool as error:
+                    logger.warning(
+                        f'Parser process was terminated ({error}), "{command}" command output is parsed in current process.',
+                        self.task_id, self.device_name)
+                    # Parser pool is created again on next use:
+                    parser_pool.reset()
+                    fsm_result = parse_command_output(device_type_command, command, raw_output)
+            else:
+                fsm_result = parse_command_output(device_type_command, command, command_output)
         except FileNotFoundError as error:
             self._log_error(logger, error)
         except textfsm.TextFSMError as error:
             self._log_error(logger, error)
         else:
+            # Log that there is no template for provided command:
+            if fsm_result is None:
+                logger.warning(
+                    f'There is no Text FSM template for "{command}" command.',
+                    self.task_id, self.device_name)
             return fsm_result
 
-    def open_connection(self):
-        """ Open a new SSH connection """
+    def open_connection(self, pooled: bool = False):
+        """
+        Open a new SSH connection
+
+        Parameters:
+        -----------------
+        pooled: Boolean
+            If True, live SSH session is collected from worker session pool
+            and returned to it by close_connection method.
+        """
+
+        # Use worker session pool:
+        self.pooled = pooled
 
         # Check if device need autodetect process:
         if self.supported_device is None:
             # Update device type based on information collected via SSH protocol:
             self.update_device_type()
-            # Connect to network device:
-            self._ssh_connect()
+            # Connect to network device, if autodetect SSH session was not reused:
+            if self.connection_status is not True:
+                self._ssh_connect()
         # Check connection status:
         elif self.connection_status is not True:
-            self._ssh_connect()
+            # Collect session from pool, or connect to network device:
+            if not (self.pooled and self._pooled_connect()):
+                self._ssh_connect()
 
         # Start connection timer if connected successfully:
         if self.connection_status:
@@ -281,7 +733,14 @@ class NetCon(Connection):
         """ End of SSH connection """
 
         # Check connection status:
-        if self.connection_status:
+        if self.connection_status and self.pooled:
+            # Return SSH session to worker session pool:
+            session_pool.release(self._session_pool_key(), self.connection)
+            # Log release of SSH connection:
+            logger.info('SSH session returned to pool.', self.task_id, self.device_name)
+            # End session timer:
+            self._end_connection_timer(logger)
+        elif self.connection_status:
             # Close SSH connection:
             self.connection.disconnect()
             # Log close of SSH connection:
@@ -289,8 +748,18 @@ class NetCon(Connection):
             # End session timer:
             self._end_connection_timer(logger)
 
-    def update_device_type(self):
-        """ Obtain network device type information using SSH protocol. And update Device type object. """
+    def update_device_type(self, save: bool = True):
+        """
+        Obtain network device type information using SSH protocol. And update Device type object.
+        Device type is collected from cached device fingerprint (hostname and SSH server identification
+        string of autodetect session) when possible, otherwise from Netmiko autodetect methods.
+        Autodetect SSH session is kept open and reused as the device connection.
+
+        Parameters:
+        -----------------
+        save: Boolean
+            If False, device object is updated but not saved to database (e.g. for bulk update).
+        """
 
         # Log begining of network device type checking proccess:
         logger.info(
@@ -299,15 +768,18 @@ class NetCon(Connection):
 
         # Connect to device to check device type, using SSH protocol:
         discovered_device_type = self._ssh_connect(autodetect=True)
-
         # Collect device type ID:
         device_name_id = collect_device_type_id_from_name(discovered_device_type, netmiko=True)
 
+        # Reuse autodetect SSH session as device connection:
+        self._reuse_autodetect_connection(discovered_device_type if device_name_id else None)
+
         if device_name_id:
             try: # Update current device object:
                 # Update device object:
                 self.device.device_type = device_name_id
-                self.device.save()         
+                if save:
+                    self.device.save()
             except: # Return exception if there is a problem during the update of the device type object:
                 logger.info(
                     f'When updating the device type, an exception occurs.',
@@ -315,22 +787,48 @@ class NetCon(Connection):
                 # Return collected device type name:
                 return discovered_device_type
             else:
-                # Log end of SSH connection
-                logger.info(
-                    'Device object has been updated.',
-                    self.task_id, self.device_name)
-                # Update device type attribute:
+                # Log end of SSH connection, unsaved devices are saved by caller (e.g. bulk update):
+                if save:
+                    logger.info(
+                        'Device object has been updated.',
+                        self.task_id, self.device_name)
+                # Update device type attributes:
                 self.device_type = device_name_id
+                self.supported_device = bool(discovered_device_type)
                 # Return collected device type name:
                 return discovered_device_type
-        
+
         else:
             # Inform that current device type is not supported:
             self._log_error(logger, f'Device {self.device_hostname} is currently not supported.')
             # Return collected device type name:
             return discovered_device_type
 
-    def enabled_commands(self, commands: str or list, expect_string: str = False) -> str or list:
+    def _reuse_autodetect_connection(self, device_type_name):
+        """ Change autodetect SSH session to a session of discovered device type, or close it. """
+
+        # Check if autodetect SSH session is open:
+        if self.connection_status and isinstance(getattr(self, 'connection', None), SSHDetect):
+            autodetect_connection = self.connection.connection
+            if device_type_name:
+                try:
+                    # Change Netmiko class of the SSH session to discovered device type:
+                    redispatch(autodetect_connection, device_type=device_type_name)
+                except (OSError, ssh_exception.SSHException, NetMikoTimeoutException) as error:
+                    # Session was closed during preparation, device is connected again by open_connection:
+                    logger.warning(
+                        f'Autodetect SSH session could not be reused ({error}).',
+                        self.task_id, self.device_name)
+                    autodetect_connection.disconnect()
+                    self.connection_status = None
+                else:
+                    self.connection = autodetect_connection
+            else:
+                # Close SSH session of unsupported device:
+                autodetect_connection.disconnect()
+                self.connection_status = False
+
+    def enabled_commands(self, commands: str or list, expect_string: str = False, batch: bool = False, parse_pool: bool = False, parse: bool or str = True, multiplex: bool = False) -> str or list:
         """
         Retrieves a string or list containing network CLI commands, and sends them to a network device using SSH protocol.
         ! Usable only with enable levels commend/s.
@@ -343,8 +841,18 @@ class NetCon(Connection):
             Provided device object, to establish a SSH connection.
         expect_string: String
             Specifies the Celery task ID value, that will be added to logs messages.
-        api: bool
-            If True, method will return output in dictionary format (Using regex).
+        batch: bool
+            If True, commands without expect string are written to device at once
+            and their outputs are read back in a single round trip.
+        parse_pool: bool
+            If True, command outputs are parsed in parser processes,
+            while next commands are executed.
+        parse: bool or String
+            If True, command outputs are processed to dictionaries, if False processing is skipped.
+            If 'lazy', command outputs are processed on first read of "proccessed_output".
+        multiplex: bool
+            If True, commands without expect string are executed concurrently over many
+            exec channels of the same SSH transport, up to device type "channels" limit.
 
         Return:
         --------
@@ -365,35 +873,79 @@ class NetCon(Connection):
             # Raise exception:
             raise TypeError('The provided expect string variable must be a string.')
 
+        # Check if provided parse variable is valid:
+        if parse not in (True, False, 'lazy'):
+            # Raise exception:
+            raise TypeError('The provided parse variable must be a boolean or "lazy" string.')
+
+        # Command output processing mode:
+        self.parse = parse
+        # Parse command output in parser processes:
+        self.parse_pool = parse_pool
+
         # Check connection status:
         if self.connection_status:
 
             # Start clock count:
             start_time = self._start_execution_timer()
 
-            # Collect data from device:
-            return_data = {}
+            # Load learned read timeouts of all commands at once, new samples are stored after execution:
+            if self.adaptive_timeouts:
+                self._load_command_timing(commands)
 
-            # First option: comand is string:
-            if isinstance(commands, str):
-                # Save command execution output to dictionary:
-                return_data[commands] = self._enabled_command_execution(commands, expect_string)
+            try:
+                # Collect data from device:
+                return_data = {}
 
-            elif isinstance(commands, list) or isinstance(commands, tuple):
-                for command in commands:
+                # First option: comand is string:
+                if isinstance(commands, str):
+                    # Save command execution output to dictionary:
+                    return_data[commands] = self._enabled_command_execution(commands, expect_string)
 
-                    # Second option: comand is list / tuple of strings:
-                    if isinstance(command, str):
-                        # Save command execution output to dictionary:
-                        return_data[command] = self._enabled_command_execution(command)
+                elif isinstance(commands, list) or isinstance(commands, tuple):
 
-                    # Third option: comand is list / tuple of lists or tuples:
-                    elif isinstance(command, list) or isinstance(command, tuple):
-                        # Save command execution output to dictionary:
-                        return_data[command] = self._enabled_command_execution(command[0], command[1])
-                    else:
+                    # Execute all string commands concurrently or in a single round trip:
+                    batch_data = {}
+                    batch_commands = [command for command in commands if isinstance(command, str)]
+                    channels = collect_device_type_value_from_id(self.device_type, 'channels', 1)
+                    # Outputs are returned by command, so the same command can not be sent twice in one batch:
+                    if (batch or multiplex) and len(set(batch_commands)) != len(batch_commands):
                         # Raise exception:
-                        raise TypeError('Wrong data type.')
+                        raise TypeError('The provided batched or multiplexed commands must be unique.')
+                    if multiplex and channels > 1 and batch_commands:
+                        batch_data = self._multiplexed_command_execution(batch_commands, channels)
+                    elif batch and batch_commands:
+                        batch_data = self._batched_command_execution(batch_commands)
+
+                    for command in commands:
+
+                        # Second option: comand is list / tuple of strings:
+                        if isinstance(command, str) and command in batch_data:
+                            # Save batched command execution output to dictionary:
+                            return_data[command] = batch_data[command]
+                        elif isinstance(command, str):
+                            # Save command execution output to dictionary:
+                            return_data[command] = self._enabled_command_execution(command)
+
+                        # Third option: comand is list / tuple of lists or tuples:
+                        elif isinstance(command, list) or isinstance(command, tuple):
+                            # Save command execution output to dictionary:
+                            return_data[command] = self._enabled_command_execution(command[0], command[1])
+                        else:
+                            # Raise exception:
+                            raise TypeError('Wrong data type.')
+
+                # Collect outputs parsed in parser pool:
+                for command_data in return_data.values() if self.parse is True else ():
+                    if isinstance(command_data['proccessed_output'], Future):
+                        command_data['proccessed_output'] = self._process_command_output_to_dictionary(
+                            command_data['command'], command_data['proccessed_output'], command_data['command_output'])
+
+            finally:
+                # Store new command execution times:
+                if self.adaptive_timeouts:
+                    self._command_timing.flush()
+                    del self._command_timing
 
             # Finish clock count & method execution time:
             self._end_execution_timer(start_time, logger, commands)
@@ -405,6 +957,115 @@ class NetCon(Connection):
             self._log_error(
                 logger, 'Command/s could not be executed because SSH connection was interrupted.')
 
+    def stream_command(self, command: str, read_timeout: int = None):
+        """
+        Sends network CLI command to a network device using SSH protocol,
+        and yields command output in chunks, as they arrive from SSH channel.
+        ! Usable only with enable levels commend.
+
+        Parameters:
+        -----------------
+        command: String
+            CLI command, that will be executed on device.
+        read_timeout: Intiger
+            Number of seconds to wait for next chunk of command output (Optional).
+
+        Return:
+        --------
+        Generator of command output strings.
+        Raises TimeoutError if output stopped arriving before device prompt, so incomplete output is not treated as complete.
+        """
+
+        # Check if provided command variable is valid string:
+        if not isinstance(command, str):
+            raise TypeError('The provided command variable must be a string.')
+
+        # Check connection status:
+        if not self.connection_status:
+            # Inform that the command cannot be sent:
+            self._log_error(
+                logger, 'Command could not be executed because SSH connection was interrupted.')
+            return
+
+        # Log start of command execution:
+        logger.debug(
+            f'Streaming of a new enabled CLI command "{command}" has been started.',
+            self.task_id, self.device_name)
+
+        # Device prompt, that ends command output:
+        prompt_pattern = re.compile(re.escape(self.connection.base_prompt) + r'[>#]\s*$')
+        if read_timeout is None:
+            read_timeout = self.stream_read_timeout
+
+        # Start clock count:
+        start_time = self._start_execution_timer()
+
+        self.connection.write_channel(f'{command}{self.connection.RETURN}')
+
+        echo = True
+        remainder = ''
+        deadline = time.monotonic() + read_timeout
+        while True:
+            data = self.connection.read_channel()
+            if not data:
+                if time.monotonic() > deadline:
+                    error = f'Output of "{command}" command was not received in {read_timeout} seconds.'
+                    self._log_error(logger, error)
+                    raise TimeoutError(error)
+                time.sleep(0.01)
+                continue
+            deadline = time.monotonic() + read_timeout
+
+            # Yield only complete lines, last incomplete line can be a device prompt:
+            lines, separator, remainder = (remainder + data.replace('\r', '')).rpartition('\n')
+            if separator:
+                lines += separator
+                if echo:
+                    # Remove command echo from command output:
+                    lines = lines.split('\n', 1)[1]
+                    echo = False
+                if lines:
+                    yield lines
+            if prompt_pattern.search(remainder):
+                break
+
+        # Log end of command execution:
+        logger.info(
+            f'The enabled CLI command "{command}" has been streamed.',
+            self.task_id, self.device_name)
+        # Finish clock count & method execution time:
+        self._end_execution_timer(start_time, logger, command)
+
+    def stream_parsed_command(self, command: str, read_timeout: int = None):
+        """
+        Sends network CLI command to a network device using SSH protocol,
+        and yields records parsed by Text FSM, as command output arrives from SSH channel.
+        ! Usable only with enable levels commend.
+
+        Parameters:
+        -----------------
+        command: String
+            CLI command, that will be executed on device.
+        read_timeout: Intiger
+            Number of seconds to wait for next chunk of command output (Optional).
+
+        Return:
+        --------
+        Generator of dictionaries.
+        Raises TimeoutError if command output was not received completely.
+        """
+
+        # Collect template data:
+        device_type_command = collect_device_type_commands_from_id(self.device_type)
+
+        try: # Try to parse streamed data from Text FSM:
+            yield from iter_parse_command_output(
+                device_type_command, command, self.stream_command(command, read_timeout))
+        except FileNotFoundError as error:
+            self._log_error(logger, error)
+        except textfsm.TextFSMError as error:
+            self._log_error(logger, error)
+
     def configuration_commands(self, commands: str or list) -> str:
         """
         Retrieves a string or list containing network CLI commands, and sends them to a network device using SSH protocol.
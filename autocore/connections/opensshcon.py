@@ -0,0 +1,457 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
+import tempfile
+import select
+import codecs
+import stat
+import hashlib
+import time
+import os
+
+# Connection Import:
+from .netcon import NetCon
+
+# Device health Import:
+from .device_health import DeviceHealth
+from .device_health import AUTHENTICATION
+from .device_health import ERROR
+
+# Device name translation Import:
+from .device_name_translation import collect_device_type_value_from_id
+
+# Logger import:
+from logger.logger import Logger
+
+# Logger class initiation:
+logger = Logger('OpenSSH connection')
+
+# OpenSSH client exit status of connection errors:
+SSH_ERROR = 255
+
+# Askpass script, that returns password from environment variable:
+ASKPASS_SCRIPT = '#!/bin/sh\nprintf \'%s\\n\' "$AUTOCLI_SSH_PASSWORD"\n'
+
+
+def collect_connection_class(device_type_id: int) -> type:
+    """ Return SSH connection class selected by device type "transport" value. """
+
+    if collect_device_type_value_from_id(device_type_id, 'transport') == 'openssh':
+        return OpenSSHCon
+    return NetCon
+
+
+# Main OpenSSHCon class:
+class OpenSSHCon(NetCon):
+    """
+    The OpenSSHCon class executes CLI commands using the system OpenSSH client.
+    First connection to device starts ControlMaster process, that keeps authenticated
+    SSH connection open for ControlPersist seconds. Every command runs as a new
+    exec channel of the master connection, also from other connections and workers.
+    Device type autodetect still uses Netmiko.
+
+    Attributes:
+    -----------------
+    control_dir:
+        Directory of ControlMaster sockets and askpass script, owned by current user only.
+    control_persist:
+        Number of seconds, that idle master connection is kept open.
+
+    Methods:
+    --------
+    stop_master:
+        Close ControlMaster connection of device.
+    """
+
+    # OpenSSH client settings:
+    ssh_binary = 'ssh'
+    control_dir = os.path.join(tempfile.gettempdir(), f'autocli-ssh-{os.getuid()}')
+    control_persist = 600
+    connect_timeout = 10
+    default_read_timeout = 100
+    _askpass_written = False
+    _control_dir_checked = None
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class OpenSSHCon ({self.device_name}/{self.device_hostname})>'
+
+    def _control_directory(self) -> str:
+        """
+        Create control directory, or verify that existing directory is owned by current user
+        and not accessible by other users, as it contains askpass script and master sockets.
+        """
+
+        if OpenSSHCon._control_dir_checked != self.control_dir:
+            os.makedirs(self.control_dir, mode=0o700, exist_ok=True)
+            # Symbolic link is not followed, so directory can not be replaced by link to other directory:
+            status = os.lstat(self.control_dir)
+            if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid():
+                raise PermissionError(f'OpenSSH control directory {self.control_dir} is not owned by current user.')
+            if stat.S_IMODE(status.st_mode) & 0o077:
+                raise PermissionError(f'OpenSSH control directory {self.control_dir} is accessible by other users.')
+            OpenSSHCon._control_dir_checked = self.control_dir
+        return self.control_dir
+
+    def _control_path(self) -> str:
+        """ Return ControlMaster socket path, short enough for UNIX socket path limit. """
+
+        key = f'{self.device_username}@{self.device_hostname}:{self.device_ssh_port}'
+        return os.path.join(self._control_directory(), hashlib.sha256(key.encode()).hexdigest()[:20])
+
+    def _askpass_path(self) -> str:
+        """ Create askpass script, used to provide password to OpenSSH client. """
+
+        path = os.path.join(self._control_directory(), 'askpass')
+        # Script is written once per process, so script created by older version is replaced:
+        if not OpenSSHCon._askpass_written:
+            # Script is replaced atomically, as it can be executed by other workers:
+            temporary_path = f'{path}.{os.getpid()}'
+            with open(temporary_path, 'w') as file:
+                file.write(ASKPASS_SCRIPT)
+            os.chmod(temporary_path, 0o700)
+            os.replace(temporary_path, path)
+            OpenSSHCon._askpass_written = True
+        return path
+
+    def _ssh_command(self, *options, command: str = None, master: bool = False) -> list:
+        """
+        Create OpenSSH client command line.
+        Commands use running master connection, without starting a new one,
+        so they never fork to background with output pipes open.
+        OpenSSH uses the first value of each option, so master options are added here.
+        """
+
+        if master:
+            control_options = ['-o', 'ControlMaster=yes', '-o', f'ControlPersist={self.control_persist}']
+        else:
+            control_options = ['-o', 'ControlMaster=no']
+
+        ssh_command = [
+            self.ssh_binary,
+            '-p', str(self.device_ssh_port),
+            '-l', self.device_username,
+            *control_options,
+            '-o', f'ControlPath={self._control_path()}',
+            '-o', f'ConnectTimeout={self.connect_timeout}',
+            '-o', 'StrictHostKeyChecking=no',
+            '-o', 'UserKnownHostsFile=/dev/null',
+            '-o', 'PreferredAuthentications=password,keyboard-interactive',
+            '-o', 'NumberOfPasswordPrompts=1',
+            '-o', 'LogLevel=ERROR',
+            *options,
+            self.device_hostname]
+        if command is not None:
+            ssh_command.append(command)
+        return ssh_command
+
+    def _ssh_environment(self) -> dict:
+        """ Return OpenSSH client environment, with password provided by askpass script. """
+
+        return {
+            **os.environ,
+            'SSH_ASKPASS': self._askpass_path(),
+            'SSH_ASKPASS_REQUIRE': 'force',
+            'DISPLAY': os.environ.get('DISPLAY', ':0'),
+            'AUTOCLI_SSH_PASSWORD': self.device_password or '',
+        }
+
+    def _run(self, ssh_command: list, timeout: float, input: str = None):
+        """ Run OpenSSH client and return completed process. """
+
+        return subprocess.run(
+            ssh_command,
+            input=input,
+            stdin=subprocess.DEVNULL if input is None else None,
+            capture_output=True,
+            text=True,
+            errors='replace',
+            timeout=timeout,
+            env=self._ssh_environment())
+
+    def _ssh_connect(self, autodetect: bool = False) -> str:
+        """
+        Start ControlMaster connection to device, or reuse already running master connection.
+        Device type autodetect uses Netmiko SSH connection.
+        """
+
+        if autodetect:
+            return super()._ssh_connect(autodetect=True)
+
+        # Check if device is supported before connection attempt:
+        if self.supported_device is False:
+            # Log unsupported device type:
+            self._log_error(logger, f'Device {self.device_hostname} is not supported')
+            return False
+
+        # Jump host channels are provided only by Paramiko transport:
+        if self.device_jump_host is not None:
+            self._log_error(
+                logger, f'Device {self.device_hostname} is reached through jump host, that is not supported by OpenSSH connection.')
+            return False
+
+        # Check device health before connection attempt:
+        health = DeviceHealth(self.device_hostname, self.device_ssh_port)
+        if not health.allow_request():
+            # Log skipped connection to unreachable device:
+            self._log_error(
+                logger, f'SSH connection to device {self.device_hostname} was skipped, device is marked as unreachable.')
+            return self.connection_status
+
+        # Reuse running master connection:
+        try:
+            if self._run(self._ssh_command('-O', 'check'), self.connect_timeout).returncode == 0:
+                logger.debug(
+                    f'OpenSSH master connection to device {self.device_hostname} was reused.',
+                    self.task_id, self.device_name)
+                self.connection = self._control_path()
+                self.connection_status = True
+                return self.connection
+        except (OSError, subprocess.TimeoutExpired) as error:
+            self._log_error(logger, error)
+            return self.connection_status
+
+        # Performs a specified number of SSH connection attempts to a specified device:
+        for connection_attempts in range(1, self.repeat_connection + 1):
+
+            # Wait jittered exponential backoff time before next attempt:
+            if connection_attempts != 1:
+                time.sleep(health.retry_delay(connection_attempts - 1, self.repeat_connection_time))
+
+            # Log stat of a new SSH connection attempt:
+            logger.debug(
+                f'OpenSSH master connection to device {self.device_hostname} has been started (Attempt: {connection_attempts}).',
+                self.task_id, self.device_name)
+
+            try: # Start master connection in background:
+                process = self._start_master()
+            except (OSError, subprocess.TimeoutExpired) as error:
+                self._log_error(logger, error)
+                # Retry connection, if failure type allows it:
+                if self._connection_failure(health, error, ERROR):
+                    continue
+                return self.connection_status
+
+            if process.returncode != 0:
+                error = ConnectionError(process.stderr.strip() or f'OpenSSH client exit status {process.returncode}.')
+                self._log_error(logger, error)
+                # Authentication errors are not retried:
+                failure_type = AUTHENTICATION if 'Permission denied' in str(error) else ERROR
+                if self._connection_failure(health, error, failure_type):
+                    continue
+                return self.connection_status
+
+            # Change connection status to True:
+            self.connection = self._control_path()
+            self.connection_status = True
+            # Close device circuit breaker:
+            health.record_success()
+            # Log the start of a new connection:
+            logger.info(
+                f'OpenSSH master connection to device {self.device_hostname} has been established (Attempt: {connection_attempts}).',
+                self.task_id, self.device_name)
+            return self.connection
+
+        # Return connection starus:
+        return self.connection_status
+
+    def _start_master(self):
+        """
+        Start ControlMaster connection, that forks to background after authentication.
+        Background process keeps its file descriptors, so output is not collected by pipes.
+        """
+
+        with tempfile.TemporaryFile(mode='w+') as stderr:
+            process = subprocess.run(
+                self._ssh_command('-N', '-f', master=True),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr,
+                timeout=self.connect_timeout * 2,
+                env=self._ssh_environment())
+            stderr.seek(0)
+            process.stderr = stderr.read()
+        return process
+
+    def _reuse_autodetect_connection(self, device_type_name):
+        """ Close Netmiko autodetect SSH session, commands are executed by OpenSSH client. """
+
+        super()._reuse_autodetect_connection(device_type_name)
+        if self.connection_status and not isinstance(self.connection, str):
+            self.connection.disconnect()
+            self.connection_status = None
+
+    def _exec_command(self, command: str) -> str:
+        """ Execute command in a new exec channel of master connection. """
+
+        read_timeout = self._command_timeout_kwargs(command)[1]
+        start_time = time.perf_counter()
+
+        try:
+            process = self._run(self._ssh_command(command=command), read_timeout)
+        except subprocess.TimeoutExpired:
+            # Next read timeout of command will be longer:
+            if self.adaptive_timeouts:
+                self._command_timing.record_timeout(self.device_type, command, read_timeout)
+            raise TimeoutError(f'Output of "{command}" command was not received in {read_timeout} seconds.')
+
+        if process.returncode == SSH_ERROR:
+            raise ConnectionError(process.stderr.strip() or 'OpenSSH connection error.')
+
+        # Store command execution time:
+        if self.adaptive_timeouts:
+            self._command_timing.record(self.device_type, command, time.perf_counter() - start_time)
+        return process.stdout.replace('\r\n', '\n').replace('\r', '').strip('\n')
+
+    def _command_timeout_kwargs(self, command: str):
+        """ Return learned read timeout of command, Netmiko arguments are not used. """
+
+        read_timeout = self._command_timing.read_timeout(self.device_type, command) if self.adaptive_timeouts else None
+        return {}, read_timeout or self.default_read_timeout
+
+    def _enabled_command_execution(self, command: str, expect_string: str = False) -> str:
+        """
+        Enabled CLI command execution in exec channel of master connection.
+        ! Exec channel ends with command output, expect string is not used.
+        """
+
+        # Log start of command execution:
+        logger.debug(
+            f'Sending of a new enabled CLI command "{command}" has been started.',
+            self.task_id, self.device_name)
+
+        return_data = {
+            'command': command,
+            'expect_string': expect_string,
+            'command_output': None,
+            'proccessed_output': None,
+            'error': None
+        }
+
+        try:
+            command_output = self._exec_command(command)
+        except OSError as error:
+            self._log_error(logger, error)
+            # Add error to return data:
+            return_data['command_output'] = False
+            return_data['error'] = error
+            # Return connection starus:
+            return return_data
+
+        else:
+            # Log end of command execution:
+            logger.info(
+                f'The enabled CLI command "{command}" has been sent.',
+                self.task_id, self.device_name)
+
+            # Return data:
+            return self._command_output_to_return_data(return_data, command_output)
+
+    def _multiplexed_command_execution(self, commands: list, channels: int) -> dict:
+        """ Enabled CLI commands execution in concurrent exec channels of master connection. """
+
+        with ThreadPoolExecutor(max_workers=channels) as executor:
+            return dict(zip(commands, executor.map(self._enabled_command_execution, commands)))
+
+    def _batched_command_execution(self, commands: list, read_timeout: int = None) -> dict:
+        """ Exec channels of master connection do not require round trip batching. """
+
+        channels = collect_device_type_value_from_id(self.device_type, 'channels', 1)
+        return self._multiplexed_command_execution(commands, channels)
+
+    def _config_command_execution(self, command: str or list) -> str:
+        """ Configuration CLI command execution in interactive shell of master connection. """
+
+        # Log start of command execution:
+        logger.debug(
+            f'Sending of a new configuration CLI command "{command}" has been started.',
+            self.task_id, self.device_name)
+
+        commands = [command] if isinstance(command, str) else command
+        shell_input = '\n'.join(['configure terminal', *commands, 'end', 'exit', ''])
+
+        try:
+            process = self._run(
+                self._ssh_command('-tt'), self.default_read_timeout, input=shell_input)
+            if process.returncode == SSH_ERROR:
+                raise ConnectionError(process.stderr.strip() or 'OpenSSH connection error.')
+
+        except (OSError, subprocess.TimeoutExpired) as error:
+            self._log_error(logger, error)
+            # Return connection starus:
+            return self.connection_status
+
+        else:
+            # Log end of command execution:
+            logger.info(
+                f'The configuration CLI command "{command}" has been sent.',
+                self.task_id, self.device_name)
+            # Return command output:
+            return process.stdout.replace('\r\n', '\n').replace('\r', '')
+
+    def stream_command(self, command: str, read_timeout: int = None):
+        """
+        Yield command output in chunks, as they arrive from exec channel.
+        TimeoutError is raised, if next chunk is not received in read timeout seconds,
+        and ConnectionError, if OpenSSH client could not execute command.
+        """
+
+        if read_timeout is None:
+            read_timeout = self.stream_read_timeout
+
+        # Multibyte characters can be split between chunks:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+        # Unbuffered output pipe, so select reports all data that was not read yet:
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                self._ssh_command(command=command),
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=stderr,
+                bufsize=0, env=self._ssh_environment())
+            try:
+                while True:
+                    ready, _, _ = select.select([process.stdout], [], [], read_timeout)
+                    if not ready:
+                        error = f'Output of "{command}" command was not received in {read_timeout} seconds.'
+                        self._log_error(logger, error)
+                        raise TimeoutError(error)
+                    chunk = process.stdout.read(65535)
+                    if not chunk:
+                        break
+                    output = decoder.decode(chunk).replace('\r', '')
+                    if output:
+                        yield output
+                output = decoder.decode(b'', final=True).replace('\r', '')
+                if output:
+                    yield output
+
+                # Output ends also when OpenSSH client fails:
+                if process.wait(timeout=self.connect_timeout) == SSH_ERROR:
+                    stderr.seek(0)
+                    error = stderr.read().decode(errors='replace').strip() or 'OpenSSH connection error.'
+                    self._log_error(logger, error)
+                    raise ConnectionError(error)
+            finally:
+                process.kill()
+                process.wait()
+
+    def close_connection(self):
+        """ End of connection, master connection is kept open for next sessions. """
+
+        if self.connection_status:
+            # Log close of session:
+            logger.info('OpenSSH session ended.', self.task_id, self.device_name)
+            # End session timer:
+            self._end_connection_timer(logger)
+
+    def stop_master(self) -> None:
+        """ Close ControlMaster connection of device. """
+
+        try:
+            self._run(self._ssh_command('-O', 'exit'), self.connect_timeout)
+        except (OSError, subprocess.TimeoutExpired) as error:
+            self._log_error(logger, error)
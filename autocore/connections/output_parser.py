@@ -0,0 +1,86 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Text FSM template cache Import:
+from .template_cache import template_cache
+from .template_index import template_index
+
+
+def parse_command_output(device_type_command: str, command: str, command_output: str) -> list:
+    """
+    Convert command output to list of dictionaries based on Text FSM templates.
+
+    Parameters:
+    -----------------
+    device_type_command: String
+        Text FSM device type name (e.g. cisco_ios).
+    command: String
+        Full or abbreviated CLI command.
+    command_output: String
+        Raw CLI command output.
+
+    Return:
+    --------
+    List of dictionaries, or None if there is no template for provided command.
+    Template errors are raised as FileNotFoundError or textfsm.TextFSMError.
+    """
+
+    # Resolve full or abbreviated command to Text FSM template:
+    resolved = template_index.resolve(device_type_command, command)
+    if resolved is None:
+        return None
+    canonical_command, path = resolved
+
+    # Collect compiled template from process-wide cache:
+    fsm = template_cache.get(device_type_command, canonical_command, path)
+    result = fsm.ParseText(command_output)
+
+    # Create one or many dictionaries from Text FSM result:
+    return [dict(zip(fsm.header, value)) for value in result]
+
+
+def iter_parse_command_output(device_type_command: str, command: str, command_output):
+    """
+    Convert command output to dictionaries row by row, based on Text FSM templates.
+    Parsed records are yielded as soon as Text FSM records them, so memory
+    usage does not depend on the size of command output.
+    ! Fillup values can not update records that were already yielded.
+
+    Parameters:
+    -----------------
+    device_type_command: String
+        Text FSM device type name (e.g. cisco_ios).
+    command: String
+        Full or abbreviated CLI command.
+    command_output: Iterable
+        Iterable of raw CLI command output chunks.
+
+    Return:
+    --------
+    Generator of dictionaries, empty if there is no template for provided command.
+    """
+
+    # Resolve full or abbreviated command to Text FSM template:
+    resolved = template_index.resolve(device_type_command, command)
+    if resolved is None:
+        return
+    canonical_command, path = resolved
+
+    # Collect compiled template from process-wide cache:
+    fsm = template_cache.get(device_type_command, canonical_command, path)
+
+    remainder = ''
+    for chunk in command_output:
+        # Feed only complete lines to Text FSM:
+        lines, _, remainder = (remainder + chunk).rpartition('\n')
+        if lines:
+            result = fsm.ParseText(lines, eof=False)
+            for value in result:
+                yield dict(zip(fsm.header, value))
+            # Drop already yielded records:
+            del result[:]
+
+    # Parse last line and run EOF state:
+    for value in fsm.ParseText(remainder, eof=True):
+        yield dict(zip(fsm.header, value))
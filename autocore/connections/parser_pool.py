@@ -0,0 +1,142 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+from concurrent.futures.process import BrokenProcessPool
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import Future
+import threading
+
+# Device name translation Import:
+from .device_name_translation import template as device_types
+
+# Text FSM parser Import:
+from .output_parser import parse_command_output
+from .template_index import template_index
+from .template_cache import template_cache
+
+
+def _warm_up() -> None:
+    """ Build template index and compile templates of collection commands in parser process. """
+
+    template_index.build()
+    for device_type in device_types.values():
+        textfsm_name = device_type.get('textfsm')
+        for command in device_type.get('commands', []):
+            resolved = template_index.resolve(textfsm_name, command)
+            if resolved is not None:
+                template_cache.get(textfsm_name, *resolved)
+
+
+# Main ParserPool class:
+class ParserPool:
+    """
+    Pool of worker processes, that convert command output to dictionaries based on Text FSM templates.
+    Text FSM parsing holds the GIL, running it in separate processes lets SSH sessions
+    of the current process keep reading devices while outputs are parsed.
+
+    Attributes:
+    -----------------
+    max_workers:
+        Number of parser processes.
+
+    Methods:
+    --------
+    submit:
+        Schedule command output parsing and return Future object.
+    reset:
+        Drop broken process pool, a new one is created on next use.
+    shutdown:
+        Stop parser processes.
+    """
+
+    def __init__(self, max_workers: int = None) -> None:
+        """
+        Parameters:
+        -----------------
+        max_workers: Intiger
+            Number of parser processes, defaults to number of CPUs.
+        """
+
+        # Verify if the specified max workers variable is a positive intiger:
+        if max_workers is None or (isinstance(max_workers, int) and max_workers > 0):
+            self.max_workers = max_workers
+        else:
+            raise TypeError('The provided max workers variable must be a positive intiger.')
+
+        # Process pool is created on first use:
+        self._executor = None
+        self._lock = threading.Lock()
+        # Parse in current process, if parser processes can't be started:
+        self._inline = False
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class ParserPool ({self.max_workers} workers)>'
+
+    def _collect_executor(self):
+        """ Create process pool on first use. """
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=_warm_up)
+            return self._executor
+
+    def submit(self, device_type_command: str, command: str, command_output: str) -> Future:
+        """
+        Schedule command output parsing in parser process.
+
+        Parameters:
+        -----------------
+        device_type_command: String
+            Text FSM device type name (e.g. cisco_ios).
+        command: String
+            Full or abbreviated CLI command.
+        command_output: String
+            Raw CLI command output.
+
+        Return:
+        --------
+        Future object, that result is a list of dictionaries or None.
+        """
+
+        if self._inline is False:
+            try:
+                return self._collect_executor().submit(
+                    parse_command_output, device_type_command, command, command_output)
+            # Parser process was terminated (e.g. killed by OOM killer), pool is created again on next use:
+            except BrokenProcessPool:
+                self.reset()
+            # Processes can't be started from daemonic processes (e.g. Celery prefork worker):
+            except (AssertionError, OSError, RuntimeError):
+                self._inline = True
+
+        # Parse command output in current process:
+        future = Future()
+        try:
+            future.set_result(parse_command_output(device_type_command, command, command_output))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    def reset(self) -> None:
+        """ Drop broken process pool, a new one is created on next use. """
+
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def shutdown(self) -> None:
+        """ Stop parser processes. """
+
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+# Process-wide parser pool:
+parser_pool = ParserPool()
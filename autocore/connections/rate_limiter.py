@@ -0,0 +1,354 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+from contextlib import contextmanager, asynccontextmanager
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import threading
+import asyncio
+import time
+
+# Device name translation Import:
+from .device_name_translation import collect_device_type_value_from_id
+
+# Default request limits (used if device type does not define "api_limits" value):
+DEFAULT_RATE = None
+DEFAULT_BURST = 10
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# Retry-After settings:
+DEFAULT_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+MAX_RETRIES = 3
+
+# Minimum wait time counted as queued request:
+QUEUED_WAIT_TIME = 0.001
+
+# Number of seconds, after which limits of unused device are removed:
+DEVICE_IDLE_TTL = 600
+
+
+def collect_retry_after(response) -> float:
+    """
+    Return number of seconds from Retry-After header of 429 or 503 response.
+    429 responses without Retry-After header are retried after default delay,
+    other responses return None (request should not be repeated).
+    """
+
+    status_code = getattr(response, 'status_code', None) or getattr(response, 'status', None)
+    if status_code not in (429, 503):
+        return None
+
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return DEFAULT_RETRY_AFTER if status_code == 429 else None
+
+    # Retry-After is a number of seconds or HTTP date:
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            delay = DEFAULT_RETRY_AFTER
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+class DeviceLimit:
+    """
+    Token bucket and in-flight request limit of a single device.
+    In-flight requests are counted once for threads and all event loops of worker.
+    """
+
+    def __init__(self, rate: float, burst: int, max_in_flight: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        # Futures of requests waiting on event loops, as (loop, future) tuples:
+        self._async_waiters = []
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.last_used = self.updated
+        # Time until device asked not to send requests (Retry-After):
+        self.blocked_until = 0.0
+
+    def _try_acquire(self) -> bool:
+        """ Take in-flight slot if available, condition lock must be held. """
+
+        if self.in_flight < self.max_in_flight:
+            self.in_flight += 1
+            self.last_used = time.monotonic()
+            return True
+        return False
+
+    def acquire(self) -> None:
+        """ Wait for in-flight slot in thread. """
+
+        with self._condition:
+            while not self._try_acquire():
+                self._condition.wait()
+
+    async def async_acquire(self) -> None:
+        """ Wait for in-flight slot, without blocking event loop. """
+
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._try_acquire():
+                    return
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await waiter[1]
+            finally:
+                with self._condition:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def release(self) -> None:
+        """ Release in-flight slot and wake waiting requests, they compete for released slot again. """
+
+        with self._condition:
+            self.in_flight -= 1
+            self.last_used = time.monotonic()
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # Event loop was closed meanwhile:
+                pass
+
+    def idle(self, now: float) -> bool:
+        """ Return True, if device has no requests and its limits would not differ from new limits. """
+
+        with self._condition:
+            busy = self.in_flight or self._async_waiters
+        refilled = self.rate is None or self.tokens + (now - self.updated) * self.rate >= self.burst
+        return not busy and refilled and self.blocked_until <= now and now - self.last_used > DEVICE_IDLE_TTL
+
+    def reserve(self, now: float) -> float:
+        """ Take one token from bucket and return delay, after which request can be sent. """
+
+        delay = max(self.blocked_until - now, 0.0)
+        if self.rate is None:
+            return delay
+
+        # Refill bucket and take token, negative number of tokens is a queue of reserved requests:
+        self.tokens = min(self.tokens + (now - self.updated) * self.rate, self.burst)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            delay = max(delay, -self.tokens / self.rate)
+        return delay
+
+
+def _wake(future) -> None:
+    """ Wake request waiting on event loop. """
+
+    if not future.done():
+        future.set_result(None)
+
+
+# Main RateLimiter class:
+class RateLimiter:
+    """
+    Per worker request limiter, shared by all ApiCon objects.
+    Requests to each device are limited by token bucket (requests per second and burst)
+    and by number of requests in flight, shared by threads and event loops of worker.
+    Requests above limits wait in queue instead of failing,
+    after 429/503 response with Retry-After header all requests to device are delayed.
+    Limits of devices unused for DEVICE_IDLE_TTL seconds are removed.
+    Limits are defined by device type "api_limits" value:
+
+        api_limits:
+          rate: 5            # Requests per second (Optional, unlimited by default).
+          burst: 10          # Number of requests sent at once after idle time.
+          max_in_flight: 2   # Number of concurrent requests.
+
+    Methods:
+    --------
+    slot:
+        Context manager, that waits for free request slot of device.
+    async_slot:
+        Asynchronous context manager, that waits for free request slot of device on event loop.
+    defer:
+        Delay all requests to device (Retry-After).
+    max_in_flight:
+        Return number of requests in flight allowed by device.
+    stats:
+        Return queue wait statistics.
+    """
+
+    def __init__(self) -> None:
+        # Limits per device:
+        self._devices = {}
+        self._lock = threading.Lock()
+        self._evicted = time.monotonic()
+
+        # Queue wait counters declaration:
+        self.requests = 0
+        self.queued = 0
+        self.deferred = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class RateLimiter ({len(self._devices)} devices)>'
+
+    def _device(self, connection) -> DeviceLimit:
+        """ Return limits of device, created from device type settings. """
+
+        key = (connection.device_hostname, connection.device_https_port)
+        with self._lock:
+            self._evict_idle()
+            device = self._devices.get(key)
+            if device is None:
+                limits = collect_device_type_value_from_id(connection.device_type, 'api_limits', {}) or {}
+                device = DeviceLimit(
+                    limits.get('rate', DEFAULT_RATE),
+                    limits.get('burst', DEFAULT_BURST),
+                    limits.get('max_in_flight', DEFAULT_MAX_IN_FLIGHT))
+                self._devices[key] = device
+            # Device used by request is not idle:
+            device.last_used = time.monotonic()
+            return device
+
+    def _evict_idle(self) -> None:
+        """ Remove limits of idle devices, at most once per idle TTL (lock must be held). """
+
+        now = time.monotonic()
+        if now - self._evicted < DEVICE_IDLE_TTL:
+            return
+        self._evicted = now
+        for key in [key for key, device in self._devices.items() if device.idle(now)]:
+            del self._devices[key]
+
+    def max_in_flight(self, connection) -> int:
+        """ Return number of requests in flight allowed by device. """
+
+        return self._device(connection).max_in_flight
+
+    def _record(self, wait_time: float) -> None:
+        """ Count queue wait time of request. """
+
+        with self._lock:
+            self.requests += 1
+            if wait_time > QUEUED_WAIT_TIME:
+                self.queued += 1
+                self.wait_time += wait_time
+                self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    @contextmanager
+    def slot(self, connection):
+        """
+        Wait for free request slot of device.
+
+        Parameters:
+        -----------------
+        connection: ApiCon
+            Connection object of device.
+
+        Return:
+        --------
+        Context manager, that returns queue wait time in seconds.
+        """
+
+        device = self._device(connection)
+        start_time = time.monotonic()
+
+        # Wait for in-flight request slot:
+        device.acquire()
+        try:
+            # Wait for token and Retry-After:
+            with self._lock:
+                delay = device.reserve(time.monotonic())
+            if delay > 0:
+                time.sleep(delay)
+
+            # Device could be deferred by other request meanwhile:
+            while device.blocked_until > time.monotonic():
+                time.sleep(max(device.blocked_until - time.monotonic(), 0.0))
+
+            wait_time = time.monotonic() - start_time
+            self._record(wait_time)
+            yield wait_time
+        finally:
+            device.release()
+
+    @asynccontextmanager
+    async def async_slot(self, connection):
+        """
+        Wait for free request slot of device, without blocking event loop.
+        In-flight limit is shared with threads and other event loops.
+
+        Parameters:
+        -----------------
+        connection: AsyncApiCon
+            Connection object of device.
+
+        Return:
+        --------
+        Asynchronous context manager, that returns queue wait time in seconds.
+        """
+
+        device = self._device(connection)
+        start_time = time.monotonic()
+
+        # Wait for in-flight request slot:
+        await device.async_acquire()
+        try:
+            # Wait for token and Retry-After:
+            with self._lock:
+                delay = device.reserve(time.monotonic())
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            # Device could be deferred by other request meanwhile:
+            while device.blocked_until > time.monotonic():
+                await asyncio.sleep(max(device.blocked_until - time.monotonic(), 0.0))
+
+            wait_time = time.monotonic() - start_time
+            self._record(wait_time)
+            yield wait_time
+        finally:
+            device.release()
+
+    def defer(self, connection, delay: float) -> None:
+        """ Delay all requests to device by provided number of seconds (Retry-After). """
+
+        device = self._device(connection)
+        with self._lock:
+            device.blocked_until = max(device.blocked_until, time.monotonic() + delay)
+            self.deferred += 1
+
+    def clear(self) -> None:
+        """ Remove all device limits, limits are created again from device type settings. """
+
+        with self._lock:
+            self._devices = {}
+
+    def stats(self) -> dict:
+        """ Return queue wait statistics. """
+
+        with self._lock:
+            return {
+                'devices': len(self._devices),
+                'requests': self.requests,
+                'queued': self.queued,
+                'deferred': self.deferred,
+                'wait_time': round(self.wait_time, 5),
+                'average_wait_time': round(self.wait_time / self.requests, 5) if self.requests else 0.0,
+                'max_wait_time': round(self.max_wait_time, 5),
+            }
+
+
+# Process-wide (per worker) rate limiter:
+rate_limiter = RateLimiter()
@@ -0,0 +1,185 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+from collections import OrderedDict
+import threading
+import time
+
+# Default response cache settings:
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+# Main ResponseCache class:
+class ResponseCache:
+    """
+    Per worker cache of decoded HTTPS GET responses, shared by all ApiCon objects.
+    Responses are stored with their ETag and Last-Modified validators, so next requests
+    can be sent as conditional requests and 304 responses are served from cache.
+    Least recently used responses are removed above total size of response bodies.
+
+    Attributes:
+    -----------------
+    max_bytes:
+        Maximum total size of cached response bodies.
+    size:
+        Current total size of cached response bodies.
+
+    Methods:
+    --------
+    key:
+        Create cache key from request data.
+    get:
+        Return cached response entry or None.
+    store:
+        Store decoded response with its validators.
+    invalidate:
+        Remove all cached responses of device.
+    clear:
+        Remove all cached responses.
+    stats:
+        Return cache statistics.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        Parameters:
+        -----------------
+        max_bytes: Intiger
+            Maximum total size of cached response bodies.
+        """
+
+        # Verify if the specified max bytes variable is a positive intiger:
+        if isinstance(max_bytes, int) and max_bytes > 0:
+            self.max_bytes = max_bytes
+        else:
+            raise TypeError('The provided max bytes variable must be a positive intiger.')
+
+        # Cached entries, least recently used first:
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+
+        # Cache counters declaration:
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class ResponseCache ({len(self._entries)} responses/{self.size} bytes)>'
+
+    def key(self, hostname: str, port: int, url: str, payload: str = None, headers: dict = None, credential: tuple = None) -> tuple:
+        """
+        Create cache key from request data.
+        Credential identity (e.g. ApiCon.credential_key) separates responses of users with different device permissions.
+        """
+
+        return (hostname, port, credential, url, payload, tuple(sorted((headers or {}).items())))
+
+    def get(self, key: tuple) -> dict:
+        """
+        Return cached response entry, or None.
+
+        Return:
+        --------
+        Dictionary with data, etag, last_modified, size and stored (monotonic time) keys.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key: tuple, data, size: int, etag: str = None, last_modified: str = None) -> None:
+        """
+        Store decoded response with its validators.
+
+        Parameters:
+        -----------------
+        key: Tuple
+            Cache key created by key method.
+        data: Object
+            Decoded response data.
+        size: Intiger
+            Size of response body in bytes.
+        etag: String
+            ETag header value (Optional).
+        last_modified: String
+            Last-Modified header value (Optional).
+        """
+
+        # Responses larger than cache are not stored:
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous['size']
+
+            self._entries[key] = {
+                'data': data,
+                'etag': etag,
+                'last_modified': last_modified,
+                'size': size,
+                'stored': time.monotonic(),
+            }
+            self.size += size
+
+            # Remove least recently used responses above total size:
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted['size']
+
+    def refresh(self, key: tuple) -> None:
+        """ Mark cached response as fresh and count revalidation, after 304 response. """
+
+        with self._lock:
+            # Response evicted during request is served by reference, it is counted but not stored again:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['stored'] = time.monotonic()
+            self.revalidated += 1
+
+    def record(self, hit: bool) -> None:
+        """ Count cache hit or miss, responses revalidated by 304 response are counted by refresh method. """
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def invalidate(self, hostname: str, port: int) -> None:
+        """ Remove all cached responses of device. """
+
+        with self._lock:
+            for key in [key for key in self._entries if key[:2] == (hostname, port)]:
+                self.size -= self._entries.pop(key)['size']
+
+    def clear(self) -> None:
+        """ Remove all cached responses. """
+
+        with self._lock:
+            self._entries = OrderedDict()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """ Return cache statistics. """
+
+        with self._lock:
+            return {
+                'responses': len(self._entries),
+                'size': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+            }
+
+
+# Process-wide (per worker) response cache:
+response_cache = ResponseCache()
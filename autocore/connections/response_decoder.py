@@ -0,0 +1,166 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+from xml.etree import ElementTree
+import json
+import io
+
+# XML Import:
+import xmltodict
+
+# ORJSON Import (optional):
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Response data types:
+JSON = 'json'
+XML = 'xml'
+
+
+def decode_json(content: bytes):
+    """ Convert JSON bytes to Python object, using orjson if available. """
+
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def decode_xml(content: bytes) -> dict:
+    """ Convert XML bytes to Python dictionary. """
+
+    return xmltodict.parse(content)
+
+
+def collect_data_type(content_type: str, content: bytes = b'') -> str:
+    """
+    Return data type (JSON or XML) from Content-Type header value.
+    Without Content-Type, data type is detected from first character of content.
+
+    Parameters:
+    -----------------
+    content_type: String
+        Content-Type header value (e.g. application/yang-data+json; charset=utf-8).
+    content: Bytes
+        Response content.
+    """
+
+    if content_type:
+        media_type = content_type.split(';', 1)[0].strip().lower()
+        if media_type.endswith('json'):
+            return JSON
+        if media_type.endswith('xml'):
+            return XML
+
+    # Sniff data type from content:
+    start = content[:64].lstrip()[:1]
+    if start in (b'{', b'['):
+        return JSON
+    if start == b'<':
+        return XML
+    return None
+
+
+def decode_response(content: bytes, content_type: str = None):
+    """
+    Convert response content to Python object, decoder is selected by Content-Type.
+
+    Parameters:
+    -----------------
+    content: Bytes
+        Response content.
+    content_type: String
+        Content-Type header value (Optional).
+
+    Return:
+    --------
+    Tuple of data type and Python object, data type is None if content could not be decoded.
+    """
+
+    data_type = collect_data_type(content_type, content)
+    if data_type == JSON:
+        return JSON, decode_json(content)
+    if data_type == XML:
+        return XML, decode_xml(content)
+    return None, None
+
+
+def _local_name(tag: str) -> str:
+    """ Remove namespace from Element Tree tag. """
+
+    return tag.rsplit('}', 1)[-1]
+
+
+def _element_to_dict(element):
+    """ Convert Element Tree element to value in xmltodict format, without namespaces. """
+
+    value = {f'@{_local_name(name)}': attribute for name, attribute in element.attrib.items()}
+    for child in element:
+        name = _local_name(child.tag)
+        child_value = _element_to_dict(child)
+        if name in value:
+            # Repeated elements are converted to list:
+            if not isinstance(value[name], list):
+                value[name] = [value[name]]
+            value[name].append(child_value)
+        else:
+            value[name] = child_value
+
+    text = (element.text or '').strip()
+    if not value:
+        return text or None
+    if text:
+        value['#text'] = text
+    return value
+
+
+def iter_xml_items(source, item_depth: int = None, item_name: str = None):
+    """
+    Convert XML to dictionaries element by element, using Element Tree iterparse.
+    Only currently parsed item is kept in memory, so peak memory usage
+    does not depend on the number of items (e.g. interfaces or routes).
+
+    Parameters:
+    -----------------
+    source: Bytes or file object
+        XML content, or file-like object (e.g. streamed HTTPS response).
+    item_depth: Intiger
+        Depth of yielded elements, root element has depth 1 (the same as xmltodict item_depth).
+    item_name: String
+        Name of yielded elements (without namespace), matched at any depth if item depth is not provided.
+
+    Return:
+    --------
+    Generator of {element name: element value} dictionaries.
+    """
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    parents = []
+    # Number of open elements with item name, nested elements are yielded as part of outer element:
+    open_items = 0
+    for event, element in ElementTree.iterparse(source, events=('start', 'end')):
+        name_match = item_name is not None and _local_name(element.tag) == item_name
+        if event == 'start':
+            parents.append(element)
+            if name_match:
+                open_items += 1
+            continue
+
+        parents.pop()
+        if item_depth is not None:
+            match = len(parents) + 1 == item_depth and (item_name is None or name_match)
+        else:
+            match = name_match and open_items == 1
+        if name_match:
+            open_items -= 1
+
+        if match:
+            yield {_local_name(element.tag): _element_to_dict(element)}
+            # Drop already yielded element:
+            if parents:
+                parents[-1].remove(element)
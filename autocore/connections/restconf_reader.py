@@ -0,0 +1,258 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+import queue
+
+# Connection Import:
+from .apicon import ApiCon
+
+# Device name translation Import:
+from .device_name_translation import collect_device_type_value_from_id
+
+# Rate limiter Import:
+from .rate_limiter import rate_limiter
+
+# Logger import:
+from logger.logger import Logger
+
+# Logger class initiation:
+logger = Logger('RESTCONF reader')
+
+# Default reader settings:
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_SUBTREE_WORKERS = 4
+QUEUE_SIZE = 1000
+
+# Headers of streamed XML responses:
+XML_HEADERS = {
+    'Accept': 'application/yang-data+xml',
+    'Content-Type': 'application/yang-data+xml',
+}
+
+
+def _local_name(name: str) -> str:
+    """ Remove YANG module prefix from JSON member name. """
+
+    return name.rsplit(':', 1)[-1]
+
+
+def _collect_records(data, list_name: str) -> list:
+    """ Find YANG list with provided name in decoded JSON data. """
+
+    if isinstance(data, dict):
+        for name, value in data.items():
+            if _local_name(name) == list_name:
+                return value if isinstance(value, list) else [value]
+            records = _collect_records(value, list_name)
+            if records is not None:
+                return records
+    return None
+
+
+# Main RestconfReader class:
+class RestconfReader:
+    """
+    The RestconfReader class reads large RESTCONF collections (e.g. routes, ARP or MAC tables)
+    record by record. Platforms supporting list pagination are read in pages using limit
+    and offset query parameters, other platforms are read as a single XML response
+    streamed element by element. In both cases only a single page is kept in memory.
+    Supported query parameters are defined by device type "restconf" value.
+
+    Attributes:
+    -----------------
+    connection:
+        ApiCon object of device.
+    page_size:
+        Number of records collected in one page.
+
+    Methods:
+    --------
+    iter_records:
+        Yield records of YANG list.
+    iter_subtrees:
+        Yield records of many independent subtrees, collected in parallel.
+    """
+
+    def __init__(self, connection: ApiCon, page_size: int = DEFAULT_PAGE_SIZE) -> None:
+        """
+        Parameters:
+        -----------------
+        connection: ApiCon
+            ApiCon object of device.
+        page_size: Intiger
+            Number of records collected in one page.
+        """
+
+        # Verify if the specified connection variable is a valid ApiCon object:
+        if isinstance(connection, ApiCon):
+            self.connection = connection
+        else:
+            raise TypeError('The provided connection variable must be a valid object of the ApiCon class.')
+
+        # Verify if the specified page size variable is a positive intiger:
+        if isinstance(page_size, int) and page_size > 0:
+            self.page_size = page_size
+        else:
+            raise TypeError('The provided page size variable must be a positive intiger.')
+
+        # Collect RESTCONF query parameters supported by device type:
+        self.support = collect_device_type_value_from_id(connection.device_type, 'restconf', {}) or {}
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class RestconfReader ({self.connection.device_name}/{self.page_size} records per page)>'
+
+    def _url(self, path: str, depth: int = None, fields: str = None, limit: int = None, offset: int = None) -> str:
+        """ Create URL with RESTCONF query parameters supported by device type. """
+
+        parameters = {}
+        if depth is not None and self.support.get('depth'):
+            parameters['depth'] = depth
+        if fields is not None and self.support.get('fields'):
+            parameters['fields'] = fields
+        if limit is not None:
+            parameters['limit'] = limit
+            parameters['offset'] = offset or 0
+        return f'{path}?{urlencode(parameters, safe=";/:()")}' if parameters else path
+
+    def _get(self, connection, url, headers=None, item_depth=None, item_name=None):
+        """ Send GET request with request headers, instance headers are restored afterwards. """
+
+        instance_headers = connection.headers
+        try:
+            return connection.get(url, headers=headers, item_depth=item_depth, item_name=item_name)
+        finally:
+            connection.headers = instance_headers
+
+    def _raise_error(self, connection, path: str) -> None:
+        """ Raise error of failed RESTCONF request, so failed collection is not mistaken for empty list. """
+
+        raise ConnectionError(
+            f'RESTCONF request to "{path}" failed (Response code: {getattr(connection, "response_code", None)}).')
+
+    def iter_records(self, path: str, list_name: str, depth: int = None, fields: str = None, item_depth: int = None, connection: ApiCon = None):
+        """
+        Yield records of YANG list.
+
+        Parameters:
+        -----------------
+        path: String
+            RESTCONF resource path (e.g. restconf/data/ietf-routing:routing-state/routing-instance=default/ribs/rib=ipv4-default/routes).
+        list_name: String
+            Name of YANG list, that records are yielded (e.g. route).
+        depth: Intiger
+            RESTCONF depth query parameter (Optional).
+        fields: String
+            RESTCONF fields query parameter (Optional).
+        item_depth: Intiger
+            Depth of list elements in XML response, used without pagination support (Optional).
+            By default list elements are matched by name at any depth.
+
+        Return:
+        --------
+        Generator of record dictionaries.
+        ConnectionError is raised, if RESTCONF request failed.
+        """
+
+        connection = connection or self.connection
+
+        # Platform without pagination support, XML response is streamed element by element:
+        if not self.support.get('pagination'):
+            records = self._get(
+                connection, self._url(path, depth, fields), XML_HEADERS, item_depth, list_name)
+            if records is False or not connection.status:
+                self._raise_error(connection, path)
+            # Device returned decoded JSON instead of XML:
+            if isinstance(records, dict):
+                records = [{list_name: record} for record in _collect_records(records, list_name) or []]
+            matched = False
+            for record in records:
+                matched = True
+                yield record[list_name]
+            # Empty list, or list name (or item depth) does not match response:
+            if not matched:
+                logger.warning(
+                    f'No "{list_name}" records were found in RESTCONF response.',
+                    connection.task_id, connection.device_name)
+            return
+
+        # Collect list page by page:
+        offset = 0
+        while True:
+            page = self._get(connection, self._url(path, depth, fields, self.page_size, offset))
+            if page is False or not connection.status:
+                self._raise_error(connection, path)
+            records = _collect_records(page, list_name) if page else None
+            if not records:
+                return
+            yield from records
+            if len(records) < self.page_size:
+                return
+            offset += len(records)
+
+    def iter_subtrees(self, subtrees: list, max_workers: int = DEFAULT_SUBTREE_WORKERS, **kwargs):
+        """
+        Yield records of many independent subtrees, collected in parallel over pooled HTTPS session.
+        Records are passed through bounded queue, so memory usage does not depend on subtree sizes.
+
+        Parameters:
+        -----------------
+        subtrees: List
+            List of (path, list name) tuples.
+        max_workers: Intiger
+            Number of subtrees collected at once, limited to number of requests in flight allowed by device.
+            Streamed XML response is still transferred after its request slot is released,
+            so more workers would exceed device limit.
+        kwargs:
+            Other iter_records parameters (e.g. depth, fields).
+
+        Return:
+        --------
+        Generator of (path, record) tuples, in order of arrival.
+        """
+
+        records = queue.Queue(maxsize=QUEUE_SIZE)
+        finished = object()
+        stopped = False
+
+        # Do not open more transfers, than device allows requests in flight (api_limits max_in_flight):
+        max_workers = min(max_workers, rate_limiter.max_in_flight(self.connection))
+
+        def collect(path, list_name):
+            # Each thread uses own connection object, HTTPS session is shared by session pool:
+            connection = ApiCon(
+                self.connection.device, self.connection.task_id, headers=self.connection.headers)
+            try:
+                for record in self.iter_records(path, list_name, connection=connection, **kwargs):
+                    if stopped:
+                        return
+                    records.put((path, record))
+            finally:
+                records.put(finished)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(collect, path, list_name) for path, list_name in subtrees]
+            try:
+                remaining = len(futures)
+                while remaining:
+                    item = records.get()
+                    if item is finished:
+                        remaining -= 1
+                    else:
+                        yield item
+            finally:
+                # Stop collecting threads, if generator was closed early:
+                stopped = True
+                while any(not future.done() for future in futures):
+                    try:
+                        records.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+
+            # Raise errors of collecting threads:
+            for future in futures:
+                future.result()
@@ -0,0 +1,353 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import csv
+
+# NumPy Import (optional):
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Text FSM template cache Import:
+from .template_cache import template_cache
+from .template_index import template_index
+
+# Text FSM values, that are stored as numeric arrays:
+NUMERIC_COLUMNS = {
+    'MTU', 'BANDWIDTH', 'DELAY',
+    'INPUT_RATE', 'OUTPUT_RATE', 'INPUT_PACKETS', 'OUTPUT_PACKETS',
+    'INPUT_ERRORS', 'OUTPUT_ERRORS', 'CRC', 'FRAME', 'OVERRUN', 'ABORT',
+    'RUNTS', 'GIANTS', 'COLLISIONS', 'INTERFACE_RESETS', 'UNKNOWN_PROTOCOL_DROPS',
+    'AGE', 'VLAN', 'VLAN_ID', 'METRIC', 'DISTANCE', 'UPTIME_SECONDS',
+}
+
+# Column with name of device, that output was collected from:
+DEVICE_COLUMN = 'DEVICE'
+
+
+# Array kinds of numeric columns (boolean, intiger, unsigned intiger and float):
+NUMERIC_KINDS = 'biuf'
+
+
+def _object_array(values):
+    """
+    Convert Text FSM values to one dimensional object array.
+    Array is filled from iterator (in NumPy), so Text FSM List values (e.g. IPADDR) are kept
+    as list objects, instead of creating two dimensional array.
+    """
+
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+# Universal function converting object array values to strings:
+_to_string = np.frompyfunc(str, 1, 1) if np is not None else None
+
+
+def _csv_column(column):
+    """ Convert column to CSV fields, quoted the same way as csv module (QUOTE_MINIMAL). """
+
+    # Numeric fields are never quoted, empty values (NaN) are saved as empty fields:
+    if column.dtype.kind == 'f':
+        return np.where(np.isnan(column), '', column.astype(str))
+    if column.dtype.kind in NUMERIC_KINDS:
+        return column.astype(str)
+
+    # Object values (also Text FSM List values) are converted by NumPy universal function:
+    text = np.where(np.equal(column, None), '', _to_string(column).astype(str))
+
+    # Quote fields with separator, quote or new line characters:
+    quoted = np.zeros(len(text), dtype=bool)
+    for character in (',', '"', '\n', '\r'):
+        quoted |= np.char.find(text, character) >= 0
+    return np.where(quoted, np.char.add(np.char.add('"', np.char.replace(text, '"', '""')), '"'), text)
+
+
+def _numeric_array(values):
+    """
+    Convert Text FSM values to intiger array, or float array if some values are empty.
+    Values, that are not numeric, are left as object array.
+    """
+
+    array = _object_array(values)
+    empty = array == ''
+    try:
+        if empty.any():
+            array = np.where(empty, 'nan', array).astype(np.float64)
+        else:
+            array = array.astype(np.int64)
+    except (TypeError, ValueError):
+        return _object_array(values)
+    return array
+
+
+# Main ResultTable class:
+class ResultTable:
+    """
+    Columnar table of parsed command output, one array per Text FSM value.
+    Columns listed in NUMERIC_COLUMNS are stored as NumPy numeric arrays,
+    all other columns (also Text FSM List values) are stored as one dimensional NumPy object arrays.
+    Empty values of numeric columns are stored as NaN.
+
+    Attributes:
+    -----------------
+    columns:
+        Dictionary of column name and NumPy array.
+
+    Methods:
+    --------
+    from_fsm:
+        Create table from Text FSM header and result.
+    concat:
+        Join many tables into one table.
+    filter:
+        Return table with rows selected by boolean mask.
+    where:
+        Return table with rows, that columns are equal to provided values.
+    aggregate:
+        Aggregate numeric column per unique values of other column.
+    to_csv:
+        Save table to CSV file.
+    to_parquet:
+        Save table to Parquet file.
+    """
+
+    def __init__(self, columns: dict) -> None:
+        """
+        Parameters:
+        -----------------
+        columns: Dictionary
+            Dictionary of column name and NumPy array, all arrays must have the same length.
+        """
+
+        # NumPy is required by columnar tables:
+        if np is None:
+            raise ImportError('NumPy package is required to create result tables.')
+
+        # Verify if all columns have the same length:
+        if len({len(column) for column in columns.values()}) > 1:
+            raise ValueError('All result table columns must have the same length.')
+
+        self.columns = columns
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class ResultTable ({len(self)} rows/{len(self.columns)} columns)>'
+
+    def __len__(self) -> int:
+        """ Return number of rows. """
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, key):
+        """ Return column array by name, or filtered table by boolean mask. """
+
+        if isinstance(key, str):
+            return self.columns[key]
+        return self.filter(key)
+
+    @property
+    def header(self) -> list:
+        """ Return list of column names. """
+        return list(self.columns)
+
+    @classmethod
+    def from_fsm(cls, header: list, result: list, device_name: str = None, numeric_columns: set = NUMERIC_COLUMNS):
+        """
+        Create table from Text FSM header and result, without creating dictionary per row.
+
+        Parameters:
+        -----------------
+        header: List
+            Text FSM values names.
+        result: List
+            Text FSM result, list of rows.
+        device_name: String
+            Device name added to each row as DEVICE column (Optional).
+        numeric_columns: Set
+            Names of columns stored as numeric arrays.
+        """
+
+        # Transpose rows to columns:
+        values = list(zip(*result)) if result else [()] * len(header)
+
+        columns = {}
+        if device_name is not None:
+            columns[DEVICE_COLUMN] = np.full(len(result), device_name, dtype=object)
+        for name, column in zip(header, values):
+            # Text FSM List values are never numeric:
+            if name in numeric_columns and not any(isinstance(value, list) for value in column):
+                columns[name] = _numeric_array(column)
+            else:
+                columns[name] = _object_array(column)
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, tables: list):
+        """
+        Join many tables into one table.
+        Numeric columns are promoted to common numeric type (e.g. intiger and float columns to float),
+        columns missing in some tables are filled with NaN (numeric columns) or None values.
+
+        Parameters:
+        -----------------
+        tables: List
+            List of ResultTable objects.
+        """
+
+        tables = [table for table in tables if table is not None]
+        header = []
+        for table in tables:
+            header += [name for name in table.columns if name not in header]
+
+        columns = {}
+        for name in header:
+            present = [table.columns[name] for table in tables if name in table.columns]
+            # Only columns numeric in all tables are joined as numeric array:
+            if all(array.dtype.kind in NUMERIC_KINDS for array in present):
+                dtype = np.result_type(*present)
+                if any(name not in table.columns for table in tables):
+                    dtype = np.result_type(dtype, np.float64)
+                missing = np.nan
+            else:
+                dtype = object
+                missing = None
+            arrays = [
+                table.columns[name] if name in table.columns
+                else np.full(len(table), missing, dtype=dtype)
+                for table in tables]
+            columns[name] = np.concatenate(arrays).astype(dtype, copy=False)
+        return cls(columns)
+
+    def filter(self, mask):
+        """
+        Return table with rows selected by boolean mask.
+
+        Parameters:
+        -----------------
+        mask: NumPy array
+            Boolean array, with the same length as table (e.g. table['CRC'] > 0).
+        """
+
+        mask = np.asarray(mask, dtype=bool)
+        return ResultTable({name: column[mask] for name, column in self.columns.items()})
+
+    def where(self, **values):
+        """
+        Return table with rows, that columns are equal to provided values.
+
+        Example:
+        --------
+        table.where(DEVICE='router-1', LINK_STATUS='up')
+        """
+
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in values.items():
+            mask &= self.columns[name] == value
+        return self.filter(mask)
+
+    def aggregate(self, by: str, column: str, function: str = 'sum') -> dict:
+        """
+        Aggregate numeric column per unique values of other column.
+        Empty (NaN) values are skipped, groups without values return NaN (count returns 0).
+
+        Parameters:
+        -----------------
+        by: String
+            Name of column, that rows are grouped by (e.g. DEVICE).
+        column: String
+            Name of numeric column, that is aggregated (e.g. INPUT_ERRORS).
+        function: String
+            Aggregation function name: sum, max, min, mean or count.
+
+        Return:
+        --------
+        Dictionary of group value and aggregated value.
+        """
+
+        values = self.columns[column]
+        # Verify if the aggregated column is numeric:
+        if values.dtype.kind not in NUMERIC_KINDS:
+            raise TypeError(f'The aggregated column "{column}" must be numeric.')
+
+        keys, inverse = np.unique(self.columns[by].astype(str), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        values = values.astype(np.float64)
+        valid = ~np.isnan(values)
+        counts = np.bincount(inverse[valid], minlength=len(keys))
+
+        if function == 'count':
+            result = counts
+        elif function in ('sum', 'mean'):
+            result = np.bincount(inverse[valid], weights=values[valid], minlength=len(keys))
+            if function == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result = result / counts
+            else:
+                result[counts == 0] = np.nan
+        elif function in ('max', 'min'):
+            ufunc = np.maximum if function == 'max' else np.minimum
+            result = np.full(len(keys), -np.inf if function == 'max' else np.inf)
+            ufunc.at(result, inverse[valid], values[valid])
+            result[counts == 0] = np.nan
+        else:
+            raise ValueError(f'Aggregation function "{function}" is not supported.')
+
+        return dict(zip(keys.tolist(), result.tolist()))
+
+    def to_csv(self, path: str) -> None:
+        """ Save table to CSV file, rows are created from whole columns at once. """
+
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.header)
+            if len(self):
+                # Join CSV fields of all columns into lines, without Python code per row or field:
+                fields = [_csv_column(column).tolist() for column in self.columns.values()]
+                file.write('\r\n'.join(map(','.join, zip(*fields))) + '\r\n')
+
+    def to_parquet(self, path: str) -> None:
+        """ Save table to Parquet file, requires PyArrow package. """
+
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('PyArrow package is required to save result tables as Parquet.')
+
+        table = pyarrow.table({
+            name: column if column.dtype.kind != 'O' else column.tolist()
+            for name, column in self.columns.items()})
+        pyarrow.parquet.write_table(table, path)
+
+
+def parse_command_output_table(device_type_command: str, command: str, command_output: str, device_name: str = None) -> ResultTable:
+    """
+    Convert command output to columnar table based on Text FSM templates.
+
+    Parameters:
+    -----------------
+    device_type_command: String
+        Text FSM device type name (e.g. cisco_ios).
+    command: String
+        Full or abbreviated CLI command.
+    command_output: String
+        Raw CLI command output.
+    device_name: String
+        Device name added to each row as DEVICE column (Optional).
+
+    Return:
+    --------
+    ResultTable object, or None if there is no template for provided command.
+    """
+
+    # Resolve full or abbreviated command to Text FSM template:
+    resolved = template_index.resolve(device_type_command, command)
+    if resolved is None:
+        return None
+    canonical_command, path = resolved
+
+    # Collect compiled template from process-wide cache:
+    fsm = template_cache.get(device_type_command, canonical_command, path)
+    return ResultTable.from_fsm(fsm.header, fsm.ParseText(command_output), device_name)
@@ -0,0 +1,228 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import time
+
+# Fleet execution Import:
+from .fleet import FleetExecutor
+
+# Device name translation Import:
+from .device_name_translation import collect_device_type_value_from_id
+
+# Logger import:
+from logger.logger import Logger
+
+# Logger class initiation:
+logger = Logger('Config rollout')
+
+# Device rollout statuses:
+SUCCESS = 'success'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+# Configuration output messages of rejected commands (used if device type does not define "config_errors" value):
+DEFAULT_CONFIG_ERRORS = [
+    '% Invalid input',
+    '% Incomplete command',
+    '% Ambiguous command',
+    '% Unknown command',
+]
+
+
+def collect_config_error(device_type: int, output: str) -> str:
+    """ Return first output line with configuration error message of device type, or None. """
+
+    patterns = collect_device_type_value_from_id(device_type, 'config_errors', DEFAULT_CONFIG_ERRORS)
+    for line in output.splitlines():
+        if any(pattern in line for pattern in patterns):
+            return line.strip()
+    return None
+
+
+# Main ConfigRollout class:
+class ConfigRollout:
+    """
+    The ConfigRollout class pushes configuration commands to many devices in waves.
+    First wave is a canary wave, next waves are batches of devices executed in parallel.
+    Rollout stops, when error rate of executed devices crosses the error rate threshold.
+    Every device is configured by NetCon configuration_commands method, device output
+    containing configuration error message of device type (e.g. "% Invalid input") is a failure.
+
+    Attributes:
+    -----------------
+    fleet:
+        FleetExecutor object, used to execute configuration in parallel.
+    commands:
+        Configuration commands, or function that returns commands for provided device.
+    canary:
+        Number of devices in canary wave.
+    batch_size:
+        Number of devices in each next wave.
+    max_error_rate:
+        Error rate threshold, that stops the rollout.
+
+    Methods:
+    --------
+    waves:
+        Split devices into canary wave and batches.
+    run:
+        Execute rollout wave by wave and return rollout report.
+    """
+
+    def __init__(self, devices, commands, task_id: str = None, canary: int = 1, batch_size: int = 50, max_error_rate: float = 0.1, **kwargs) -> None:
+        """
+        Parameters:
+        -----------------
+        devices: QuerySet, Group or List
+            Devices, that configuration will be pushed to.
+        commands: String, List or Callable
+            Configuration CLI command/s, or function that receives a Device object
+            and returns configuration command/s rendered for that device.
+        task_id: String
+            Specifies the Celery task ID value, that will be added to logs messages.
+        canary: Intiger
+            Number of devices in canary wave, any canary failure stops the rollout.
+        batch_size: Intiger
+            Number of devices in each next wave.
+        max_error_rate: Float
+            Error rate of executed devices (from 0 to 1), that stops the rollout.
+        kwargs:
+            FleetExecutor settings (e.g. max_sessions, repeat_connection).
+        """
+
+        # Verify if the specified commands variable is valid:
+        if isinstance(commands, (str, list)) or callable(commands):
+            self.commands = commands
+        else:
+            raise TypeError('The provided command/s variable must be a string, list or function.')
+
+        # Verify if the specified canary and batch size variables are valid:
+        if not isinstance(canary, int) or canary < 0:
+            raise TypeError('The provided canary variable must be a non-negative intiger.')
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise TypeError('The provided batch size variable must be a positive intiger.')
+        self.canary = canary
+        self.batch_size = batch_size
+
+        # Verify if the specified max error rate variable is valid:
+        if isinstance(max_error_rate, (int, float)) and 0 <= max_error_rate <= 1:
+            self.max_error_rate = max_error_rate
+        else:
+            raise TypeError('The provided max error rate variable must be a number from 0 to 1.')
+
+        # Batch execution runs at most batch size sessions at once:
+        kwargs.setdefault('max_sessions', batch_size)
+        self.fleet = FleetExecutor(devices, task_id, **kwargs)
+        self.task_id = task_id
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class ConfigRollout ({len(self.fleet.devices)} devices/{self.batch_size} batch size)>'
+
+    def waves(self) -> list:
+        """ Split devices into canary wave and batches. """
+
+        devices = self.fleet.devices
+        waves = [devices[:self.canary]] if self.canary else []
+        for index in range(self.canary, len(devices), self.batch_size):
+            waves.append(devices[index:index + self.batch_size])
+        return waves
+
+    def _configure(self, device):
+        """ Push configuration commands to a single device and measure total device time. """
+
+        start_time = time.perf_counter()
+        commands = self.commands(device) if callable(self.commands) else self.commands
+
+        connection = self.fleet._new_connection(device)
+        try:
+            connection.open_connection(self.fleet.pooled)
+            output = connection.configuration_commands(commands)
+        finally:
+            connection.close_connection()
+
+        # Configuration output is a string, failed execution returns connection status:
+        status = SUCCESS if isinstance(output, str) and connection.connection_status else FAILED
+        # Commands rejected by device are failed configuration:
+        error = collect_config_error(connection.device_type, output) if status == SUCCESS else None
+        if error is not None:
+            status = FAILED
+            logger.warning(f'Configuration was rejected by device: {error}', self.task_id, connection.device_name)
+
+        return {
+            'status': status,
+            'execution_time': connection.execution_time,
+            'total_time': round(time.perf_counter() - start_time, 5),
+            'output': output if isinstance(output, str) else None,
+            'error': error,
+        }
+
+    def run(self) -> dict:
+        """
+        Execute rollout wave by wave.
+
+        Return:
+        --------
+        Rollout report dictionary:
+            stopped: True if rollout was stopped by error rate threshold.
+            error_rate: Error rate of executed devices.
+            devices: Per device result dictionaries (status, wave, timing, output and error).
+        """
+
+        report = {'stopped': False, 'error_rate': 0, 'devices': []}
+        executed = failed = 0
+        last_wave = -1
+        waves = self.waves()
+
+        for number, wave in enumerate(waves):
+            last_wave = number
+            canary_wave = number == 0 and self.canary > 0
+
+            # Log the beginning of rollout wave:
+            logger.info(
+                f'Rollout wave {number} ({"canary, " if canary_wave else ""}{len(wave)} devices) has been started.',
+                self.task_id)
+
+            wave_failed = 0
+            for device, result in self.fleet.map(self._configure, wave):
+                # Handle exceptions raised during device execution:
+                if isinstance(result, Exception):
+                    result = {
+                        'status': FAILED, 'execution_time': None, 'total_time': None,
+                        'output': None, 'error': result}
+                result.update({'device': device, 'wave': number})
+                report['devices'].append(result)
+                if result['status'] == FAILED:
+                    wave_failed += 1
+
+            # Collect error rate of all executed devices:
+            executed += len(wave)
+            failed += wave_failed
+            report['error_rate'] = round(failed / executed, 5)
+
+            # Stop rollout after canary failure, or above error rate threshold:
+            if (canary_wave and wave_failed) or report['error_rate'] > self.max_error_rate:
+                report['stopped'] = True
+                logger.error(
+                    f'Rollout has been stopped after wave {number}, error rate {report["error_rate"]}.',
+                    self.task_id)
+                break
+
+        # Mark devices of not executed waves as skipped:
+        for number, wave in enumerate(waves):
+            if number <= last_wave:
+                continue
+            for device in wave:
+                report['devices'].append({
+                    'device': device, 'wave': number, 'status': SKIPPED, 'execution_time': None,
+                    'total_time': None, 'output': None, 'error': None})
+
+        # Log the end of rollout:
+        logger.info(
+            f'Rollout has been finished, {executed} from {len(self.fleet.devices)} devices executed, {failed} failed.',
+            self.task_id)
+
+        # Return data:
+        return report
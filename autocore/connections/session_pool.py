@@ -0,0 +1,264 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import threading
+import hashlib
+import time
+
+# Default session pool settings:
+DEFAULT_POOL_SIZE = 64
+DEFAULT_IDLE_TTL = 300
+
+
+# Main SessionPool class:
+class SessionPool:
+    """
+    Per worker pool of live SSH sessions, reused between Celery tasks.
+    Sessions are keyed by device and credential, health-checked before reuse
+    and closed after they stay idle longer than TTL. Idle sessions are evicted
+    on acquire and release, and by background thread while pool is not empty,
+    so sessions are not kept open on idle worker.
+
+    Attributes:
+    -----------------
+    max_size:
+        Maximum number of idle sessions kept in pool.
+    idle_ttl:
+        Number of seconds after which idle session is closed.
+    hits:
+        Number of sessions served from pool.
+    misses:
+        Number of sessions that required a new SSH handshake.
+    saved_time:
+        Estimated number of seconds of SSH handshakes saved by pool.
+
+    Methods:
+    --------
+    key:
+        Create pool key from connection data.
+    acquire:
+        Return live idle session or None.
+    release:
+        Return session to pool.
+    record_handshake:
+        Store time of a new SSH handshake.
+    evict_idle:
+        Close sessions idle longer than TTL.
+    close_all:
+        Close all idle sessions.
+    stats:
+        Return pool statistics.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE, idle_ttl: int = DEFAULT_IDLE_TTL) -> None:
+        """
+        Parameters:
+        -----------------
+        max_size: Intiger
+            Maximum number of idle sessions kept in pool.
+        idle_ttl: Intiger
+            Number of seconds after which idle session is closed.
+        """
+
+        # Verify if the specified max size variable is a positive intiger:
+        if isinstance(max_size, int) and max_size > 0:
+            self.max_size = max_size
+        else:
+            raise TypeError('The provided max size variable must be a positive intiger.')
+
+        # Verify if the specified idle TTL variable is a positive intiger:
+        if isinstance(idle_ttl, int) and idle_ttl > 0:
+            self.idle_ttl = idle_ttl
+        else:
+            raise TypeError('The provided idle TTL variable must be a positive intiger.')
+
+        # Idle sessions per key, as list of (release time, session):
+        self._sessions = {}
+        # Average handshake time per key:
+        self._handshake_times = {}
+        # Pool lock:
+        self._lock = threading.Lock()
+        # Background eviction thread, running only while pool is not empty:
+        self._evictor = None
+
+        # Pool counters declaration:
+        self.hits = 0
+        self.misses = 0
+        self.saved_time = 0.0
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class SessionPool ({len(self)}/{self.max_size})>'
+
+    def __len__(self) -> int:
+        """ Number of idle sessions in pool. """
+        return sum(len(sessions) for sessions in self._sessions.values())
+
+    def key(self, hostname: str, port: int, username: str, password: str, device_type: str) -> tuple:
+        """ Create pool key from connection data, password is stored only as a hash. """
+
+        password_hash = hashlib.sha256(str(password).encode()).hexdigest()
+        return (hostname, port, username, password_hash, device_type)
+
+    def acquire(self, key: tuple):
+        """
+        Return live idle session for provided key.
+
+        Parameters:
+        -----------------
+        key: Tuple
+            Pool key created by key method.
+
+        Return:
+        --------
+        Netmiko connection object, or None if there is no live idle session.
+        """
+
+        # Close sessions idle longer than TTL:
+        self.evict_idle()
+
+        while True:
+            with self._lock:
+                sessions = self._sessions.get(key)
+                if not sessions:
+                    self.misses += 1
+                    return None
+                _, session = sessions.pop()
+                if not sessions:
+                    del self._sessions[key]
+
+            # Health-check session before reuse:
+            if self._is_alive(session):
+                with self._lock:
+                    self.hits += 1
+                    self.saved_time += self._handshake_times.get(key, 0.0)
+                return session
+            else:
+                self._disconnect(session)
+
+    def release(self, key: tuple, session) -> None:
+        """
+        Return session to pool.
+
+        Parameters:
+        -----------------
+        key: Tuple
+            Pool key created by key method.
+        session: Object
+            Netmiko connection object.
+        """
+
+        with self._lock:
+            # Collect sessions idle longer than TTL:
+            evicted = self._collect_idle()
+            self._sessions.setdefault(key, []).append((time.monotonic(), session))
+            # Close least recently released sessions above pool size:
+            while len(self) > self.max_size:
+                oldest_key = min(self._sessions, key=lambda pool_key: self._sessions[pool_key][0][0])
+                evicted.append(self._sessions[oldest_key].pop(0)[1])
+                if not self._sessions[oldest_key]:
+                    del self._sessions[oldest_key]
+
+            self._start_evictor()
+
+        for session in evicted:
+            self._disconnect(session)
+
+    def record_handshake(self, key: tuple, handshake_time: float) -> None:
+        """ Store time of a new SSH handshake, as moving average per key. """
+
+        with self._lock:
+            previous = self._handshake_times.get(key)
+            if previous is None:
+                self._handshake_times[key] = handshake_time
+            else:
+                self._handshake_times[key] = round(previous * 0.8 + handshake_time * 0.2, 5)
+
+    def evict_idle(self) -> None:
+        """ Close sessions idle longer than TTL. """
+
+        with self._lock:
+            evicted = self._collect_idle()
+
+        for session in evicted:
+            self._disconnect(session)
+
+    def _collect_idle(self) -> list:
+        """ Remove sessions idle longer than TTL from pool and return them (! called with pool lock). """
+
+        evicted = []
+        deadline = time.monotonic() - self.idle_ttl
+        for key in list(self._sessions):
+            sessions = self._sessions[key]
+            evicted.extend(session for released, session in sessions if released < deadline)
+            sessions[:] = [(released, session) for released, session in sessions if released >= deadline]
+            if not sessions:
+                del self._sessions[key]
+        return evicted
+
+    def _start_evictor(self) -> None:
+        """ Start background eviction thread, if it is not running (! called with pool lock). """
+
+        if self._evictor is None or not self._evictor.is_alive():
+            self._evictor = threading.Thread(target=self._evict_until_empty, name='session-pool-evictor', daemon=True)
+            self._evictor.start()
+
+    def _evict_until_empty(self) -> None:
+        """ Evict idle sessions periodically, thread ends when pool is empty. """
+
+        while True:
+            time.sleep(max(self.idle_ttl / 2, 1))
+            self.evict_idle()
+            with self._lock:
+                if not self._sessions:
+                    self._evictor = None
+                    return
+
+    def close_all(self) -> None:
+        """ Close all idle sessions. """
+
+        with self._lock:
+            sessions = [session for sessions in self._sessions.values() for _, session in sessions]
+            self._sessions = {}
+
+        for session in sessions:
+            self._disconnect(session)
+
+    def stats(self) -> dict:
+        """ Return pool statistics. """
+
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'size': len(self),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / requests, 5) if requests else None,
+                'saved_time': round(self.saved_time, 5),
+            }
+
+    def _is_alive(self, session):
+        """ Check if session transport is still active and clear leftover channel data. """
+
+        try:
+            if session.is_alive():
+                session.clear_buffer()
+                return True
+        except Exception:
+            pass
+        return False
+
+    def _disconnect(self, session):
+        """ Close session, ignoring errors of already closed transports. """
+
+        try:
+            session.disconnect()
+        except Exception:
+            pass
+
+
+# Process-wide (per worker) session pool:
+session_pool = SessionPool()
@@ -0,0 +1,171 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import threading
+import textfsm
+import copy
+import os
+
+# Python collections Import:
+from collections import OrderedDict
+
+# Text FSM templates path:
+COMMANDS_PATH = 'autocore/connections/commands'
+
+# Default maximum number of compiled templates kept in memory:
+DEFAULT_CACHE_SIZE = 512
+
+
+# Main TemplateCache class:
+class TemplateCache:
+    """
+    Process-wide cache of compiled Text FSM templates.
+    Templates are compiled once per (device type, command) pair and every
+    parse receives a fresh copy of the compiled state machine.
+
+    Attributes:
+    -----------------
+    max_size:
+        Maximum number of compiled templates kept in cache.
+    hits:
+        Number of template requests served from cache.
+    misses:
+        Number of template requests that required template compilation.
+
+    Methods:
+    --------
+    get:
+        Return a fresh Text FSM state machine for provided device type and command.
+    clear:
+        Remove all compiled templates from cache.
+    stats:
+        Return cache statistics.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE) -> None:
+        """
+        Parameters:
+        -----------------
+        max_size: Intiger
+            Maximum number of compiled templates kept in cache.
+        """
+
+        # Verify if the specified max size variable is a positive intiger:
+        if isinstance(max_size, int) and max_size > 0:
+            self.max_size = max_size
+        else:
+            raise TypeError('The provided max size variable must be a positive intiger.')
+
+        # Compiled templates storage, in least recently used order:
+        self._templates = OrderedDict()
+        # Cache lock, shared by all threads of the process:
+        self._lock = threading.Lock()
+
+        # Cache counters declaration:
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class TemplateCache ({len(self._templates)}/{self.max_size})>'
+
+    def __len__(self) -> int:
+        """ Number of compiled templates in cache. """
+        return len(self._templates)
+
+    def get(self, device_type_command: str, command: str, path: str = None) -> textfsm.TextFSM:
+        """
+        Return a fresh Text FSM state machine for provided device type and command.
+
+        Parameters:
+        -----------------
+        device_type_command: String
+            Text FSM name of device type (e.g. cisco_ios).
+        command: String
+            CLI command, that output will be parsed.
+        path: String
+            Path to Text FSM template file (Optional).
+
+        Return:
+        --------
+        Text FSM object ready to parse command output.
+        """
+
+        # Collect cache key and template path:
+        key = (device_type_command, command)
+        if path is None:
+            path = self._template_path(device_type_command, command)
+
+        # Collect template file modification time (Raise FileNotFoundError if missing):
+        modification_time = os.stat(path).st_mtime_ns
+
+        with self._lock:
+            cached = self._templates.get(key)
+            # Serve compiled template if template file was not changed:
+            if cached is not None and cached[0] == modification_time:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                prototype = cached[1]
+            else:
+                prototype = None
+                self.misses += 1
+
+        # Compile template if it was not found in cache:
+        if prototype is None:
+            prototype = self._compile(path)
+            with self._lock:
+                self._templates[key] = (modification_time, prototype)
+                self._templates.move_to_end(key)
+                # Remove least recently used templates above cache size:
+                while len(self._templates) > self.max_size:
+                    self._templates.popitem(last=False)
+
+        # Return fresh state machine based on compiled template:
+        return self._fresh_state_machine(prototype)
+
+    def clear(self) -> None:
+        """ Remove all compiled templates from cache. """
+
+        with self._lock:
+            self._templates.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """ Return cache statistics. """
+
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'size': len(self._templates),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / requests, 5) if requests else None,
+            }
+
+    def _template_path(self, device_type_command, command):
+        """ Collect Text FSM template path from device type and command. """
+
+        command_no_space = command.strip().replace(' ', '_')
+        command_filename = f'{device_type_command}_{command_no_space}.textfsm'
+        return f'{COMMANDS_PATH}/{device_type_command}/{command_filename}'
+
+    def _compile(self, path):
+        """ Compile Text FSM template from file. """
+
+        with open(path) as template:
+            return textfsm.TextFSM(template)
+
+    def _fresh_state_machine(self, prototype):
+        """ Copy compiled template, compiled regexes are shared between copies. """
+
+        fsm = copy.deepcopy(prototype)
+        fsm.Reset()
+        return fsm
+
+
+# Process-wide template cache:
+template_cache = TemplateCache()
@@ -0,0 +1,229 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import threading
+import os
+
+# Device name translation Import:
+from .device_name_translation import collect_device_type_textfsm_names
+
+# Text FSM templates path:
+from .template_cache import COMMANDS_PATH
+
+# Maximum number of resolved command strings kept in memory:
+DEFAULT_RESOLVED_SIZE = 4096
+
+# Cisco style command aliases, used before abbreviation matching:
+COMMAND_ALIASES = {
+    's': 'show',
+    'sh': 'show',
+    'int': 'interfaces',
+    'run': 'running-config',
+    'start': 'startup-config',
+}
+
+
+# Main TemplateIndex class:
+class TemplateIndex:
+    """
+    In-memory index of all Text FSM templates available in commands directory.
+    The index is built once and resolves full, abbreviated and aliased
+    commands (e.g. "sh ip int br") to a template file without file system access.
+
+    Attributes:
+    -----------------
+    commands_path:
+        Path to directory containing Text FSM templates.
+    built:
+        Information if index was already built.
+
+    Methods:
+    --------
+    build:
+        Scan commands directory and build the template index.
+    resolve:
+        Return canonical command and template path for provided command.
+    stats:
+        Return index statistics.
+    """
+
+    def __init__(self, commands_path: str = COMMANDS_PATH, resolved_size: int = DEFAULT_RESOLVED_SIZE) -> None:
+        """
+        Parameters:
+        -----------------
+        commands_path: String
+            Path to directory containing Text FSM templates.
+        resolved_size: Intiger
+            Maximum number of resolved command strings kept in memory.
+        """
+
+        # Verify if the specified commands path variable is a string:
+        if isinstance(commands_path, str):
+            self.commands_path = commands_path
+        else:
+            raise TypeError('The provided commands path variable must be a string.')
+
+        # Verify if the specified resolved size variable is a positive intiger:
+        if isinstance(resolved_size, int) and resolved_size > 0:
+            self.resolved_size = resolved_size
+        else:
+            raise TypeError('The provided resolved size variable must be a positive intiger.')
+
+        # Command tokens tree per Text FSM device type name:
+        self._trees = {}
+        # Resolved (positive and negative) commands cache:
+        self._resolved = {}
+        # Index lock:
+        self._lock = threading.Lock()
+
+        # Index status declaration:
+        self.built = False
+        self.templates = 0
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class TemplateIndex ({self.commands_path}: {self.templates} templates)>'
+
+    def build(self, textfsm_names: list = None) -> None:
+        """
+        Scan commands directory and build the template index.
+
+        Parameters:
+        -----------------
+        textfsm_names: List
+            Text FSM device type names, used as templates file name prefixes (Optional).
+        """
+
+        # Collect template file name prefixes, longest first:
+        if textfsm_names is None:
+            textfsm_names = collect_device_type_textfsm_names()
+        prefixes = sorted(set(textfsm_names), key=len, reverse=True)
+
+        trees = {}
+        templates = 0
+
+        # Walk through all vendor directories:
+        for directory, _, filenames in os.walk(self.commands_path):
+            for filename in filenames:
+                if not filename.endswith('.textfsm'):
+                    continue
+                # Collect device type name and command from template file name:
+                name = filename[:-len('.textfsm')]
+                for prefix in prefixes:
+                    if name.startswith(f'{prefix}_'):
+                        tokens = name[len(prefix) + 1:].split('_')
+                        break
+                else:
+                    continue
+
+                # Add command tokens to device type tree, matched case insensitive (e.g. HundredGigabitEthernet):
+                node = trees.setdefault(prefix, {})
+                for token in tokens:
+                    node = node.setdefault(token.lower(), {})
+                # Canonical command keeps case of template file name:
+                node[None] = (' '.join(tokens), os.path.join(directory, filename))
+                templates += 1
+
+        with self._lock:
+            self._trees = trees
+            self._resolved = {}
+            self.templates = templates
+            self.built = True
+
+    def resolve(self, textfsm_name: str, command: str) -> tuple:
+        """
+        Return canonical command and template path for provided command.
+
+        Parameters:
+        -----------------
+        textfsm_name: String
+            Text FSM device type name (e.g. cisco_ios).
+        command: String
+            Full or abbreviated CLI command.
+
+        Return:
+        --------
+        Tuple containing canonical command and template path, or None if there is no template.
+        """
+
+        # Build index on first use, if it was not built on worker boot:
+        if self.built is False:
+            self.build()
+
+        # Serve already resolved commands:
+        key = (textfsm_name, command)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+
+        # Resolve command tokens using device type tree:
+        tokens = command.lower().split()
+        tree = self._trees.get(textfsm_name)
+        if tree is None or not tokens:
+            resolved = None
+        else:
+            resolved = self._walk(tree, tokens)
+
+        with self._lock:
+            # Drop resolved commands above cache size:
+            if len(self._resolved) >= self.resolved_size:
+                self._resolved.clear()
+            self._resolved[key] = resolved
+
+        # Return resolved command:
+        return resolved
+
+    def stats(self) -> dict:
+        """ Return index statistics. """
+
+        return {
+            'templates': self.templates,
+            'device_types': len(self._trees),
+            'resolved': sum(1 for value in self._resolved.values() if value is not None),
+            'unresolved': sum(1 for value in self._resolved.values() if value is None),
+        }
+
+    def _walk(self, node, tokens):
+        """
+        Depth first search of command tokens, exact tokens first, then aliases and abbreviations.
+        Abbreviation matching more than one template is ambiguous (as on device CLI) and returns None.
+        """
+
+        # Check if all tokens were matched to a template:
+        if not tokens:
+            return node.get(None)
+
+        token = tokens[0]
+        candidates = []
+        # Exact token:
+        if token in node:
+            candidates.append(token)
+        # Aliased token:
+        alias = COMMAND_ALIASES.get(token)
+        if alias is not None and alias in node and alias not in candidates:
+            candidates.append(alias)
+
+        for candidate in candidates:
+            resolved = self._walk(node[candidate], tokens[1:])
+            if resolved is not None:
+                return resolved
+
+        # Abbreviated token:
+        matches = []
+        for child in node:
+            if child is not None and child not in candidates and child.startswith(token):
+                resolved = self._walk(node[child], tokens[1:])
+                if resolved is not None:
+                    matches.append(resolved)
+
+        # Only unambiguous abbreviation is resolved:
+        if len(matches) == 1:
+            return matches[0]
+        return None
+
+
+# Process-wide template index:
+template_index = TemplateIndex()
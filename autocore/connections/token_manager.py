@@ -0,0 +1,238 @@
+# Document descryption:
+__author__ = 'Robert Tadeusz Kucharski'
+__version__ = '1.0'
+
+# Python Import:
+import threading
+import json
+import time
+
+# Requests Import:
+import requests
+
+# HTTPS session pool Import:
+from .http_session_pool import http_session_pool
+
+# Device name translation Import:
+from .device_name_translation import collect_device_type_value_from_id
+
+# Logger import:
+from logger.logger import Logger
+
+# Logger class initiation:
+logger = Logger('API token manager')
+
+# Default token settings:
+DEFAULT_TOKEN_TTL = 600
+REFRESH_AHEAD = 0.2
+LOGIN_TIMEOUT = 30
+
+
+class LoginError(ValueError):
+    """ API login response does not contain token in expected format. """
+
+
+def _collect_value(data, path: str):
+    """ Collect value from decoded JSON data, using dotted path (e.g. imdata.0.aaaLogin.attributes.token). """
+
+    for name in path.split('.'):
+        if isinstance(data, list):
+            data = data[int(name)]
+        else:
+            data = data[name]
+    return data
+
+
+# Main TokenManager class:
+class TokenManager:
+    """
+    Per worker cache of API authentication tokens, shared by all ApiCon objects.
+    Device (or controller) is logged in once, token is reused until it expires
+    and refreshed ahead of expiry. Only one thread logs in per device at a time,
+    other threads wait for its token (or keep using current token during refresh).
+    Login settings are defined by device type "api_auth" value:
+
+        api_auth:
+          url: api/aaaLogin.json                         # Login URL path.
+          payload: '{"aaaUser": {"attributes": {"name": "{username}", "pwd": "{password}"}}}'
+          token_path: imdata.0.aaaLogin.attributes.token  # Token location in JSON response.
+          ttl_path: imdata.0.aaaLogin.attributes.refreshTimeoutSeconds  # Token lifetime (Optional).
+          ttl: 600                                        # Default token lifetime (Optional).
+          header: Cookie                                  # Request header of token.
+          header_format: APIC-cookie={token}              # Request header value (Optional).
+
+    Methods:
+    --------
+    config:
+        Return login settings of device type.
+    token:
+        Return valid token of device, device is logged in if required.
+        Raises requests exceptions or LoginError, if login failed.
+    invalidate:
+        Remove token rejected by device.
+    clear:
+        Remove all tokens.
+    stats:
+        Return login statistics.
+    """
+
+    def __init__(self) -> None:
+        # Tokens per key, as dictionary of token and expiry time:
+        self._tokens = {}
+        # Single login lock per key:
+        self._locks = {}
+        self._lock = threading.Lock()
+
+        # Login counters declaration:
+        self.logins = 0
+        self.hits = 0
+
+    def __repr__(self) -> str:
+        """ Class representation. """
+        return f'<Class TokenManager ({len(self._tokens)} tokens)>'
+
+    def config(self, device_type: int) -> dict:
+        """ Return login settings of device type, or None if device type does not use tokens. """
+
+        return collect_device_type_value_from_id(device_type, 'api_auth')
+
+    def _key(self, connection) -> tuple:
+        """ Create token key from device and credential, password is stored only as a hash. """
+
+        return (connection.device_hostname, connection.device_https_port, *connection.credential_key())
+
+    def _key_lock(self, key):
+        """ Return login lock of key. """
+
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def token(self, connection) -> dict:
+        """
+        Return valid token of device, device is logged in if required.
+
+        Parameters:
+        -----------------
+        connection: ApiCon
+            Connection object of device.
+
+        Return:
+        --------
+        Dictionary of request header name and value, with token.
+        """
+
+        config = self.config(connection.device_type)
+        key = self._key(connection)
+        entry = self._tokens.get(key)
+        now = time.monotonic()
+
+        # Use valid token, that does not require refresh:
+        if entry is not None and now < entry['refresh']:
+            self.hits += 1
+            return self._header(config, entry['token'])
+
+        lock = self._key_lock(key)
+
+        # Token requires refresh, but it is still valid, so only one thread refreshes it:
+        if entry is not None and now < entry['expires']:
+            if lock.acquire(blocking=False):
+                try:
+                    entry = self._login(connection, config, key)
+                except (requests.exceptions.RequestException, LoginError) as error:
+                    # Current token is used until it expires, refresh is repeated by next request:
+                    logger.warning(
+                        f'API token refresh failed: {error}', connection.task_id, connection.device_name)
+                finally:
+                    lock.release()
+            self.hits += 1
+            # Token could be removed by invalidate meanwhile:
+            return self._header(config, self._tokens.get(key, entry)['token'])
+
+        # Token is missing or expired, wait for a single login:
+        with lock:
+            entry = self._tokens.get(key)
+            if entry is None or time.monotonic() >= entry['expires']:
+                entry = self._login(connection, config, key)
+        return self._header(config, entry['token'])
+
+    def invalidate(self, connection, header: dict) -> None:
+        """
+        Remove token rejected by device (e.g. after 401 response).
+        Token is removed only if it was not replaced already by other thread.
+        """
+
+        key = self._key(connection)
+        config = self.config(connection.device_type)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is not None and self._header(config, entry['token']) == header:
+                del self._tokens[key]
+
+    def clear(self) -> None:
+        """ Remove all tokens. """
+
+        with self._lock:
+            self._tokens = {}
+
+    def stats(self) -> dict:
+        """ Return login statistics. """
+
+        return {'tokens': len(self._tokens), 'logins': self.logins, 'hits': self.hits}
+
+    def _header(self, config, token) -> dict:
+        """ Create request header with token. """
+
+        return {config['header']: config.get('header_format', '{token}').format(token=token)}
+
+    def _login(self, connection, config, key) -> dict:
+        """ Log in to device and store token. """
+
+        logger.debug('API login has been started.', connection.task_id, connection.device_name)
+
+        # Login payload is created from template, with JSON escaped credentials:
+        payload = config.get('payload')
+        if payload is not None:
+            payload = payload.replace('{username}', json.dumps(connection.device_username)[1:-1])
+            payload = payload.replace('{password}', json.dumps(connection.device_password or '')[1:-1])
+
+        session = http_session_pool.acquire(
+            connection.device_hostname, connection.device_https_port, connection.credential_key())
+        response = session.request(
+            config.get('method', 'POST'),
+            f'https://{connection.device_hostname}:{connection.device_https_port}/{config["url"]}',
+            data=payload,
+            auth=None if payload is not None else (connection.device_username, connection.device_password),
+            headers={'Content-Type': 'application/json', 'Accept': 'application/json'},
+            verify=connection.device_certificate,
+            timeout=LOGIN_TIMEOUT)
+        response.raise_for_status()
+
+        # Collect token and its lifetime:
+        try:
+            data = response.json()
+            token = _collect_value(data, config['token_path'])
+        except (KeyError, IndexError, TypeError, ValueError) as error:
+            raise LoginError(f'API login response does not contain token ({config["token_path"]}): {error!r}') from error
+        ttl = config.get('ttl', DEFAULT_TOKEN_TTL)
+        if config.get('ttl_path'):
+            try:
+                ttl = float(_collect_value(data, config['ttl_path']))
+            except (KeyError, IndexError, TypeError, ValueError):
+                pass
+
+        now = time.monotonic()
+        entry = {
+            'token': token,
+            'expires': now + ttl,
+            'refresh': now + ttl * (1 - REFRESH_AHEAD),
+        }
+        with self._lock:
+            self._tokens[key] = entry
+            self.logins += 1
+
+        logger.info('API login has been finished.', connection.task_id, connection.device_name)
+        return entry
+
+
+# Process-wide (per worker) token manager:
+token_manager = TokenManager()
@@ -1,4 +1,6 @@
 from celery import Celery
+from celery.signals import worker_init
+from celery.signals import worker_process_shutdown
 import os
 
 # set the default Django settings module for the 'celery' program.
@@ -11,3 +13,25 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
+
+
+@worker_init.connect
+def build_template_index(**kwargs):
+    """ Build Text FSM template index once, before worker processes are forked. """
+
+    from autocore.connections.template_index import template_index
+    template_index.build()
+
+
+@worker_process_shutdown.connect
+def close_worker_pools(**kwargs):
+    """ Close idle SSH and HTTPS sessions, jump host transports and parser processes of the worker process. """
+
+    from autocore.connections.session_pool import session_pool
+    from autocore.connections.parser_pool import parser_pool
+    from autocore.connections.jump_host_pool import jump_host_pool
+    from autocore.connections.http_session_pool import http_session_pool
+    session_pool.close_all()
+    http_session_pool.close_all()
+    jump_host_pool.close_all()
+    parser_pool.shutdown()
@@ -100,6 +100,15 @@ CHANNEL_LAYERS = {
 }
 
 
+# Shared cache (Device health and autodetect fingerprints):
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
@@ -5,11 +5,13 @@ from django.contrib import admin
 from .models.color import *
 from .models.group import *
 from .models.credential import *
+from .models.jump_host import *
 from .models.device import *
 
 # Register Application models in Django Admin:
 admin.site.register(Color)
 admin.site.register(Credential)
+admin.site.register(JumpHost)
 admin.site.register(Group)
 admin.site.register(DeviceData)
 admin.site.register(DeviceRawData)
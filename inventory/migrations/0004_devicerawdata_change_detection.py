@@ -0,0 +1,33 @@
+# Written by hand for Django 4.0.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_alter_device_device_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='devicerawdata',
+            name='command_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='devicerawdata',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='devicerawdata',
+            name='seen_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='devicerawdata',
+            name='change_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.0.4 on 2026-10-18 12:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_devicerawdata_change_detection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JumpHost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('root', models.BooleanField(default=False)),
+                ('deleted', models.BooleanField(default=False)),
+                ('active', models.BooleanField(default=True)),
+                ('name', models.CharField(error_messages={'blank': 'Name field is mandatory.', 'invalid': 'Enter the correct name value. It must contain 4 to 32 digits, letters and special characters -, _ or spaces.', 'null': 'Name field is mandatory.', 'unique': 'ModelBase with this name already exists.'}, max_length=32, unique=True)),
+                ('description', models.CharField(default='ModelBase description.', error_messages={'invalid': 'Enter the correct description value. It must contain 8 to 256 digits, letters and special characters -, _, . or spaces.'}, max_length=256)),
+                ('hostname', models.CharField(error_messages={'blank': 'IP / DNS name field is mandatory.', 'invalid': 'Enter a valid IP address or DNS resolvable hostname. It must contain 4 to 32 digits, letters and special characters -, _, . or spaces.', 'null': 'IP / DNS name field is mandatory.'}, max_length=32)),
+                ('ssh_port', models.IntegerField(default=22)),
+                ('max_channels', models.IntegerField(default=50)),
+                ('credential', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='inventory.credential')),
+            ],
+            options={
+                'permissions': [],
+                'abstract': False,
+                'default_permissions': ['read_only', 'read_write'],
+            },
+        ),
+        migrations.AddField(
+            model_name='credential',
+            name='jump_host',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='credentials', to='inventory.jumphost'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='jump_host',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='inventory.jumphost'),
+        ),
+    ]
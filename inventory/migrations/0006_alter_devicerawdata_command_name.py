@@ -0,0 +1,18 @@
+# Written by hand for Django 4.0.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_jumphost'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='devicerawdata',
+            name='command_name',
+            field=models.CharField(max_length=255),
+        ),
+    ]
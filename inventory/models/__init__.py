@@ -1,5 +1,6 @@
 # Application Import:
 from .color import *
 from .credential import *
+from .jump_host import *
 from .device import *
 from .group import *
\ No newline at end of file
@@ -22,3 +22,6 @@ class Credential(BaseMainModel):
         },
     )
     password = models.CharField(max_length=64, null=True, blank=True)
+
+    # Jump host used to reach devices:
+    jump_host = models.ForeignKey('JumpHost', on_delete=models.SET_NULL, null=True, blank=True, related_name='credentials')
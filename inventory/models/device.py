@@ -125,9 +125,15 @@ class DeviceRawData(BaseSubModel):
     device = models.ForeignKey(Device, on_delete=models.CASCADE)
 
     # Command raw data:
-    command_name = models.CharField(max_length=64)
+    command_name = models.CharField(max_length=255)
     command_data = models.TextField(null=True, blank=True)
 
+    # Command raw data change detection:
+    command_hash = models.CharField(max_length=64, null=True, blank=True)
+    last_seen = models.DateTimeField(null=True, blank=True)
+    seen_count = models.IntegerField(default=0)
+    change_count = models.IntegerField(default=0)
+
     # Model representation:
     def __str__(self) -> str:
         return f"DeviceRawData({self.pk}: device({self.device}), '{self.command_name}')"
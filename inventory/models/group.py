@@ -3,6 +3,7 @@ from django.db import models
 
 # Other models Import:
 from .device import Device
+from .jump_host import JumpHost
 
 # Base Model Import:
 from main.basemodel import BaseMainModel
@@ -14,3 +15,6 @@ class Group(BaseMainModel):
 
     # Relationships with other models:
     devices = models.ManyToManyField(Device)
+
+    # Jump host used to reach group devices:
+    jump_host = models.ForeignKey(JumpHost, on_delete=models.SET_NULL, null=True, blank=True)
@@ -0,0 +1,34 @@
+# Django Import:
+from django.db import models
+
+# Other models Import:
+from .credential import Credential
+
+# Base Model Import:
+from main.basemodel import BaseMainModel
+
+
+# Model code:
+class JumpHost(BaseMainModel):
+    """ 
+        The Jump Host specifies the SSH bastion, that is used
+        to reach network devices that are not directly accessible.
+    """
+
+    # Main model values:
+    hostname = models.CharField(
+        max_length=32,
+        blank=False,
+        error_messages={
+            'null': 'IP / DNS name field is mandatory.',
+            'blank': 'IP / DNS name field is mandatory.',
+            'invalid': 'Enter a valid IP address or DNS resolvable hostname. It must contain 4 to 32 digits, letters and special characters -, _, . or spaces.',
+        },
+    )
+    ssh_port = models.IntegerField(default=22)
+
+    # Security and credentials:
+    credential = models.ForeignKey(Credential, on_delete=models.PROTECT, null=True, blank=True)
+
+    # Maximum number of device sessions opened through jump host at once:
+    max_channels = models.IntegerField(default=50)
@@ -1,3 +1,958 @@
-from django.test import TestCase
+from django.test import TestCase, SimpleTestCase, override_settings
+
+# Python Import:
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import threading
+import asyncio
+import csv
+import tempfile
+import time
+import os
+
+# Python unittest Import:
+from unittest import mock
+
+# Template index Import:
+from autocore.connections.template_index import TemplateIndex
+
+# Device health Import:
+from autocore.connections.device_health import DeviceHealth, AUTHENTICATION, TIMEOUT, ERROR, FAIL_FAST, OPEN, CLOSED
+
+# Columnar result table Import:
+from autocore.connections.result_table import ResultTable
+
+# NumPy Import:
+import numpy as np
+
+# Session pool Import:
+from autocore.connections.session_pool import SessionPool
+
+# Connection Import:
+from autocore.connections.netcon import NetCon
+
+# OpenSSH connection Import:
+from autocore.connections.opensshcon import OpenSSHCon
+
+# Device type autodetect Import:
+from autocore.connections.autodetect import cache_device_type_id
+
+# Fleet execution Import:
+from autocore.connections.fleet import FleetExecutor
+
+# Command timing Import:
+from autocore.connections.command_timing import CommandTiming, MIN_SAMPLES
+
+# Response cache Import:
+from autocore.connections.response_cache import ResponseCache
+
+# HTTPS connection Import:
+from autocore.connections.apicon import ApiCon
+
+# RESTCONF reader Import:
+from autocore.connections.restconf_reader import RestconfReader
+from autocore.connections.rate_limiter import rate_limiter, RateLimiter, DeviceLimit, collect_retry_after
+
+# API token manager Import:
+from autocore.connections.token_manager import TokenManager, LoginError
+
+# Requests Import:
+import requests
+
+# Change detection Import:
+from autocore.connections.change_detection import output_hash, collect_changed_outputs
+
+# Model Import:
+from inventory.models.device import Device, DeviceRawData
+
+
+# Local memory cache, used instead of worker Redis cache:
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'nap-tests'}}
+
 
 # Create your tests here.
+class TemplateIndexTest(SimpleTestCase):
+    """ Command resolution of Text FSM template index. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        for name in (
+            'cisco_ios_show_ip_interface_brief',
+            'cisco_ios_show_interfaces',
+            'cisco_ios_show_inventory',
+            'cisco_ios_show_version',
+            'cisco_xr_show_controllers_HundredGigabitEthernet',
+        ):
+            with open(os.path.join(self.directory.name, f'{name}.textfsm'), 'w') as file:
+                file.write('')
+        self.index = TemplateIndex(self.directory.name)
+        self.index.build(['cisco_ios', 'cisco_xr'])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_full_command(self):
+        command, path = self.index.resolve('cisco_ios', 'show version')
+        self.assertEqual(command, 'show version')
+        self.assertTrue(path.endswith('cisco_ios_show_version.textfsm'))
+
+    def test_abbreviated_and_aliased_command(self):
+        self.assertEqual(self.index.resolve('cisco_ios', 'sh ip int br')[0], 'show ip interface brief')
+        self.assertEqual(self.index.resolve('cisco_ios', 'show int')[0], 'show interfaces')
+        self.assertEqual(self.index.resolve('cisco_ios', 'sh ver')[0], 'show version')
+
+    def test_ambiguous_abbreviation(self):
+        # "show i" matches show interfaces and show inventory:
+        self.assertIsNone(self.index.resolve('cisco_ios', 'show i'))
+
+    def test_mixed_case_template_name(self):
+        for command in (
+            'show controllers HundredGigabitEthernet',
+            'show controllers hundredgigabitethernet',
+            'sh controllers Hu',
+        ):
+            resolved = self.index.resolve('cisco_xr', command)
+            self.assertEqual(resolved[0], 'show controllers HundredGigabitEthernet', command)
+
+    def test_unknown_command_and_device_type(self):
+        self.assertIsNone(self.index.resolve('cisco_ios', 'show clock'))
+        self.assertIsNone(self.index.resolve('juniper_junos', 'show version'))
+
+
+class FleetExecutorTest(TestCase):
+    """ Thread pool execution of fleet executor. """
+
+    def setUp(self):
+        self.devices = [Device(name=f'device-{number}', hostname=f'10.0.0.{number}') for number in range(10)]
+
+    def test_map_returns_every_device(self):
+        fleet = FleetExecutor(self.devices, max_sessions=4)
+        output = dict((device.name, value) for device, value in fleet.map(lambda device: device.hostname))
+        self.assertEqual(output, {device.name: device.hostname for device in self.devices})
+
+    def test_map_returns_exception_of_device(self):
+        def function(device):
+            raise ValueError(device.name)
+
+        fleet = FleetExecutor(self.devices[:1], max_sessions=1)
+        device, output = next(fleet.map(function))
+        self.assertIsInstance(output, ValueError)
+
+    def test_map_cancels_pending_devices_on_close(self):
+        started = []
+        lock = threading.Lock()
+
+        def function(device):
+            with lock:
+                started.append(device.name)
+            time.sleep(0.05)
+            return device.name
+
+        fleet = FleetExecutor(self.devices, max_sessions=2)
+        for _ in fleet.map(function):
+            break
+
+        # Only devices running at the moment of break were executed:
+        self.assertLessEqual(len(started), 4)
+
+
+class FakeSession:
+    """ Netmiko connection replacement, used by session pool tests. """
+
+    def __init__(self, alive: bool = True):
+        self.alive = alive
+        self.disconnected = False
+
+    def is_alive(self):
+        return self.alive
+
+    def clear_buffer(self):
+        pass
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+class SessionPoolTest(SimpleTestCase):
+    """ Reuse and eviction of pooled SSH sessions. """
+
+    def setUp(self):
+        self.pool = SessionPool(max_size=2, idle_ttl=60)
+        self.key = self.pool.key('10.0.0.1', 22, 'admin', 'secret', 'cisco_ios')
+
+    def tearDown(self):
+        self.pool.close_all()
+
+    def test_key_does_not_contain_password(self):
+        self.assertNotIn('secret', self.key)
+        self.assertNotEqual(self.key, self.pool.key('10.0.0.1', 22, 'admin', 'other', 'cisco_ios'))
+
+    def test_acquire_released_session(self):
+        session = FakeSession()
+        self.assertIsNone(self.pool.acquire(self.key))
+        self.pool.release(self.key, session)
+        self.assertIs(self.pool.acquire(self.key), session)
+        self.assertEqual((self.pool.hits, self.pool.misses), (1, 1))
+
+    def test_dead_session_is_not_reused(self):
+        session = FakeSession(alive=False)
+        self.pool.release(self.key, session)
+        self.assertIsNone(self.pool.acquire(self.key))
+        self.assertTrue(session.disconnected)
+
+    def test_sessions_above_max_size_are_closed(self):
+        sessions = [FakeSession() for _ in range(3)]
+        for number, session in enumerate(sessions):
+            self.pool.release(self.pool.key(f'10.0.0.{number}', 22, 'admin', 'secret', 'cisco_ios'), session)
+        self.assertEqual(len(self.pool), 2)
+        self.assertTrue(sessions[0].disconnected)
+        self.assertFalse(sessions[2].disconnected)
+
+    def test_release_closes_idle_sessions(self):
+        idle = FakeSession()
+        self.pool.release(self.key, idle)
+        now = time.monotonic()
+        with mock.patch('autocore.connections.session_pool.time.monotonic', return_value=now + 61):
+            self.pool.release(self.pool.key('10.0.0.2', 22, 'admin', 'secret', 'cisco_ios'), FakeSession())
+        self.assertTrue(idle.disconnected)
+        self.assertEqual(len(self.pool), 1)
+
+    def test_idle_sessions_are_closed_without_pool_use(self):
+        pool = SessionPool(idle_ttl=1)
+        session = FakeSession()
+        pool.release(self.key, session)
+        deadline = time.monotonic() + 5
+        while not session.disconnected and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self.assertTrue(session.disconnected)
+        self.assertEqual(len(pool), 0)
+
+
+class FakeChannel:
+    """ Netmiko connection replacement, that returns provided chunks of SSH channel data. """
+
+    base_prompt = 'R1'
+    RETURN = '\n'
+
+    def __init__(self, chunks: list):
+        self.chunks = list(chunks)
+
+    def write_channel(self, data):
+        pass
+
+    def read_channel(self):
+        return self.chunks.pop(0) if self.chunks else ''
+
+
+class NetConStreamTest(TestCase):
+    """ Streaming of command output from SSH channel. """
+
+    def _connection(self, chunks):
+        connection = NetCon.__new__(NetCon)
+        connection.task_id = None
+        connection.device_name = 'R1'
+        connection.connection_status = True
+        connection.connection = FakeChannel(chunks)
+        return connection
+
+    def test_stream_complete_lines(self):
+        connection = self._connection(['show clock\n10:00:00', '.000 UTC\nline 2\nR1#'])
+        self.assertEqual(
+            ''.join(connection.stream_command('show clock', read_timeout=1)), '10:00:00.000 UTC\nline 2\n')
+
+    def test_stream_timeout_raises(self):
+        connection = self._connection(['show clock\n10:00:00.000 UTC\n'])
+        with self.assertRaises(TimeoutError):
+            list(connection.stream_command('show clock', read_timeout=0))
+        self.assertFalse(connection.connection_status)
+
+
+class OpenSSHConTest(SimpleTestCase):
+    """ Control directory and output streaming of OpenSSH connection. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        OpenSSHCon._control_dir_checked = None
+        OpenSSHCon._askpass_written = False
+        self.addCleanup(setattr, OpenSSHCon, '_control_dir_checked', None)
+        self.addCleanup(setattr, OpenSSHCon, '_askpass_written', False)
+
+    def _connection(self, script=''):
+        connection = OpenSSHCon.__new__(OpenSSHCon)
+        connection.task_id = None
+        connection.device_name = 'R1'
+        connection.device_hostname = '10.0.0.1'
+        connection.device_ssh_port = 22
+        connection.device_username = 'admin'
+        connection.device_password = 'secret'
+        connection.connection_status = True
+        connection.control_dir = os.path.join(self.directory.name, 'control')
+        # Fake OpenSSH client:
+        connection.ssh_binary = os.path.join(self.directory.name, 'ssh')
+        with open(connection.ssh_binary, 'w') as file:
+            file.write(f'#!/bin/sh\n{script}\n')
+        os.chmod(connection.ssh_binary, 0o700)
+        return connection
+
+    def test_control_directory_is_private(self):
+        connection = self._connection()
+        self.assertTrue(connection._askpass_path().startswith(connection.control_dir))
+        self.assertEqual(os.stat(connection.control_dir).st_mode & 0o777, 0o700)
+
+    def test_control_directory_accessible_by_others_is_rejected(self):
+        connection = self._connection()
+        os.makedirs(connection.control_dir, mode=0o777)
+        os.chmod(connection.control_dir, 0o777)
+        with self.assertRaises(PermissionError):
+            connection._control_path()
+
+    def test_control_directory_link_is_rejected(self):
+        connection = self._connection()
+        os.symlink(self.directory.name, connection.control_dir)
+        with self.assertRaises(PermissionError):
+            connection._control_path()
+
+    def test_stream_decodes_characters_split_between_chunks(self):
+        # "ą" character is split between two writes:
+        connection = self._connection("printf 'a\\304'; sleep 0.1; printf '\\205b\\r\\n'")
+        self.assertEqual(''.join(connection.stream_command('show clock', read_timeout=5)), 'a\u0105b\n')
+
+    def test_stream_connection_error_raises(self):
+        connection = self._connection("echo 'Connection refused' >&2; exit 255")
+        with self.assertRaisesRegex(ConnectionError, 'Connection refused'):
+            list(connection.stream_command('show clock', read_timeout=5))
+        self.assertFalse(connection.connection_status)
+
+    def test_stream_timeout_raises(self):
+        connection = self._connection('sleep 5')
+        with self.assertRaises(TimeoutError):
+            list(connection.stream_command('show clock', read_timeout=0.1))
+
+
+class FakeAutodetect:
+    """ SSHDetect replacement, with SSH server identification string of connected session. """
+
+    def __init__(self, banner: str):
+        transport = mock.Mock(remote_version=banner)
+        self.connection = mock.Mock()
+        self.connection.remote_conn_pre.get_transport.return_value = transport
+        self.potential_matches = {}
+
+    def __getattr__(self, name):
+        # Autodetect methods return decisive match of Cisco IOS:
+        return lambda **kwargs: 99 if name == '_autodetect_std' and 'Cisco IOS Software' in str(kwargs) else 0
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class NetConAutodetectTest(TestCase):
+    """ Device type autodetect, using cached device fingerprint. """
+
+    def _connection(self, banner):
+        connection = NetCon.__new__(NetCon)
+        connection.task_id = None
+        connection.device_name = 'R1'
+        connection.device_hostname = '10.0.0.1'
+        connection.connection = FakeAutodetect(banner)
+        return connection
+
+    def test_cached_fingerprint_skips_autodetect_methods(self):
+        cache_device_type_id('10.0.0.1', 'SSH-2.0-Cisco-1.25', 3)
+        connection = self._connection('SSH-2.0-Cisco-1.25')
+        self.assertEqual(connection._detect_device_type(), 'cisco_xr')
+        self.assertEqual(connection.connection.potential_matches, {})
+
+    def test_detected_device_type_is_cached(self):
+        connection = self._connection('SSH-2.0-Cisco-1.99')
+        self.assertEqual(connection._detect_device_type(), 'cisco_ios')
+        self.assertEqual(connection.connection.potential_matches, {'cisco_ios': 99})
+        # Next autodetect of the same device is served from cache:
+        connection = self._connection('SSH-2.0-Cisco-1.99')
+        self.assertEqual(connection._detect_device_type(), 'cisco_ios')
+        self.assertEqual(connection.connection.potential_matches, {})
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class DeviceHealthTest(SimpleTestCase):
+    """ Circuit breaker state machine of device health. """
+
+    def setUp(self):
+        self.health = DeviceHealth('10.0.0.1', 22)
+        self.health.reset()
+
+    def tearDown(self):
+        self.health.reset()
+
+    def _after_cool_down(self):
+        return mock.patch(
+            'autocore.connections.device_health.time.time',
+            return_value=self.health.state()['open_until'] + 1)
+
+    def test_closed_circuit_allows_requests(self):
+        self.assertTrue(self.health.allow_request())
+        self.assertEqual(self.health.state()['state'], CLOSED)
+
+    def test_authentication_failure_opens_circuit(self):
+        self.assertTrue(self.health.record_failure(AUTHENTICATION))
+        self.assertFalse(self.health.allow_request())
+
+    def test_timeout_is_not_retried(self):
+        self.assertIn(TIMEOUT, FAIL_FAST)
+
+    def test_consecutive_failures_open_circuit(self):
+        self.assertFalse(self.health.record_failure(TIMEOUT))
+        self.assertFalse(self.health.record_failure(TIMEOUT))
+        # Failure of other type breaks the sequence:
+        self.assertFalse(self.health.record_failure(ERROR))
+        self.assertFalse(self.health.record_failure(TIMEOUT))
+        self.assertFalse(self.health.record_failure(TIMEOUT))
+        self.assertTrue(self.health.record_failure(TIMEOUT))
+        self.assertEqual(self.health.state()['failures'], 3)
+
+    def test_single_probe_after_cool_down(self):
+        self.health.record_failure(AUTHENTICATION)
+        other_worker = DeviceHealth('10.0.0.1', 22)
+        with self._after_cool_down():
+            self.assertTrue(self.health.allow_request())
+            self.assertFalse(other_worker.allow_request())
+
+    def test_failed_probe_opens_circuit_again(self):
+        self.health.record_failure(AUTHENTICATION)
+        with self._after_cool_down():
+            self.assertTrue(self.health.allow_request())
+        opened_until = self.health.state()['open_until']
+        self.assertTrue(self.health.record_failure(AUTHENTICATION))
+        state = self.health.state()
+        self.assertEqual((state['state'], state['opened']), (OPEN, 2))
+        self.assertGreater(state['open_until'], opened_until)
+        # Next open period allows a new single probe:
+        with self._after_cool_down():
+            self.assertTrue(self.health.allow_request())
+            self.assertFalse(self.health.allow_request())
+
+    def test_success_closes_circuit(self):
+        self.health.record_failure(AUTHENTICATION)
+        self.health.record_success()
+        self.assertTrue(self.health.allow_request())
+        self.assertFalse(self.health.record_failure(TIMEOUT))
+        self.assertEqual(self.health.state()['failures'], 1)
+
+    def test_retry_delay_is_limited(self):
+        for attempt in range(10):
+            self.assertLessEqual(self.health.retry_delay(attempt, 2), 30)
+
+
+class ResultTableTest(SimpleTestCase):
+    """ Columnar table of parsed command outputs. """
+
+    def setUp(self):
+        self.first = ResultTable.from_fsm(
+            ['INTERFACE', 'MTU', 'IP_ADDRESS'],
+            [['Gi1', '1500', ['10.0.0.1', '10.0.1.1']], ['Gi2', '', ['10.0.0.2', '10.0.1.2']]],
+            'router-1')
+        self.second = ResultTable.from_fsm(
+            ['INTERFACE', 'MTU', 'CRC'],
+            [['Gi1', '9000', '5'], ['Gi2, "uplink"', '1500', '7']],
+            'router-2')
+
+    def test_from_fsm_column_types(self):
+        self.assertEqual(self.first['MTU'].dtype, np.float64)
+        self.assertTrue(np.isnan(self.first['MTU'][1]))
+        self.assertEqual(self.second['MTU'].dtype, np.int64)
+        self.assertEqual(self.first['DEVICE'].tolist(), ['router-1', 'router-1'])
+        # Text FSM List values are kept as list objects in one dimensional array:
+        self.assertEqual(self.first['IP_ADDRESS'].shape, (2,))
+        self.assertEqual(self.first['IP_ADDRESS'][0], ['10.0.0.1', '10.0.1.1'])
+
+    def test_from_fsm_empty_result(self):
+        table = ResultTable.from_fsm(['INTERFACE', 'MTU'], [], 'router-1')
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.header, ['DEVICE', 'INTERFACE', 'MTU'])
+
+    def test_concat_promotes_numeric_columns(self):
+        table = ResultTable.concat([self.first, self.second, None])
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table.header, ['DEVICE', 'INTERFACE', 'MTU', 'IP_ADDRESS', 'CRC'])
+        self.assertEqual(table['MTU'].dtype, np.float64)
+        self.assertEqual(table['CRC'].dtype, np.float64)
+        self.assertTrue(np.isnan(table['CRC'][:2]).all())
+        self.assertEqual(table['IP_ADDRESS'].dtype, object)
+        self.assertIsNone(table['IP_ADDRESS'][3])
+
+    def test_concat_intiger_columns(self):
+        table = ResultTable.concat([self.second, self.second])
+        self.assertEqual(table['CRC'].dtype, np.int64)
+        self.assertEqual(table['CRC'].tolist(), [5, 7, 5, 7])
+
+    def test_aggregate(self):
+        table = ResultTable.concat([self.first, self.second])
+        self.assertEqual(table.aggregate('DEVICE', 'MTU'), {'router-1': 1500.0, 'router-2': 10500.0})
+        self.assertEqual(table.aggregate('DEVICE', 'MTU', 'mean'), {'router-1': 1500.0, 'router-2': 5250.0})
+        self.assertEqual(table.aggregate('DEVICE', 'MTU', 'count'), {'router-1': 1, 'router-2': 2})
+        self.assertEqual(table.aggregate('DEVICE', 'MTU', 'max'), {'router-1': 1500.0, 'router-2': 9000.0})
+        self.assertEqual(table.aggregate('DEVICE', 'CRC', 'min')['router-2'], 5.0)
+        # Groups without values return NaN:
+        self.assertTrue(np.isnan(table.aggregate('DEVICE', 'CRC')['router-1']))
+
+    def test_aggregate_errors(self):
+        with self.assertRaises(TypeError):
+            self.first.aggregate('DEVICE', 'INTERFACE')
+        with self.assertRaises(ValueError):
+            self.first.aggregate('DEVICE', 'MTU', 'median')
+
+    def test_where(self):
+        table = ResultTable.concat([self.first, self.second]).where(DEVICE='router-2', INTERFACE='Gi1')
+        self.assertEqual(table['MTU'].tolist(), [9000.0])
+
+    def test_to_csv(self):
+        table = ResultTable.concat([self.first, self.second])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'table.csv')
+            table.to_csv(path)
+            with open(path, newline='') as file:
+                rows = list(csv.reader(file))
+        self.assertEqual(rows[0], table.header)
+        self.assertEqual(rows[2], ['router-1', 'Gi2', '', "['10.0.0.2', '10.0.1.2']", ''])
+        self.assertEqual(rows[4], ['router-2', 'Gi2, "uplink"', '1500.0', '', '7.0'])
+
+
+class FakeChangeConnection:
+    """ Connection returning predefined command outputs. """
+
+    def __init__(self, device, outputs):
+        self.device = device
+        self.outputs = outputs
+        self.processed = []
+
+    def enabled_commands(self, commands, parse=True):
+        return {
+            command: {'command': command[0] if isinstance(command, tuple) else command,
+                      'command_output': self.outputs[command], 'proccessed_output': None}
+            for command in commands}
+
+    def _process_command_output_to_dictionary(self, command, command_output):
+        self.processed.append(command)
+        return {'command': command}
+
+
+class ChangeDetectionTest(TestCase):
+    """ Change detection of command outputs. """
+
+    VERSION = (
+        'Cisco IOS Software, Version 17.3.4\n'
+        'router uptime is {uptime}\n'
+        'System returned to ROM by reload at 10:00:00 UTC Mon Oct 18 2026\n'
+        'Configuration register is 0x2102')
+    CONFIG = (
+        'Building configuration...\n'
+        '! Last configuration change at {clock} UTC Mon Oct 18 2026 by admin\n'
+        'hostname router\n'
+        'interface GigabitEthernet1\n'
+        ' description {description}')
+
+    def setUp(self):
+        self.device = Device.objects.create(name='router', hostname='10.0.0.1')
+
+    def test_output_hash_ignores_volatile_lines(self):
+        self.assertEqual(
+            output_hash('show version', self.VERSION.format(uptime='1 day, 2 hours')),
+            output_hash('show version', self.VERSION.format(uptime='1 day, 3 hours')))
+        self.assertEqual(
+            output_hash('sh run', self.CONFIG.format(clock='10:00:00', description='uplink')),
+            output_hash('sh run', self.CONFIG.format(clock='11:00:00', description='uplink')))
+        self.assertNotEqual(
+            output_hash('show running-config', self.CONFIG.format(clock='10:00:00', description='uplink')),
+            output_hash('show running-config', self.CONFIG.format(clock='10:00:00', description='core')))
+
+    def test_output_hash_keeps_lines_of_other_commands(self):
+        self.assertNotEqual(
+            output_hash('show interfaces', 'Gi1 uptime is 1 day'),
+            output_hash('show interfaces', 'Gi1 uptime is 2 days'))
+
+    def test_collect_changed_outputs(self):
+        commands = ['show version', ('show running-config', '#')]
+        outputs = {
+            'show version': self.VERSION.format(uptime='1 day, 2 hours'),
+            ('show running-config', '#'): self.CONFIG.format(clock='10:00:00', description='uplink')}
+        connection = FakeChangeConnection(self.device, outputs)
+        output = collect_changed_outputs(connection, commands)
+        self.assertTrue(all(command_data['changed'] for command_data in output.values()))
+        self.assertEqual(
+            sorted(DeviceRawData.objects.filter(device=self.device).values_list('command_name', flat=True)),
+            ['show running-config', 'show version'])
+
+        # Only volatile lines changed:
+        outputs['show version'] = self.VERSION.format(uptime='1 day, 3 hours')
+        outputs[('show running-config', '#')] = self.CONFIG.format(clock='11:00:00', description='uplink')
+        output = collect_changed_outputs(connection, commands)
+        self.assertFalse(any(command_data['changed'] for command_data in output.values()))
+        self.assertEqual(connection.processed, ['show version', 'show running-config'])
+
+        # Configuration changed:
+        outputs[('show running-config', '#')] = self.CONFIG.format(clock='12:00:00', description='core')
+        output = collect_changed_outputs(connection, commands)
+        self.assertTrue(output[('show running-config', '#')]['changed'])
+        raw_data = DeviceRawData.objects.get(device=self.device, command_name='show running-config')
+        self.assertEqual((raw_data.seen_count, raw_data.change_count), (3, 2))
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class CommandTimingBatchTest(SimpleTestCase):
+    """ Local batch of command timing histograms. """
+
+    def setUp(self):
+        self.timing = CommandTiming()
+        self.timing.reset()
+
+    def test_batch_loads_and_flushes_once(self):
+        from django.core.cache import cache
+        for _ in range(MIN_SAMPLES):
+            self.timing.record(1, 'show version', 3)
+
+        with mock.patch.object(cache, 'get', wraps=cache.get) as get, \
+                mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many, \
+                mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            batch = self.timing.batch(1, ['show version', 'show inventory'])
+            self.assertEqual(get_many.call_count, 1)
+            self.assertEqual(batch.read_timeout(1, 'show version'), 7.5)
+            self.assertIsNone(batch.read_timeout(1, 'show inventory'))
+            batch.record(1, 'show version', 3)
+            batch.record(1, 'show inventory', 1)
+            # Nothing is written before flush:
+            self.assertEqual(self.timing.stats(1, 'show inventory')['samples'], 0)
+            get.reset_mock()
+            batch.flush()
+
+        # Only learned commands list is read and written by flush, histograms are written at once:
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(set_many.call_count, 1)
+        self.assertEqual(self.timing.stats(1, 'show version')['samples'], MIN_SAMPLES + 1)
+        self.assertEqual(self.timing.stats(1, 'show inventory')['samples'], 1)
+        self.assertEqual([stats['command'] for stats in self.timing.collect(1)], ['show version', 'show inventory'])
+
+    def test_enabled_commands_flushes_batch(self):
+        connection = NetCon(Device(name='router', hostname='10.0.0.1', device_type=1))
+        connection.connection_status = True
+        connection._enabled_command_execution = lambda command, expect_string=False: (
+            connection._command_timing.record(1, command, 1), {'command': command})[1]
+
+        with mock.patch('autocore.connections.netcon.command_timing', self.timing):
+            connection.enabled_commands(['show version', ('show clock', '#')], parse=False)
+
+        self.assertEqual(self.timing.stats(1, 'show version')['samples'], 1)
+        self.assertEqual(self.timing.stats(1, 'show clock')['samples'], 1)
+        self.assertNotIn('_command_timing', vars(connection))
+
+
+class FakeResponse:
+    """ HTTPS response with status code and headers. """
+
+    def __init__(self, status_code, headers=None, content=b'{}'):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+
+
+class ResponseCacheTest(SimpleTestCase):
+    """ Least recently used eviction, TTL and counters of response cache. """
+
+    def setUp(self):
+        self.cache = ResponseCache(max_bytes=100)
+        patcher = mock.patch('autocore.connections.apicon.response_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_least_recently_used_responses_are_evicted(self):
+        self.cache.store('a', {'a': 1}, 40)
+        self.cache.store('b', {'b': 1}, 40)
+        self.cache.get('a')
+        self.cache.store('c', {'c': 1}, 40)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a')['data'], {'a': 1})
+        self.assertEqual(self.cache.size, 80)
+
+    def test_response_larger_than_cache_is_not_stored(self):
+        self.cache.store('a', {'a': 1}, 101)
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_invalidate_removes_device_responses(self):
+        first = self.cache.key('10.0.0.1', 443, '/a')
+        second = self.cache.key('10.0.0.2', 443, '/a')
+        self.cache.store(first, {}, 10)
+        self.cache.store(second, {}, 10)
+        self.cache.invalidate('10.0.0.1', 443)
+        self.assertIsNone(self.cache.get(first))
+        self.assertIsNotNone(self.cache.get(second))
+
+    def _connection(self, response):
+        connection = ApiCon(Device(name='router', hostname='10.0.0.1'))
+        connection.requests = []
+
+        def send(request_method, url, payload, conditional_headers=None, cache_key=None, cache_entry=None):
+            connection.requests.append(conditional_headers)
+            return connection._check_cached_response(response, cache_key, cache_entry)
+
+        def check_response(response):
+            connection.status = True
+            return {'interfaces': ['Gi1']}
+
+        connection._connection = send
+        connection._check_response = check_response
+        return connection
+
+    def test_response_within_ttl_is_served_without_request(self):
+        connection = self._connection(FakeResponse(200, {'ETag': '"1"'}))
+        data = connection._cached_get('/interfaces', None, 60)
+        data['interfaces'].append('Gi2')
+        self.assertEqual(connection._cached_get('/interfaces', None, 60), {'interfaces': ['Gi1']})
+        self.assertEqual(len(connection.requests), 1)
+        self.assertEqual((self.cache.hits, self.cache.revalidated, self.cache.misses), (1, 0, 1))
+
+    def test_not_modified_response_is_counted_once(self):
+        connection = self._connection(FakeResponse(200, {'ETag': '"1"'}))
+        connection._cached_get('/interfaces', None, None)
+        connection = self._connection(FakeResponse(304))
+        self.assertEqual(connection._cached_get('/interfaces', None, None), {'interfaces': ['Gi1']})
+        self.assertEqual(connection.requests, [{'If-None-Match': '"1"'}])
+        self.assertEqual((self.cache.hits, self.cache.revalidated, self.cache.misses), (0, 1, 1))
+
+
+class RestconfReaderTest(SimpleTestCase):
+    """ Parallel subtree collection and failed requests of RESTCONF reader. """
+
+    def setUp(self):
+        rate_limiter.clear()
+        self.addCleanup(rate_limiter.clear)
+        # Cisco XE allows 2 requests in flight:
+        self.reader = RestconfReader(ApiCon(Device(name='router', hostname='10.0.0.1', device_type=2)))
+
+    def _failed_get(self, connection, url, headers=None, item_depth=None, item_name=None):
+        connection.status = False
+        connection.response_code = 500
+        return False
+
+    def test_failed_streamed_request_raises(self):
+        self.reader._get = self._failed_get
+        with self.assertRaisesRegex(ConnectionError, 'Response code: 500'):
+            list(self.reader.iter_records('restconf/data/routes', 'route'))
+
+    def test_failed_page_request_raises(self):
+        self.reader.support = {'pagination': True}
+        self.reader._get = self._failed_get
+        with self.assertRaises(ConnectionError):
+            list(self.reader.iter_records('restconf/data/routes', 'route'))
+
+    def test_subtree_workers_limited_to_device_in_flight_limit(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def iter_records(path, list_name, connection=None, **kwargs):
+            with lock:
+                running.append(path)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(path)
+            yield {'name': path}
+
+        self.reader.iter_records = iter_records
+        subtrees = [(f'restconf/data/subtree-{number}', 'item') for number in range(6)]
+        output = list(self.reader.iter_subtrees(subtrees, max_workers=4))
+        self.assertEqual(len(output), 6)
+        self.assertEqual(max(peak), 2)
+
+
+class FakeLoginSession:
+    """ HTTPS session returning login responses with consecutive tokens. """
+
+    def __init__(self, delay=0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.logins = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        time.sleep(self.delay)
+        if self.fail:
+            raise requests.exceptions.ConnectionError('Connection refused')
+        with self._lock:
+            self.logins += 1
+            token = f'token-{self.logins}'
+        response = mock.Mock()
+        response.json.return_value = {'imdata': [{'aaaLogin': {'attributes': {
+            'token': token, 'refreshTimeoutSeconds': '300'}}}]}
+        return response
+
+
+class TokenManagerTest(SimpleTestCase):
+    """ Login, refresh ahead of expiry and single-flight login of token manager. """
+
+    CONFIG = {
+        'url': 'api/aaaLogin.json',
+        'payload': '{"aaaUser": {"attributes": {"name": "{username}", "pwd": "{password}"}}}',
+        'token_path': 'imdata.0.aaaLogin.attributes.token',
+        'ttl_path': 'imdata.0.aaaLogin.attributes.refreshTimeoutSeconds',
+        'header': 'Cookie',
+        'header_format': 'APIC-cookie={token}',
+    }
+
+    def setUp(self):
+        self.manager = TokenManager()
+        self.manager.config = lambda device_type: self.CONFIG
+        self.connection = ApiCon(Device(name='apic', hostname='10.0.0.1'))
+        self.session = FakeLoginSession()
+        patcher = mock.patch('autocore.connections.token_manager.http_session_pool')
+        self.addCleanup(patcher.stop)
+        patcher.start().acquire.side_effect = lambda *args: self.session
+
+    def _entry(self):
+        return next(iter(self.manager._tokens.values()))
+
+    def test_token_is_reused(self):
+        self.assertEqual(self.manager.token(self.connection), {'Cookie': 'APIC-cookie=token-1'})
+        self.assertEqual(self.manager.token(self.connection), {'Cookie': 'APIC-cookie=token-1'})
+        self.assertEqual(self.manager.stats(), {'tokens': 1, 'logins': 1, 'hits': 1})
+        # Token lifetime is collected from login response:
+        entry = self._entry()
+        self.assertAlmostEqual(entry['expires'] - entry['refresh'], 60, places=3)
+
+    def test_single_login_of_concurrent_requests(self):
+        self.session.delay = 0.05
+        threads = [threading.Thread(target=self.manager.token, args=(self.connection,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.session.logins, 1)
+
+    def test_token_is_refreshed_ahead_of_expiry(self):
+        self.manager.token(self.connection)
+        self._entry()['refresh'] = time.monotonic() - 1
+        self.assertEqual(self.manager.token(self.connection), {'Cookie': 'APIC-cookie=token-2'})
+
+    def test_failed_refresh_keeps_valid_token(self):
+        self.manager.token(self.connection)
+        self._entry()['refresh'] = time.monotonic() - 1
+        self.session.fail = True
+        self.assertEqual(self.manager.token(self.connection), {'Cookie': 'APIC-cookie=token-1'})
+
+    def test_expired_token_requires_login(self):
+        self.manager.token(self.connection)
+        self._entry()['expires'] = self._entry()['refresh'] = time.monotonic() - 1
+        self.session.fail = True
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.manager.token(self.connection)
+
+    def test_invalidate_removes_only_rejected_token(self):
+        header = self.manager.token(self.connection)
+        self.manager.invalidate(self.connection, {'Cookie': 'APIC-cookie=token-0'})
+        self.assertEqual(self.manager.stats()['tokens'], 1)
+        self.manager.invalidate(self.connection, header)
+        self.assertEqual(self.manager.token(self.connection), {'Cookie': 'APIC-cookie=token-2'})
+
+    def test_response_without_token_raises(self):
+        self.manager.config = lambda device_type: {**self.CONFIG, 'token_path': 'imdata.0.missing'}
+        with self.assertRaises(LoginError):
+            self.manager.token(self.connection)
+
+
+class RateLimiterTest(SimpleTestCase):
+    """ Token bucket, in-flight limit and Retry-After parsing of rate limiter. """
+
+    def setUp(self):
+        self.limiter = RateLimiter()
+        # Cisco XE allows 10 requests per second, 20 at once and 2 requests in flight:
+        self.connection = ApiCon(Device(name='router', hostname='10.0.0.1', device_type=2))
+
+    def test_token_bucket(self):
+        device = DeviceLimit(rate=10, burst=2, max_in_flight=2)
+        now = device.updated
+        self.assertEqual(device.reserve(now), 0)
+        self.assertEqual(device.reserve(now), 0)
+        # Bucket is empty, requests are queued:
+        self.assertAlmostEqual(device.reserve(now), 0.1)
+        self.assertAlmostEqual(device.reserve(now), 0.2)
+        # Bucket is refilled by rate:
+        self.assertEqual(device.reserve(now + 10), 0)
+
+    def test_retry_after_delays_requests(self):
+        device = DeviceLimit(rate=None, burst=2, max_in_flight=2)
+        device.blocked_until = device.updated + 5
+        self.assertAlmostEqual(device.reserve(device.updated), 5)
+
+    def test_collect_retry_after(self):
+        def response(status_code, retry_after=None):
+            return FakeResponse(status_code, {} if retry_after is None else {'Retry-After': retry_after})
+
+        self.assertEqual(collect_retry_after(response(429, '3')), 3)
+        self.assertEqual(collect_retry_after(response(503, '3')), 3)
+        self.assertEqual(collect_retry_after(response(429, '3600')), 60)
+        self.assertEqual(collect_retry_after(response(429, '-1')), 0)
+        self.assertEqual(collect_retry_after(response(429)), 1)
+        self.assertEqual(collect_retry_after(response(429, 'later')), 1)
+        self.assertIsNone(collect_retry_after(response(503)))
+        self.assertIsNone(collect_retry_after(response(500, '3')))
+        retry_date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+        self.assertAlmostEqual(collect_retry_after(response(429, retry_date)), 30, delta=2)
+
+    def test_in_flight_limit_is_shared_by_threads_and_event_loops(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def request():
+            with lock:
+                running.append(None)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+        def thread_requests():
+            for _ in range(3):
+                with self.limiter.slot(self.connection):
+                    request()
+
+        async def loop_requests():
+            async def single_request():
+                async with self.limiter.async_slot(self.connection):
+                    await asyncio.get_running_loop().run_in_executor(None, request)
+            await asyncio.gather(*(single_request() for _ in range(3)))
+
+        threads = [threading.Thread(target=thread_requests) for _ in range(2)]
+        threads += [threading.Thread(target=asyncio.run, args=(loop_requests(),)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(peak), 12)
+        self.assertEqual(max(peak), 2)
+
+    def test_idle_devices_are_evicted(self):
+        other = ApiCon(Device(name='router-2', hostname='10.0.0.2', device_type=2))
+        with self.limiter.slot(self.connection):
+            pass
+        self.assertEqual(self.limiter.stats()['devices'], 1)
+
+        # Device was not used for longer than idle TTL:
+        device = self.limiter._devices[('10.0.0.1', 443)]
+        device.updated -= 700
+        device.last_used -= 700
+        self.limiter._evicted -= 700
+        with self.limiter.slot(other):
+            pass
+        self.assertEqual(list(self.limiter._devices), [('10.0.0.2', 443)])
+
+    def test_busy_devices_are_not_evicted(self):
+        other = ApiCon(Device(name='router-2', hostname='10.0.0.2', device_type=2))
+        with self.limiter.slot(self.connection):
+            device = self.limiter._devices[('10.0.0.1', 443)]
+            device.updated -= 700
+            device.last_used -= 700
+            self.limiter._evicted -= 700
+            with self.limiter.slot(other):
+                pass
+        self.assertEqual(self.limiter.stats()['devices'], 2)
@@ -6,10 +6,12 @@ from django.shortcuts import render
 # Application Import:
 from logger.logger import Logger
 from autocore.connections.netcon import NetCon
+from autocore.connections.fleet import FleetExecutor
 from autocore.connections.yaml_reader import yaml_read
 
 # Model Import:
 from inventory.models.device import Device
+from inventory.models.group import Group
 
 # Celery Import:
 from celery import shared_task
@@ -33,7 +35,7 @@ def test_task(self, commands) -> bool:
     # output.append(connection.enabled_commands([
     #     ['show version', 'Cisco']
     # ]))
-    output.append(connection.enabled_commands('show ip route'))
+    output.append(connection.enabled_commands('show ip route', parse=False))
     # output.append(connection.enabled_commands('show version', 'Cisco'))
     # output.append(connection.configuration_commands(['hostname RKKR', 'no ip domain name']))
     connection.close_connection()
@@ -41,6 +43,25 @@ def test_task(self, commands) -> bool:
     async_to_sync(channel_layer.group_send)('collect', {'type': 'send_collect', 'text': str(output)})
     return output
 
+@shared_task(bind=True, track_started=True, name='Fleet task')
+def fleet_task(self, commands, group_id: int = None, device_ids: list = None, max_sessions: int = 50) -> dict:
+
+    # Collect devices from group or list of device IDs:
+    if group_id is not None:
+        devices = Group.objects.get(id=group_id).devices.filter(active=True)
+    else:
+        devices = Device.objects.filter(id__in=device_ids or [], active=True)
+
+    output = {}
+    fleet = FleetExecutor(devices, self.request.id, max_sessions)
+    # Stream each device output as soon as device finishes:
+    for result in fleet.enabled_commands(commands, parse=False):
+        device_name = result['device'].name
+        output[device_name] = str(result['output'])
+        async_to_sync(channel_layer.group_send)('collect', {'type': 'send_collect', 'text': f'{device_name}: {output[device_name]}'})
+
+    return output
+
 # Views:
 def automation(request, commands):
 